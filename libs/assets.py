@@ -0,0 +1,266 @@
+import os
+import re
+import gzip
+import hashlib
+import mimetypes
+import threading
+from flask import request, Response, send_file, send_from_directory, abort
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, assets are only gzip compressed without it
+    brotli = None
+
+# Directory the static assets are served from
+STATIC_DIR = "static"
+
+# Files that must keep a stable URL (the service worker is looked up by its URL)
+UNVERSIONED_FILES = {'sw.js'}
+
+# Text assets that are precompressed and kept in memory
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.json', '.svg', '.txt')
+
+# Files smaller than this aren't worth compressing
+MIN_COMPRESS_SIZE = 1024
+
+# Fingerprinted assets never change, so browsers may keep them for a year without revalidating
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Placeholder in sw.js replaced with the build hash, so every deploy gets a fresh service worker cache
+BUILD_HASH_PLACEHOLDER = '__BUILD_HASH__'
+
+# Matches references to static files in HTML and JavaScript (e.g. "/static/js/app.js")
+STATIC_REFERENCE_PATTERN = re.compile(r'/static/([A-Za-z0-9_./-]+)')
+
+# Current asset manifest, see _build_manifest
+_manifest = None
+# Precompressed text assets: path -> {'mtime', 'variants': {encoding: bytes}}
+_compressed = {}
+# Built service worker: {'mtime', 'build_hash', 'etag', 'variants': {encoding: bytes}}
+_service_worker = None
+_assets_lock = threading.Lock()
+
+def reload_enabled():
+    """Check whether pages and assets are reloaded when their files change
+
+    Enabled in development mode so edits show up without a restart. Can be
+    forced either way with the PAGES_RELOAD environment variable.
+    """
+    default = 'false' if os.environ.get('SERVER_MODE', 'development').lower() == 'production' else 'true'
+    return os.environ.get('PAGES_RELOAD', default).lower() == 'true'
+
+def compress_variants(body):
+    """Precompress a response body
+
+    Args:
+        body (bytes): The uncompressed body
+
+    Returns:
+        dict: encoding -> body, always containing 'identity' plus 'gzip' (and 'br' with brotli installed)
+    """
+    variants = {'identity': body}
+    if len(body) >= MIN_COMPRESS_SIZE:
+        variants['gzip'] = gzip.compress(body, compresslevel=9)
+        if brotli is not None:
+            variants['br'] = brotli.compress(body)
+    return variants
+
+def choose_encoding(variants):
+    """Pick the best precompressed variant the client accepts"""
+    for encoding in ('br', 'gzip'):
+        if encoding in variants and encoding in request.accept_encodings:
+            return encoding
+    return 'identity'
+
+def _scan_assets():
+    """List the fingerprintable assets as sorted (path, mtime) pairs"""
+    assets = []
+    for root, _, files in os.walk(STATIC_DIR):
+        for filename in files:
+            full_path = os.path.join(root, filename)
+            path = os.path.relpath(full_path, STATIC_DIR).replace(os.sep, '/')
+            if filename.endswith('.html') or path in UNVERSIONED_FILES:
+                continue
+            assets.append((path, os.stat(full_path).st_mtime_ns))
+    return sorted(assets)
+
+def _fingerprint(path, content_hash):
+    """Insert a content hash into a filename (js/app.js -> js/app.<hash>.js)"""
+    base, ext = os.path.splitext(path)
+    return f"{base}.{content_hash}{ext}"
+
+def _build_manifest(assets):
+    """Hash every asset
+
+    Returns:
+        dict: 'signature' (the scanned files), 'build_hash', 'urls' (path -> fingerprinted path)
+              and 'files' (fingerprinted path -> path)
+    """
+    urls = {}
+    build = hashlib.sha256()
+
+    for path, _ in assets:
+        hasher = hashlib.sha256()
+        with open(os.path.join(STATIC_DIR, path), 'rb') as f:
+            for chunk in iter(lambda: f.read(64 * 1024), b''):
+                hasher.update(chunk)
+        content_hash = hasher.hexdigest()[:12]
+        urls[path] = _fingerprint(path, content_hash)
+        build.update(f"{path}:{content_hash}\n".encode('utf-8'))
+
+    return {
+        'signature': assets,
+        'build_hash': build.hexdigest()[:12],
+        'urls': urls,
+        'files': {fingerprinted: path for path, fingerprinted in urls.items()},
+    }
+
+def get_manifest():
+    """Get the asset manifest, hashing the static files on first use
+
+    In development mode the static directory is rescanned on every call and the
+    manifest is rebuilt when a file changed.
+    """
+    global _manifest
+
+    with _assets_lock:
+        manifest = _manifest
+    if manifest is not None and not reload_enabled():
+        return manifest
+
+    assets = _scan_assets()
+    if manifest is not None and manifest['signature'] == assets:
+        return manifest
+
+    manifest = _build_manifest(assets)
+    with _assets_lock:
+        _manifest = manifest
+    print(f"[INFO] Hashed {len(manifest['urls'])} static assets (build {manifest['build_hash']})")
+    return manifest
+
+def get_build_hash():
+    """Get the hash identifying the current set of static assets"""
+    return get_manifest()['build_hash']
+
+def rewrite_references(text):
+    """Point /static/ references at the fingerprinted asset URLs
+
+    Args:
+        text (str): HTML or JavaScript source
+
+    Returns:
+        str: The source with every known asset reference fingerprinted
+    """
+    urls = get_manifest()['urls']
+
+    def replace(match):
+        fingerprinted = urls.get(match.group(1))
+        return f"/static/{fingerprinted}" if fingerprinted else match.group(0)
+
+    return STATIC_REFERENCE_PATTERN.sub(replace, text)
+
+def _get_compressed(path):
+    """Get the precompressed variants of a text asset, loading them on first use"""
+    full_path = os.path.join(STATIC_DIR, path)
+    mtime = os.stat(full_path).st_mtime_ns
+
+    with _assets_lock:
+        entry = _compressed.get(path)
+    if entry is not None and entry['mtime'] == mtime:
+        return entry['variants']
+
+    with open(full_path, 'rb') as f:
+        variants = compress_variants(f.read())
+    with _assets_lock:
+        _compressed[path] = {'mtime': mtime, 'variants': variants}
+    return variants
+
+def _serve_variants(variants, mimetype, etag, cache_control):
+    """Serve the best precompressed variant with a strong ETag per encoding"""
+    encoding = choose_encoding(variants)
+
+    response = Response(variants[encoding], mimetype=mimetype)
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag if encoding == 'identity' else f"{etag}-{encoding}")
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = cache_control
+    return response.make_conditional(request)
+
+def _build_service_worker(path, mtime, build_hash):
+    """Read sw.js, tie its cache name and precached URLs to the build and precompress it"""
+    with open(path, 'r') as f:
+        source = f.read()
+
+    body = rewrite_references(source.replace(BUILD_HASH_PLACEHOLDER, build_hash)).encode('utf-8')
+    return {
+        'mtime': mtime,
+        'build_hash': build_hash,
+        'etag': hashlib.sha256(body).hexdigest()[:32],
+        'variants': compress_variants(body),
+    }
+
+def get_service_worker():
+    """Get the built service worker, building it on first use and for every new build
+
+    Returns:
+        dict: The service worker ('etag' and 'variants')
+    """
+    global _service_worker
+    path = os.path.join(STATIC_DIR, 'sw.js')
+
+    with _assets_lock:
+        service_worker = _service_worker
+    if service_worker is not None and not reload_enabled():
+        return service_worker
+
+    # Only check the file and build when reloading is enabled or it isn't built yet
+    mtime = os.stat(path).st_mtime_ns
+    build_hash = get_build_hash()
+    if service_worker is not None and service_worker['mtime'] == mtime and service_worker['build_hash'] == build_hash:
+        return service_worker
+
+    service_worker = _build_service_worker(path, mtime, build_hash)
+    with _assets_lock:
+        _service_worker = service_worker
+    return service_worker
+
+def serve_service_worker():
+    """Serve sw.js with its cache name and precached URLs tied to the current build"""
+    service_worker = get_service_worker()
+
+    # Browsers check for service worker updates themselves, it must never be cached for long
+    return _serve_variants(service_worker['variants'], 'application/javascript',
+                           service_worker['etag'], 'no-cache')
+
+def serve_static(path):
+    """Serve a static file
+
+    Fingerprinted URLs are served with immutable caching (text assets from memory,
+    precompressed). Plain URLs keep working with regular revalidation.
+
+    Args:
+        path (str): The path below /static/
+
+    Returns:
+        Response: The file response
+    """
+    if path == 'sw.js':
+        return serve_service_worker()
+
+    source = get_manifest()['files'].get(path)
+    if source is None:
+        return send_from_directory(STATIC_DIR, path)
+
+    full_path = os.path.join(STATIC_DIR, source)
+    if not os.path.exists(full_path):
+        abort(404)
+
+    mimetype = mimetypes.guess_type(source)[0] or 'application/octet-stream'
+    if source.endswith(COMPRESSIBLE_EXTENSIONS):
+        # The fingerprint is the content hash, so it doubles as the ETag
+        return _serve_variants(_get_compressed(source), mimetype, path, IMMUTABLE_CACHE_CONTROL)
+
+    response = send_file(full_path, mimetype=mimetype, conditional=True)
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
@@ -1,18 +1,49 @@
 import os
 import json
+import secrets
+import threading
+
+# Nothing here touches the environment or the disk on import: .env is only loaded by
+# server.py after the libs are imported, and settings may change DATA_DIR later on.
+# DATA_DIR and the *_DB_PATH attributes are resolved on first use (see __getattr__).
+
+# Database files under the data directory, by the attribute (and environment variable
+# overriding the path) they are available as
+DB_FILES = {
+    'USERS_DB_PATH': 'users.json',
+    'LOGS_DB_PATH': 'logs.json',
+    'SETTINGS_DB_PATH': 'settings.json',
+    'PASSKEYS_DB_PATH': 'passkeys.json',
+    'DOWNLOADS_DB_PATH': 'downloads.json',
+    'INVITES_DB_PATH': 'invites.json',
+    'REFRESH_TOKENS_DB_PATH': 'refresh_tokens.json',
+    'SESSIONS_DB_PATH': 'sessions.db',
+}
+
+# Database paths resolved so far (a path doesn't change once a database is in use)
+_db_paths = {}
+_db_paths_lock = threading.Lock()
 
 # Global data directory for all JSON database files
-# Default to 'data' directory in the current working directory
-# This will be updated by settings.apply_settings_to_env() if DATA_DIR is set in settings
-DATA_DIR = os.environ.get('DATA_DIR', 'data')
+def get_data_dir():
+    """Get the data directory
+
+    Defaults to 'data' in the current working directory. Read from the environment
+    on every call, so DATA_DIR from .env or the settings applies.
+
+    Returns:
+        str: The data directory
+    """
+    return os.environ.get('DATA_DIR', 'data')
 
 # Ensure the data directory exists
 def ensure_data_dir():
     """Ensure the data directory exists"""
-    if not os.path.exists(DATA_DIR):
-        os.makedirs(DATA_DIR, exist_ok=True)
-        print(f"[INFO] Created data directory at {DATA_DIR}")
-    return DATA_DIR
+    data_dir = get_data_dir()
+    if not os.path.exists(data_dir):
+        os.makedirs(data_dir, exist_ok=True)
+        print(f"[INFO] Created data directory at {data_dir}")
+    return data_dir
 
 # Get the full path for a database file
 def get_db_path(filename, env_var=None):
@@ -38,22 +69,80 @@ def get_db_path(filename, env_var=None):
         return path
 
     # Otherwise, use the data directory
-    ensure_data_dir()
-    return os.path.join(DATA_DIR, filename)
-
-# Database paths
-USERS_DB_PATH = get_db_path('users.json', 'USERS_DB_PATH')
-LOGS_DB_PATH = get_db_path('logs.json', 'LOGS_DB_PATH')
-SETTINGS_DB_PATH = get_db_path('settings.json', 'SETTINGS_DB_PATH')
-PASSKEYS_DB_PATH = get_db_path('passkeys.json', 'PASSKEYS_DB_PATH')
-DOWNLOADS_DB_PATH = get_db_path('downloads.json', 'DOWNLOADS_DB_PATH')
-INVITES_DB_PATH = get_db_path('invites.json', 'INVITES_DB_PATH')
-
-# Print database paths for debugging
-print(f"[INFO] Database paths:")
-print(f"  - Users: {USERS_DB_PATH}")
-print(f"  - Logs: {LOGS_DB_PATH}")
-print(f"  - Settings: {SETTINGS_DB_PATH}")
-print(f"  - Passkeys: {PASSKEYS_DB_PATH}")
-print(f"  - Downloads: {DOWNLOADS_DB_PATH}")
-print(f"  - Invites: {INVITES_DB_PATH}")
+    return os.path.join(ensure_data_dir(), filename)
+
+# Get a secret key shared by every worker process
+def get_secret(filename, env_var=None):
+    """
+    Get a secret key, generating and storing it under the data directory on first use
+
+    Every worker process has to sign sessions and tokens with the same key, so a
+    randomly generated key is persisted instead of being created per process.
+
+    Args:
+        filename (str): The filename the secret is stored in
+        env_var (str, optional): Environment variable holding the secret itself
+
+    Returns:
+        str: The secret key
+    """
+    # A secret set in the environment always wins
+    if env_var and os.environ.get(env_var):
+        return os.environ.get(env_var)
+
+    path = get_db_path(filename)
+    if not os.path.exists(path):
+        # Write the secret to a temporary file and hard link it into place, so when several
+        # workers start at once exactly one secret wins and nobody reads a partial file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(secrets.token_hex(32))
+        os.chmod(tmp_path, 0o600)
+        try:
+            os.link(tmp_path, path)
+            print(f"[INFO] Generated new secret key at {path}")
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(tmp_path)
+
+    with open(path, 'r') as f:
+        return f.read().strip()
+
+# Database paths and the data directory, resolved on first use
+def _resolve_db_path(name):
+    """Get the path of a database by its attribute name (e.g. 'USERS_DB_PATH')"""
+    with _db_paths_lock:
+        if name not in _db_paths:
+            _db_paths[name] = get_db_path(DB_FILES[name], name)
+        return _db_paths[name]
+
+def __getattr__(name):
+    """Resolve config.DATA_DIR and config.<NAME>_DB_PATH when they are first read
+
+    Args:
+        name (str): The attribute
+
+    Returns:
+        str: The data directory or the database path
+    """
+    if name == 'DATA_DIR':
+        return get_data_dir()
+
+    if name in DB_FILES:
+        return _resolve_db_path(name)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Print database paths for debugging (called once at startup instead of on every import)
+def print_db_paths():
+    """Print the database paths in use"""
+    print(f"[INFO] Database paths:")
+    print(f"  - Users: {_resolve_db_path('USERS_DB_PATH')}")
+    print(f"  - Logs: {_resolve_db_path('LOGS_DB_PATH')}")
+    print(f"  - Settings: {_resolve_db_path('SETTINGS_DB_PATH')}")
+    print(f"  - Passkeys: {_resolve_db_path('PASSKEYS_DB_PATH')}")
+    print(f"  - Downloads: {_resolve_db_path('DOWNLOADS_DB_PATH')}")
+    print(f"  - Invites: {_resolve_db_path('INVITES_DB_PATH')}")
+    print(f"  - Refresh tokens: {_resolve_db_path('REFRESH_TOKENS_DB_PATH')}")
+    print(f"  - Sessions: {_resolve_db_path('SESSIONS_DB_PATH')}")
@@ -3,28 +3,25 @@ import json
 import datetime
 import libs.config as config
 
-# Path to the downloads database file
-DOWNLOADS_DB_PATH = config.DOWNLOADS_DB_PATH
-
 def init_downloads_db():
     """Initialize the downloads database if it doesn't exist"""
     # Ensure the directory exists if path contains directories
-    if os.path.dirname(DOWNLOADS_DB_PATH):
-        os.makedirs(os.path.dirname(DOWNLOADS_DB_PATH), exist_ok=True)
+    if os.path.dirname(config.DOWNLOADS_DB_PATH):
+        os.makedirs(os.path.dirname(config.DOWNLOADS_DB_PATH), exist_ok=True)
 
-    if not os.path.exists(DOWNLOADS_DB_PATH):
-        with open(DOWNLOADS_DB_PATH, 'w') as f:
+    if not os.path.exists(config.DOWNLOADS_DB_PATH):
+        with open(config.DOWNLOADS_DB_PATH, 'w') as f:
             json.dump({"downloads": []}, f)
-        print("[INFO] Created new downloads database at", DOWNLOADS_DB_PATH)
+        print("[INFO] Created new downloads database at", config.DOWNLOADS_DB_PATH)
 
 def get_downloads():
     """Get all downloads from the database"""
-    if not os.path.exists(DOWNLOADS_DB_PATH):
+    if not os.path.exists(config.DOWNLOADS_DB_PATH):
         print(f"[INFO] Downloads file does not exist, initializing")
         init_downloads_db()
 
     try:
-        with open(DOWNLOADS_DB_PATH, 'r') as f:
+        with open(config.DOWNLOADS_DB_PATH, 'r') as f:
             data = json.load(f)
             return data
     except Exception as e:
@@ -33,7 +30,7 @@ def get_downloads():
 
 def save_downloads(downloads_data):
     """Save downloads data to the database"""
-    with open(DOWNLOADS_DB_PATH, 'w') as f:
+    with open(config.DOWNLOADS_DB_PATH, 'w') as f:
         json.dump(downloads_data, f, indent=2)
 
 def add_download(username, torrent_hash, torrent_name, download_path):
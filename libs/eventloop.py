@@ -0,0 +1,94 @@
+import os
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import libs.wsgi as wsgi
+
+# Shared asyncio event loop running in a background thread
+#
+# Request handlers are synchronous (Flask), so coroutines are submitted to this
+# loop with run() and the calling thread waits for the result. Blocking calls
+# (e.g. providers without async support) run in a bounded thread pool via run_blocking().
+# The loop and pool are created on first use, so every worker process gets its own.
+
+# Blocking calls (e.g. provider requests) each request thread may have running at the same time,
+# the default number of threads for blocking calls is SERVER_THREADS times this (BLOCKING_WORKERS overrides it)
+BLOCKING_CALLS_PER_THREAD = 4
+
+_loop = None
+_loop_thread = None
+_blocking_executor = None
+_loop_lock = threading.Lock()
+
+def get_loop():
+    """Get the shared event loop, starting its thread on first use
+
+    Returns:
+        asyncio.AbstractEventLoop: The running loop
+    """
+    global _loop, _loop_thread
+    with _loop_lock:
+        if _loop is None or not _loop_thread.is_alive():
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run_loop():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            _loop_thread = threading.Thread(target=run_loop, name="event-loop", daemon=True)
+            _loop_thread.start()
+            ready.wait()
+            _loop = loop
+            print("[INFO] Started shared event loop")
+        return _loop
+
+def get_blocking_workers():
+    """Get the size of thread pools running blocking calls (BLOCKING_WORKERS)
+
+    Defaults to enough threads for every request thread (SERVER_THREADS) to call
+    several providers at once, so concurrent searches don't queue for a thread.
+    """
+    default = wsgi.get_server_settings()['threads'] * BLOCKING_CALLS_PER_THREAD
+    return max(1, int(os.environ.get('BLOCKING_WORKERS', default)))
+
+def _get_blocking_executor():
+    """Get the thread pool for blocking calls, creating it on first use"""
+    global _blocking_executor
+    with _loop_lock:
+        if _blocking_executor is None:
+            _blocking_executor = ThreadPoolExecutor(max_workers=get_blocking_workers(), thread_name_prefix="blocking")
+        return _blocking_executor
+
+def run(coro, timeout=None):
+    """
+    Run a coroutine on the shared loop and wait for its result
+
+    Must not be called from the loop's own thread (use await there).
+
+    Args:
+        coro: The coroutine
+        timeout (float, optional): Seconds to wait. Defaults to waiting until it's done.
+
+    Returns:
+        Any: The coroutine's result (its exception is re-raised)
+    """
+    loop = get_loop()
+    if threading.current_thread() is _loop_thread:
+        coro.close()
+        raise RuntimeError("eventloop.run() can't be called from the event loop thread, await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+async def run_blocking(func, *args):
+    """
+    Run a blocking function in the blocking thread pool without blocking the loop
+
+    Args:
+        func (callable): The function
+        *args: Its arguments
+
+    Returns:
+        Any: The function's result
+    """
+    return await asyncio.get_running_loop().run_in_executor(_get_blocking_executor(), func, *args)
@@ -0,0 +1,785 @@
+import io
+import os
+import json
+import time
+import hashlib
+import secrets
+import threading
+import email.utils
+from contextlib import contextmanager
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import requests
+import libs.config as config
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows, fall back to the in-process lock
+    fcntl = None
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional, images are served in their original format without it
+    Image = None
+
+# Base URL of the TMDB image CDN
+TMDB_IMAGE_BASE_URL = "https://image.tmdb.org/t/p"
+
+# Size classes accepted by the image proxy and the TMDB variant served for each
+SIZE_CLASSES = {
+    'thumb': 'w185',
+    'card': 'w342',
+    'poster': 'w500',
+    'backdrop': 'w780',
+}
+DEFAULT_SIZE_CLASS = 'poster'
+
+# Quality used when re-encoding images as WebP
+WEBP_QUALITY = 80
+
+# Default maximum size of the image cache in megabytes (image-cache-size setting)
+DEFAULT_CACHE_SIZE_MB = 512
+
+# Maximum number of images fetched from TMDB at the same time (image-proxy-concurrency setting)
+DEFAULT_UPSTREAM_CONCURRENCY = 8
+
+# Seconds to wait for a free upstream slot before giving up
+UPSTREAM_SLOT_TIMEOUT = 30
+
+# Timeout for connecting to / reading from image.tmdb.org
+UPSTREAM_TIMEOUT = 15
+
+# Eviction frees space down to this fraction of max_bytes, so the next few inserts
+# don't have to evict again
+LOW_WATERMARK = 0.9
+
+# Seconds between rescans of the cache directory, which other worker processes write to as well
+SYNC_INTERVAL = 60
+
+# Seconds between updates of an entry's last use on disk (its metadata file's mtime)
+TOUCH_INTERVAL = 10 * 60
+
+# Blobs no metadata file points at are deleted once they are this old (seconds),
+# younger ones may belong to an image another worker is still committing
+ORPHAN_BLOB_AGE = 60 * 60
+
+# Size of the chunks streamed from TMDB to the client
+CHUNK_SIZE = 64 * 1024
+
+# Number of posters warmed after a search (image-prefetch-count setting, 0 disables prefetching)
+DEFAULT_PREFETCH_COUNT = 20
+
+# Threads downloading prefetched posters (image-prefetch-workers setting). Kept below
+# the upstream concurrency so images requested by the browser still get a slot.
+DEFAULT_PREFETCH_WORKERS = 4
+
+class ImageCache:
+    """Content-addressed on-disk cache for proxied TMDB images
+
+    Image bodies are stored once under blobs/ named by the SHA-256 of their
+    content (which doubles as the ETag). A small metadata file per cache key
+    under meta/ points at the blob. Entries are evicted least recently used
+    first once the total size of the blobs exceeds max_bytes, down to
+    LOW_WATERMARK of it.
+
+    Every worker process keeps its own index, but the directory is shared: a
+    lookup missing the index reads the metadata file another worker may have
+    written, a lookup whose blob is gone (evicted by another worker) is a miss,
+    and every SYNC_INTERVAL a rescan of meta/ under a file lock rebuilds the
+    index and applies the limit to the cache as a whole. In between, a full
+    index evicts from memory alone. The metadata file's mtime is the entry's
+    last use.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_CACHE_SIZE_MB * 1024 * 1024):
+        self.cache_dir = cache_dir or os.path.join(config.DATA_DIR, 'image_cache')
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> metadata, least recently used first
+        self._touched = {}  # key -> when its last use was last written to disk
+        self._blob_refs = {}  # content hash -> number of keys pointing at it
+        self._total_bytes = 0
+        self._last_sync = time.monotonic()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        self._load()
+
+    def _meta_path(self, key):
+        """Get the metadata file path for a cache key"""
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, 'meta', digest[:2], f"{digest}.json")
+
+    def blob_path(self, content_hash):
+        """Get the path of a stored image body"""
+        return os.path.join(self.cache_dir, 'blobs', content_hash[:2], content_hash)
+
+    @contextmanager
+    def _file_lock(self):
+        """Hold the cache directory's lock (across processes) while evicting"""
+        if fcntl is None:
+            yield
+            return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(os.path.join(self.cache_dir, '.lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _scan(self):
+        """Read every metadata file on disk
+
+        Returns:
+            list: (last use, metadata) of entries whose blob exists, least recently used first
+        """
+        meta_dir = os.path.join(self.cache_dir, 'meta')
+        entries = []
+
+        for root, _, files in os.walk(meta_dir):
+            for filename in files:
+                if not filename.endswith('.json'):
+                    continue
+                path = os.path.join(root, filename)
+                try:
+                    with open(path, 'r') as f:
+                        meta = json.load(f)
+                    if not os.path.exists(self.blob_path(meta['hash'])):
+                        os.remove(path)
+                        continue
+                    entries.append((os.stat(path).st_mtime, meta))
+                except (OSError, ValueError, KeyError):
+                    continue
+
+        entries.sort(key=lambda item: item[0])
+        return entries
+
+    def _rebuild(self, entries):
+        """Replace the in-memory index (call with self._lock held)"""
+        self._entries.clear()
+        self._touched.clear()
+        self._blob_refs.clear()
+        self._total_bytes = 0
+        for last_used, meta in entries:
+            self._add_entry(meta)
+            self._touched[meta['key']] = last_used
+        self._last_sync = time.monotonic()
+
+    def _load(self):
+        """Rebuild the in-memory index from the metadata files on disk"""
+        entries = self._scan()
+        with self._lock:
+            self._rebuild(entries)
+
+        if entries:
+            print(f"[INFO] Loaded {len(entries)} cached images ({self._total_bytes // (1024 * 1024)} MiB) from {self.cache_dir}")
+
+    def _add_entry(self, meta):
+        """Add an entry to the in-memory index"""
+        old = self._entries.pop(meta['key'], None)
+        if old:
+            self._release_blob(old['hash'], old['size'])
+
+        self._entries[meta['key']] = meta
+        refs = self._blob_refs.get(meta['hash'], 0)
+        if refs == 0:
+            self._total_bytes += meta['size']
+        self._blob_refs[meta['hash']] = refs + 1
+
+    def _remove_entry(self, key):
+        """Remove an entry from the in-memory index (its files are left alone)"""
+        meta = self._entries.pop(key, None)
+        self._touched.pop(key, None)
+        if meta:
+            self._release_blob(meta['hash'], meta['size'])
+
+    def _release_blob(self, content_hash, size):
+        """Drop a reference to a blob in the in-memory accounting
+
+        Blob files are only deleted by eviction, other workers may still use them.
+        """
+        refs = self._blob_refs.get(content_hash, 0) - 1
+        if refs > 0:
+            self._blob_refs[content_hash] = refs
+            return
+
+        self._blob_refs.pop(content_hash, None)
+        self._total_bytes -= size
+
+    def _delete_orphan_blobs(self, referenced):
+        """Delete old blobs no metadata file points at (replaced images, interrupted commits)"""
+        blobs_dir = os.path.join(self.cache_dir, 'blobs')
+        cutoff = time.time() - ORPHAN_BLOB_AGE
+
+        for root, _, files in os.walk(blobs_dir):
+            for filename in files:
+                if filename in referenced or filename.endswith('.tmp'):
+                    continue
+                path = os.path.join(root, filename)
+                try:
+                    if os.stat(path).st_mtime < cutoff:
+                        os.remove(path)
+                except OSError:
+                    pass
+
+    def _delete_files(self, key, content_hash, delete_blob):
+        """Delete an evicted entry's metadata file and, if nothing else uses it, its blob"""
+        try:
+            os.remove(self._meta_path(key))
+        except OSError:
+            pass
+        if delete_blob:
+            try:
+                os.remove(self.blob_path(content_hash))
+            except OSError:
+                pass
+
+    def _evict_lru(self):
+        """Evict least recently used entries of the in-memory index down to the low watermark
+
+        Called without self._lock held once the index grows past max_bytes. Nothing
+        is rescanned: entries another worker used since this one last touched them
+        (their metadata file is newer) are kept and moved to the recent end. Another
+        worker pointing at a deleted blob under a different key just sees a miss.
+        """
+        target = int(self.max_bytes * LOW_WATERMARK)
+        evicted = 0
+
+        with self._file_lock():
+            while True:
+                with self._lock:
+                    if self._total_bytes <= target or not self._entries:
+                        break
+                    key, meta = next(iter(self._entries.items()))
+                    touched = self._touched.get(key, 0)
+
+                try:
+                    last_used = os.stat(self._meta_path(key)).st_mtime
+                except OSError:
+                    last_used = None
+
+                with self._lock:
+                    # Evicted or replaced by another thread meanwhile
+                    if self._entries.get(key) is not meta:
+                        continue
+
+                    # Used by another worker, keep it (1s slack for mtime rounding)
+                    if last_used is not None and last_used > touched + 1:
+                        self._entries.move_to_end(key)
+                        self._touched[key] = last_used
+                        continue
+
+                    self._remove_entry(key)
+                    delete_blob = meta['hash'] not in self._blob_refs
+                    self._stats['evictions'] += 1
+
+                self._delete_files(key, meta['hash'], delete_blob)
+                evicted += 1
+
+        if evicted:
+            print(f"[INFO] Evicted {evicted} cached images")
+
+    def _sync(self):
+        """Rescan the cache directory, evict down to the low watermark and rebuild the index
+
+        Called without self._lock held every SYNC_INTERVAL. Only one process syncs
+        or evicts at a time, and it rescans meta/ first since other workers add, use
+        and evict entries too.
+        """
+        with self._file_lock():
+            entries = self._scan()
+
+            refs = {}
+            total_bytes = 0
+            for _, meta in entries:
+                if meta['hash'] not in refs:
+                    refs[meta['hash']] = 0
+                    total_bytes += meta['size']
+                refs[meta['hash']] += 1
+
+            # Only evict once the limit is exceeded, but then make some room
+            limit = self.max_bytes if total_bytes <= self.max_bytes else int(self.max_bytes * LOW_WATERMARK)
+
+            evicted = 0
+            for _, meta in entries:
+                if total_bytes <= limit:
+                    break
+                refs[meta['hash']] -= 1
+                delete_blob = refs[meta['hash']] == 0
+                if delete_blob:
+                    del refs[meta['hash']]
+                    total_bytes -= meta['size']
+                self._delete_files(meta['key'], meta['hash'], delete_blob)
+                evicted += 1
+
+            self._delete_orphan_blobs(refs)
+
+        with self._lock:
+            self._rebuild(entries[evicted:])
+            self._stats['evictions'] += evicted
+
+    def _read_meta(self, key):
+        """Read an entry's metadata file (written by this or another worker), or None"""
+        try:
+            with open(self._meta_path(key), 'r') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta if meta.get('key') == key else None
+
+    def _lookup(self, key):
+        """Find an entry whose blob exists, in the index or on disk
+
+        Returns:
+            dict: The entry's metadata or None
+        """
+        with self._lock:
+            meta = self._entries.get(key)
+
+        from_disk = meta is None
+        if from_disk:
+            meta = self._read_meta(key)
+            if meta is None:
+                return None
+
+        # Another worker may have evicted it
+        if not os.path.exists(self.blob_path(meta['hash'])):
+            with self._lock:
+                self._remove_entry(key)
+            return None
+
+        if from_disk:
+            with self._lock:
+                if key not in self._entries:
+                    self._add_entry(meta)
+        return meta
+
+    def get(self, key):
+        """Look up a cached image
+
+        Args:
+            key (str): The cache key (e.g. 'w500/abc.jpg')
+
+        Returns:
+            dict: Metadata ('hash', 'size', 'content_type', 'last_modified', 'path') or None
+        """
+        meta = self._lookup(key)
+        now = time.time()
+
+        with self._lock:
+            if meta is None:
+                self._stats['misses'] += 1
+                return None
+
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            touch = now - self._touched.get(key, 0) >= TOUCH_INTERVAL
+            if touch:
+                self._touched[key] = now
+
+        # Record the use on disk, that's the order every worker evicts in
+        if touch:
+            try:
+                os.utime(self._meta_path(key))
+            except OSError:
+                pass
+
+        return {**meta, 'path': self.blob_path(meta['hash'])}
+
+    def put(self, key, data, content_type, last_modified=None):
+        """Store an image in the cache
+
+        Args:
+            key (str): The cache key
+            data (bytes): The image body
+            content_type (str): The image content type
+            last_modified (float, optional): Upstream modification time. Defaults to now.
+
+        Returns:
+            dict: Metadata for the stored image (same as get)
+        """
+        content_hash = hashlib.sha256(data).hexdigest()
+        blob_path = self.blob_path(content_hash)
+
+        # Identical images are stored only once
+        if not os.path.exists(blob_path):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            tmp_path = f"{blob_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, blob_path)
+
+        return self._commit(key, content_hash, len(data), content_type, last_modified)
+
+    def store_stream(self, key, chunks, content_type, last_modified=None):
+        """Pass image chunks through while writing them to the cache
+
+        The image is only added to the cache once every chunk has been consumed,
+        so a client disconnecting mid-download never leaves a truncated image behind.
+
+        Args:
+            key (str): The cache key
+            chunks (iterable): The image body in chunks
+            content_type (str): The image content type
+            last_modified (float, optional): Upstream modification time. Defaults to now.
+
+        Yields:
+            bytes: The chunks, unchanged
+        """
+        tmp_dir = os.path.join(self.cache_dir, 'tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        tmp_path = os.path.join(tmp_dir, f"{secrets.token_hex(8)}.part")
+
+        hasher = hashlib.sha256()
+        size = 0
+        complete = False
+
+        try:
+            with open(tmp_path, 'wb') as f:
+                for chunk in chunks:
+                    if not chunk:
+                        continue
+                    f.write(chunk)
+                    hasher.update(chunk)
+                    size += len(chunk)
+                    yield chunk
+            complete = True
+        finally:
+            # Close the source right away so it can release its resources
+            if hasattr(chunks, 'close'):
+                chunks.close()
+
+            if complete:
+                content_hash = hasher.hexdigest()
+                blob_path = self.blob_path(content_hash)
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                os.replace(tmp_path, blob_path)
+                self._commit(key, content_hash, size, content_type, last_modified)
+            else:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    def _commit(self, key, content_hash, size, content_type, last_modified):
+        """Record an image whose blob is already on disk"""
+        meta = {
+            'key': key,
+            'hash': content_hash,
+            'size': size,
+            'content_type': content_type,
+            'last_modified': last_modified or time.time(),
+        }
+
+        meta_path = self._meta_path(key)
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        tmp_path = f"{meta_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+        with self._lock:
+            self._add_entry(meta)
+            self._touched[key] = time.time()
+            # Other workers write to the cache too, so check the whole cache now and then
+            sync = time.monotonic() - self._last_sync >= SYNC_INTERVAL
+            if sync:
+                # Claim this sync, so other threads don't start one as well
+                self._last_sync = time.monotonic()
+            evict = not sync and self._total_bytes > self.max_bytes
+
+        if sync:
+            self._sync()
+        elif evict:
+            self._evict_lru()
+
+        return {**meta, 'path': self.blob_path(content_hash)}
+
+    def get_stats(self):
+        """Get cache metrics"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['bytes'] = self._total_bytes
+            stats['max_bytes'] = self.max_bytes
+
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
+
+    def contains(self, key):
+        """Check whether an image is cached without counting a hit or miss"""
+        return self._lookup(key) is not None
+
+# Shared cache instance, upstream concurrency limit and prefetch pool (created on first use)
+_cache = None
+_upstream_slots = None
+_prefetch_executor = None
+_prefetching = set()  # cache keys queued or being prefetched
+_cache_lock = threading.Lock()
+
+def get_cache():
+    """Get the shared image cache, creating it on first use"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            max_mb = int(os.environ.get('image-cache-size', DEFAULT_CACHE_SIZE_MB))
+            _cache = ImageCache(max_bytes=max_mb * 1024 * 1024)
+            print(f"[INFO] Image cache initialized at {_cache.cache_dir} (max {max_mb} MiB)")
+        return _cache
+
+def _get_upstream_slots():
+    """Get the semaphore bounding concurrent image downloads from TMDB"""
+    global _upstream_slots
+    with _cache_lock:
+        if _upstream_slots is None:
+            concurrency = int(os.environ.get('image-proxy-concurrency', DEFAULT_UPSTREAM_CONCURRENCY))
+            _upstream_slots = threading.BoundedSemaphore(concurrency)
+        return _upstream_slots
+
+class ImageStream:
+    """Image body streamed from TMDB to the client while it is written to the cache
+
+    Holds an upstream slot and the upstream connection until it is exhausted or
+    closed. WSGI servers always call close(), also when the body is never read
+    (e.g. a client disconnecting before the first chunk), so the slot can't leak.
+    """
+
+    def __init__(self, key, response, slots, content_type, last_modified, on_cached=None):
+        self.key = key
+        self.content_type = content_type
+        self.last_modified = last_modified
+        self._on_cached = on_cached
+        self._response = response
+        self._slots = slots
+        self._stream = None
+        self._released = False
+        self._release_lock = threading.Lock()
+
+    def _release(self):
+        """Close the upstream connection and free the upstream slot (once)"""
+        with self._release_lock:
+            if self._released:
+                return
+            self._released = True
+        self._response.close()
+        self._slots.release()
+
+    def _chunks(self):
+        try:
+            for chunk in self._response.iter_content(CHUNK_SIZE):
+                yield chunk
+        finally:
+            self._release()
+
+    def __iter__(self):
+        if self._stream is None:
+            self._stream = get_cache().store_stream(self.key, self._chunks(), self.content_type, self.last_modified)
+        return self._stream
+
+    def close(self):
+        """Stop streaming, releasing the upstream slot even if iteration never started"""
+        if self._stream is not None:
+            self._stream.close()
+        self._release()
+
+        # Runs after the body was sent, so it doesn't delay the client
+        if self._on_cached is not None and get_cache().contains(self.key):
+            on_cached, self._on_cached = self._on_cached, None
+            try:
+                on_cached()
+            except Exception as e:
+                print(f"[WARNING] Failed to handle cached TMDB image {self.key}: {e}")
+
+def stream_image(key, url, on_cached=None):
+    """Fetch an image from TMDB, streaming it to the caller while it is cached
+
+    Only a single chunk is held in memory at a time. The upstream slot is held
+    until the returned ImageStream is exhausted or closed (callers must close it).
+
+    Args:
+        key (str): The cache key to store the image under
+        url (str): The TMDB image URL
+        on_cached (callable, optional): Called without arguments when the stream is
+                                        closed, if the image made it into the cache
+
+    Returns:
+        tuple: (ImageStream, content_type), or None if no upstream slot became available
+
+    Raises:
+        requests.exceptions.RequestException: If TMDB can't be reached or returns an error
+    """
+    slots = _get_upstream_slots()
+    if not slots.acquire(timeout=UPSTREAM_SLOT_TIMEOUT):
+        print(f"[WARNING] No free upstream slot for TMDB image {url}")
+        return None
+
+    try:
+        response = requests.get(url, stream=True, timeout=UPSTREAM_TIMEOUT)
+        response.raise_for_status()
+    except Exception:
+        slots.release()
+        raise
+
+    last_modified = None
+    if response.headers.get('Last-Modified'):
+        try:
+            last_modified = email.utils.parsedate_to_datetime(response.headers['Last-Modified']).timestamp()
+        except (TypeError, ValueError):
+            pass
+
+    content_type = response.headers.get('Content-Type', 'image/jpeg')
+    return ImageStream(key, response, slots, content_type, last_modified, on_cached), content_type
+
+def fetch_image(key, url):
+    """Download an image from TMDB straight into the cache
+
+    Args:
+        key (str): The cache key to store the image under
+        url (str): The TMDB image URL
+
+    Returns:
+        bool: Whether the image is now cached
+    """
+    result = stream_image(key, url)
+    if result is None:
+        return False
+
+    chunks, _ = result
+    try:
+        for _ in chunks:
+            pass
+    finally:
+        chunks.close()
+    return get_cache().contains(key)
+
+def get_image_url(size_class, image_path):
+    """Get the TMDB URL of an image in the given size class"""
+    tmdb_size = SIZE_CLASSES.get(size_class, SIZE_CLASSES[DEFAULT_SIZE_CLASS])
+    return f"{TMDB_IMAGE_BASE_URL}/{tmdb_size}/{image_path.lstrip('/')}"
+
+def get_cache_key(size_class, image_path, webp=False):
+    """Get the cache key of an image in the given size class (and format)"""
+    tmdb_size = SIZE_CLASSES.get(size_class, SIZE_CLASSES[DEFAULT_SIZE_CLASS])
+    key = f"{tmdb_size}/{image_path.lstrip('/')}"
+    return f"webp/{key}" if webp else key
+
+def webp_enabled():
+    """Check whether images may be re-encoded as WebP (requires Pillow)"""
+    return Image is not None and os.environ.get('image-webp', 'true').lower() == 'true'
+
+def transcode_webp(source_key, key):
+    """Re-encode a cached image as WebP and cache the result
+
+    Args:
+        source_key (str): Cache key of the original image
+        key (str): Cache key to store the WebP image under
+
+    Returns:
+        dict: Metadata of the WebP image, or None if it couldn't be created
+    """
+    cache = get_cache()
+    source = cache._lookup(source_key)
+    if source is None or Image is None:
+        return None
+
+    try:
+        with Image.open(cache.blob_path(source['hash'])) as image:
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+            buffer = io.BytesIO()
+            image.save(buffer, format='WEBP', quality=WEBP_QUALITY)
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] Failed to transcode image {source_key} to WebP: {e}")
+        return None
+
+    return cache.put(key, buffer.getvalue(), 'image/webp', source['last_modified'])
+
+def _get_prefetch_executor():
+    """Get the thread pool that warms the cache in the background"""
+    global _prefetch_executor
+    with _cache_lock:
+        if _prefetch_executor is None:
+            workers = int(os.environ.get('image-prefetch-workers', DEFAULT_PREFETCH_WORKERS))
+            _prefetch_executor = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="image-prefetch")
+        return _prefetch_executor
+
+def _prefetch_image(size_class, image_path, webp):
+    """Download (and optionally transcode) a single image, ignoring errors"""
+    key = get_cache_key(size_class, image_path)
+    try:
+        cache = get_cache()
+        if not cache.contains(key) and not fetch_image(key, get_image_url(size_class, image_path)):
+            return
+
+        if webp:
+            webp_key = get_cache_key(size_class, image_path, webp=True)
+            if not cache.contains(webp_key):
+                transcode_webp(key, webp_key)
+    except Exception as e:
+        print(f"[WARNING] Failed to prefetch TMDB image {image_path}: {e}")
+    finally:
+        with _cache_lock:
+            _prefetching.discard(key)
+
+def prefetch_images(image_paths, size_class=DEFAULT_SIZE_CLASS, webp=False, limit=None):
+    """Warm the image cache for images the client is about to request
+
+    Downloads run in the background on a small thread pool, so this returns immediately.
+    Images that are already cached or queued are skipped.
+
+    Args:
+        image_paths (list): TMDB image paths (e.g. '/abc.jpg'), most important first
+        size_class (str): The size class the client will request
+        webp (bool): Whether to also create the WebP copy
+        limit (int, optional): Maximum number of images to prefetch. Defaults to the image-prefetch-count setting.
+
+    Returns:
+        int: Number of images queued for download
+    """
+    if limit is None:
+        limit = int(os.environ.get('image-prefetch-count', DEFAULT_PREFETCH_COUNT))
+    if limit <= 0:
+        return 0
+
+    cache = get_cache()
+    webp = webp and webp_enabled()
+    queued = []
+
+    for image_path in image_paths:
+        if len(queued) >= limit:
+            break
+        if not image_path:
+            continue
+
+        key = get_cache_key(size_class, image_path)
+        if cache.contains(key) and (not webp or cache.contains(get_cache_key(size_class, image_path, webp=True))):
+            continue
+
+        with _cache_lock:
+            if key in _prefetching:
+                continue
+            _prefetching.add(key)
+        queued.append(image_path)
+
+    executor = _get_prefetch_executor()
+    for image_path in queued:
+        executor.submit(_prefetch_image, size_class, image_path, webp)
+
+    return len(queued)
+
+def queue_webp(size_class, image_path):
+    """Create the WebP copy of an image in the background
+
+    Shares the prefetch pool, so an image already queued or being prefetched
+    isn't transcoded twice.
+
+    Args:
+        size_class (str): The size class of the image
+        image_path (str): The TMDB image path
+
+    Returns:
+        bool: Whether the image was queued
+    """
+    return prefetch_images([image_path], size_class=size_class, webp=True, limit=1) > 0
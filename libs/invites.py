@@ -1,42 +1,151 @@
 import os
 import json
+import heapq
 import secrets
 import datetime
+import threading
+from contextlib import contextmanager
 from datetime import timedelta
 import libs.logs as logs
 import libs.config as config
 
-# Path to the invites database file
-INVITES_DB_PATH = config.INVITES_DB_PATH
+try:
+    import fcntl
+except ImportError:  # Not available on Windows, fall back to the in-process lock
+    fcntl = None
+
+# In-memory index of the invites database
+# _invites_by_code: code -> invite
+# _expiry_heap: min-heap of (expires_at, code) used to prune expired invites
+_invites_by_code = {}
+_expiry_heap = []
+_index_loaded = False
+_index_mtime = None
+_index_lock = threading.RLock()
 
 def init_invites_db():
     """Initialize the invites database if it doesn't exist"""
     # Ensure the directory exists if path contains directories
-    if os.path.dirname(INVITES_DB_PATH):
-        os.makedirs(os.path.dirname(INVITES_DB_PATH), exist_ok=True)
+    if os.path.dirname(config.INVITES_DB_PATH):
+        os.makedirs(os.path.dirname(config.INVITES_DB_PATH), exist_ok=True)
 
-    if not os.path.exists(INVITES_DB_PATH):
-        with open(INVITES_DB_PATH, 'w') as f:
+    if not os.path.exists(config.INVITES_DB_PATH):
+        with open(config.INVITES_DB_PATH, 'w') as f:
             json.dump({"invites": []}, f)
-        print("[INFO] Created new invites database at", INVITES_DB_PATH)
+        print("[INFO] Created new invites database at", config.INVITES_DB_PATH)
 
-def get_invites():
-    """Get all invites from the database"""
-    if not os.path.exists(INVITES_DB_PATH):
+def _get_mtime(path):
+    """Return the modification time of a file or None if it doesn't exist"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def _index_invite(invite):
+    """Add an invite to the in-memory indexes"""
+    _invites_by_code[invite['code']] = invite
+    heapq.heappush(_expiry_heap, (invite['expires_at'], invite['code']))
+
+def _load_index():
+    """Make sure the in-memory index reflects the invites database on disk"""
+    global _index_loaded, _index_mtime
+
+    if not os.path.exists(config.INVITES_DB_PATH):
         print(f"[INFO] Invites file does not exist, initializing")
         init_invites_db()
 
+    mtime = _get_mtime(config.INVITES_DB_PATH)
+    if _index_loaded and mtime == _index_mtime:
+        return
+
     try:
-        with open(INVITES_DB_PATH, 'r') as f:
-            return json.load(f)
+        with open(config.INVITES_DB_PATH, 'r') as f:
+            data = json.load(f)
     except Exception as e:
         print(f"[ERROR] Failed to load invites: {e}")
-        return {"invites": []}
+        data = {"invites": []}
+
+    _invites_by_code.clear()
+    _expiry_heap.clear()
+    for invite in data.get('invites', []):
+        _index_invite(invite)
+
+    _index_loaded = True
+    _index_mtime = mtime
+
+def _remove_expired():
+    """Drop expired invites from the in-memory index (call with the lock held)
+
+    Returns:
+        int: Number of expired invites removed
+    """
+    now = datetime.datetime.now().isoformat()
+    removed_count = 0
+
+    # Pop invites off the expiry heap until the earliest one is still valid
+    while _expiry_heap and _expiry_heap[0][0] <= now:
+        expires_at, code = heapq.heappop(_expiry_heap)
+        invite = _invites_by_code.get(code)
+
+        # Skip heap entries for invites that were deleted or replaced
+        if invite and invite['expires_at'] == expires_at:
+            del _invites_by_code[code]
+            removed_count += 1
+
+    return removed_count
+
+def _write_db():
+    """Write the in-memory index to the invites database
+
+    Expired invites are pruned on every write, so no worker needs a
+    background sweeper for them.
+    """
+    global _index_mtime
+
+    removed_count = _remove_expired()
+    if removed_count > 0:
+        print(f"[INFO] Removed {removed_count} expired invites")
+
+    # Write to a temporary file first so readers never see a partial database
+    tmp_path = config.INVITES_DB_PATH + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({"invites": list(_invites_by_code.values())}, f, indent=2)
+    os.replace(tmp_path, config.INVITES_DB_PATH)
+
+    _index_mtime = _get_mtime(config.INVITES_DB_PATH)
+
+@contextmanager
+def _locked_index():
+    """Hold the invites lock (across threads and processes) with a fresh index"""
+    with _index_lock:
+        lock_file = None
+        if fcntl is not None:
+            if os.path.dirname(config.INVITES_DB_PATH):
+                os.makedirs(os.path.dirname(config.INVITES_DB_PATH), exist_ok=True)
+            lock_file = open(config.INVITES_DB_PATH + '.lock', 'w')
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            _load_index()
+            yield
+        finally:
+            if lock_file is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+                lock_file.close()
+
+def get_invites():
+    """Get all invites from the database"""
+    with _locked_index():
+        # Copies, so callers can't modify the index behind the lock
+        return {"invites": [dict(invite) for invite in _invites_by_code.values()]}
 
 def save_invites(invites_data):
     """Save invites data to the database"""
-    with open(INVITES_DB_PATH, 'w') as f:
-        json.dump(invites_data, f, indent=2)
+    with _locked_index():
+        _invites_by_code.clear()
+        _expiry_heap.clear()
+        for invite in invites_data.get('invites', []):
+            _index_invite(invite)
+        _write_db()
 
 def generate_invite_code():
     """Generate a unique invite code"""
@@ -57,8 +166,6 @@ def create_invite(creator_username, expiry_days=7, max_uses=1, is_admin=False, d
     Returns:
         tuple: (success, message, invite_code)
     """
-    invites_data = get_invites()
-
     # Generate a unique invite code
     invite_code = generate_invite_code()
 
@@ -80,11 +187,10 @@ def create_invite(creator_username, expiry_days=7, max_uses=1, is_admin=False, d
         'monthly_quota': monthly_quota
     }
 
-    # Add to invites
-    invites_data['invites'].append(invite)
-
-    # Save invites
-    save_invites(invites_data)
+    # Add to invites and save
+    with _locked_index():
+        _index_invite(invite)
+        _write_db()
 
     # Log invite creation
     logs.log_event(creator_username, 'invite_created', f"Created invite code {invite_code}")
@@ -100,13 +206,10 @@ def get_invite_by_code(invite_code):
     Returns:
         dict: The invite data or None if not found
     """
-    invites_data = get_invites()
-
-    for invite in invites_data['invites']:
-        if invite['code'] == invite_code:
-            return invite
-
-    return None
+    with _locked_index():
+        invite = _invites_by_code.get(invite_code)
+        # A copy, so callers can't modify the index behind the lock
+        return dict(invite) if invite else None
 
 def validate_invite(invite_code):
     """Validate an invite code
@@ -117,8 +220,17 @@ def validate_invite(invite_code):
     Returns:
         tuple: (is_valid, message, invite_data)
     """
-    invite = get_invite_by_code(invite_code)
+    return _check_invite(get_invite_by_code(invite_code))
+
+def _check_invite(invite):
+    """Check whether an invite can still be used
 
+    Args:
+        invite (dict): The invite data or None
+
+    Returns:
+        tuple: (is_valid, message, invite_data)
+    """
     if not invite:
         return False, "Invalid invite code", None
 
@@ -135,6 +247,47 @@ def validate_invite(invite_code):
 
     return True, "Invite code is valid", invite
 
+def consume_invite(invite_code):
+    """Validate an invite code and mark it as used in a single step
+
+    The check and the increment happen under the same lock, so concurrent
+    registrations can never use an invite more than max_uses times.
+
+    Args:
+        invite_code (str): The invite code to consume
+
+    Returns:
+        tuple: (is_valid, message, invite_data)
+    """
+    with _locked_index():
+        is_valid, message, invite = _check_invite(_invites_by_code.get(invite_code))
+        if not is_valid:
+            return is_valid, message, invite
+
+        # Increment uses and save
+        invite['uses'] += 1
+        _write_db()
+
+        return True, message, dict(invite)
+
+def release_invite(invite_code):
+    """Give back a use consumed by consume_invite (e.g. when registration fails)
+
+    Args:
+        invite_code (str): The invite code to release
+
+    Returns:
+        bool: Whether the invite was found and released
+    """
+    with _locked_index():
+        invite = _invites_by_code.get(invite_code)
+        if not invite or invite['uses'] <= 0:
+            return False
+
+        invite['uses'] -= 1
+        _write_db()
+        return True
+
 def use_invite(invite_code):
     """Mark an invite as used
 
@@ -144,18 +297,15 @@ def use_invite(invite_code):
     Returns:
         bool: Whether the invite was successfully marked as used
     """
-    invites_data = get_invites()
-
-    for invite in invites_data['invites']:
-        if invite['code'] == invite_code:
-            # Increment uses
-            invite['uses'] += 1
+    with _locked_index():
+        invite = _invites_by_code.get(invite_code)
+        if not invite:
+            return False
 
-            # Save invites
-            save_invites(invites_data)
-            return True
-
-    return False
+        # Increment uses and save
+        invite['uses'] += 1
+        _write_db()
+        return True
 
 def delete_invite(invite_code, admin_username):
     """Delete an invite
@@ -167,22 +317,16 @@ def delete_invite(invite_code, admin_username):
     Returns:
         tuple: (success, message)
     """
-    invites_data = get_invites()
-
-    for i, invite in enumerate(invites_data['invites']):
-        if invite['code'] == invite_code:
-            # Remove the invite
-            invites_data['invites'].pop(i)
+    with _locked_index():
+        # Remove the invite and save
+        if _invites_by_code.pop(invite_code, None) is None:
+            return False, "Invite not found"
+        _write_db()
 
-            # Save invites
-            save_invites(invites_data)
+    # Log invite deletion
+    logs.log_event(admin_username, 'invite_deleted', f"Deleted invite code {invite_code}")
 
-            # Log invite deletion
-            logs.log_event(admin_username, 'invite_deleted', f"Deleted invite code {invite_code}")
-
-            return True, "Invite deleted successfully"
-
-    return False, "Invite not found"
+    return True, "Invite deleted successfully"
 
 def clean_expired_invites():
     """Remove expired invites from the database
@@ -190,22 +334,11 @@ def clean_expired_invites():
     Returns:
         int: Number of expired invites removed
     """
-    invites_data = get_invites()
-    now = datetime.datetime.now()
-
-    # Filter out expired invites
-    original_count = len(invites_data['invites'])
-    invites_data['invites'] = [
-        invite for invite in invites_data['invites']
-        if datetime.datetime.fromisoformat(invite['expires_at']) > now
-    ]
-
-    # Calculate how many were removed
-    removed_count = original_count - len(invites_data['invites'])
-
-    if removed_count > 0:
-        # Save invites
-        save_invites(invites_data)
-        print(f"[INFO] Removed {removed_count} expired invites")
+    with _locked_index():
+        removed_count = _remove_expired()
+        if removed_count > 0:
+            # Nothing left to prune, so _write_db doesn't log them again
+            _write_db()
+            print(f"[INFO] Removed {removed_count} expired invites")
 
     return removed_count
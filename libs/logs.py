@@ -5,19 +5,16 @@ from datetime import timedelta
 from flask import session
 import libs.config as config
 
-# Path to the logs database file
-LOGS_DB_PATH = config.LOGS_DB_PATH
-
 def init_logs_db():
     """Initialize the logs database if it doesn't exist"""
     # Ensure the directory exists if path contains directories
-    if os.path.dirname(LOGS_DB_PATH):
-        os.makedirs(os.path.dirname(LOGS_DB_PATH), exist_ok=True)
+    if os.path.dirname(config.LOGS_DB_PATH):
+        os.makedirs(os.path.dirname(config.LOGS_DB_PATH), exist_ok=True)
 
-    if not os.path.exists(LOGS_DB_PATH):
-        with open(LOGS_DB_PATH, 'w') as f:
+    if not os.path.exists(config.LOGS_DB_PATH):
+        with open(config.LOGS_DB_PATH, 'w') as f:
             json.dump({"logs": []}, f)
-        print("[INFO] Created new logs database at", LOGS_DB_PATH)
+        print("[INFO] Created new logs database at", config.LOGS_DB_PATH)
 
 def is_log_older_than_days(log_timestamp, days=7):
     """Check if a log is older than the specified number of days
@@ -63,12 +60,12 @@ def purge_old_logs(logs_data, days=7):
 
 def get_logs():
     """Get all logs from the database and purge old logs"""
-    if not os.path.exists(LOGS_DB_PATH):
+    if not os.path.exists(config.LOGS_DB_PATH):
         print(f"[INFO] Logs file does not exist, initializing")
         init_logs_db()
 
     try:
-        with open(LOGS_DB_PATH, 'r') as f:
+        with open(config.LOGS_DB_PATH, 'r') as f:
             data = json.load(f)
 
             # Purge logs older than 7 days
@@ -84,7 +81,7 @@ def get_logs():
 
 def save_logs(logs_data):
     """Save logs data to the database"""
-    with open(LOGS_DB_PATH, 'w') as f:
+    with open(config.LOGS_DB_PATH, 'w') as f:
         json.dump(logs_data, f, indent=2)
 
 def add_log(log_type, username, details=None):
@@ -0,0 +1,87 @@
+import os
+import hashlib
+import threading
+from flask import request, Response
+import libs.assets as assets
+
+# Directory the HTML pages are loaded from
+PAGES_DIR = "static"
+
+# Loaded pages: filename -> {'mtime', 'build_hash', 'etag', 'variants': {encoding: bytes}}
+# The 'identity' variant is the page itself, 'gzip' and 'br' are precompressed copies
+_pages = {}
+_pages_lock = threading.Lock()
+
+def _build_page(path, mtime, build_hash):
+    """Read a page from disk, fingerprint its asset references and precompress it"""
+    with open(path, 'r', encoding='utf-8') as f:
+        body = assets.rewrite_references(f.read()).encode('utf-8')
+
+    return {
+        'mtime': mtime,
+        'build_hash': build_hash,
+        'etag': hashlib.sha256(body).hexdigest()[:32],
+        'variants': assets.compress_variants(body),
+    }
+
+def get_page(filename):
+    """Get a page, loading it on first use
+
+    Args:
+        filename (str): The page filename relative to PAGES_DIR (e.g. 'index.html')
+
+    Returns:
+        dict: The loaded page ('etag' and 'variants')
+    """
+    path = os.path.join(PAGES_DIR, filename)
+
+    with _pages_lock:
+        page = _pages.get(filename)
+        if page is not None and not assets.reload_enabled():
+            return page
+
+    # Only check the file and assets when reloading is enabled or the page isn't loaded yet
+    mtime = os.stat(path).st_mtime_ns
+    build_hash = assets.get_build_hash()
+    if page is not None and page['mtime'] == mtime and page['build_hash'] == build_hash:
+        return page
+
+    page = _build_page(path, mtime, build_hash)
+    with _pages_lock:
+        _pages[filename] = page
+    return page
+
+def serve_page(filename):
+    """Serve a page from memory with a strong ETag and precompressed variants
+
+    Clients sending a matching If-None-Match get an empty 304 Not Modified.
+
+    Args:
+        filename (str): The page filename relative to PAGES_DIR (e.g. 'index.html')
+
+    Returns:
+        Response: The page response
+    """
+    page = get_page(filename)
+    encoding = assets.choose_encoding(page['variants'])
+
+    response = Response(page['variants'][encoding], mimetype='text/html')
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+
+    # Every encoding is a different representation and needs its own strong ETag
+    response.set_etag(page['etag'] if encoding == 'identity' else f"{page['etag']}-{encoding}")
+    response.headers['Vary'] = 'Accept-Encoding'
+    # Pages are behind login, so only the browser may keep them and it has to revalidate
+    response.headers['Cache-Control'] = 'private, no-cache'
+
+    return response.make_conditional(request)
+
+def preload_pages():
+    """Load and compress every page up front (e.g. during warm-up)"""
+    for filename in os.listdir(PAGES_DIR):
+        if filename.endswith('.html'):
+            try:
+                get_page(filename)
+            except OSError as e:
+                print(f"[ERROR] Failed to load page {filename}: {e}")
@@ -1,6 +1,8 @@
 import os
 import json
 import time
+import threading
+from contextlib import contextmanager
 from flask import session
 from webauthn import (
     generate_registration_options,
@@ -19,8 +21,10 @@ import libs.users as users
 import libs.tokens as tokens
 import libs.config as config
 
-# Path to the passkeys database file
-PASSKEYS_DB_PATH = config.PASSKEYS_DB_PATH
+try:
+    import fcntl
+except ImportError:  # Not available on Windows, fall back to the in-process lock
+    fcntl = None
 
 # WebAuthn configuration
 # These settings determine how passkeys work with your domain
@@ -34,48 +38,246 @@ RP_ORIGIN = os.environ.get('RP_ORIGIN', 'http://localhost')
 # Print WebAuthn configuration for debugging
 print(f"[INFO] WebAuthn configuration: RP_ID={RP_ID}, RP_NAME={RP_NAME}, RP_ORIGIN={RP_ORIGIN}")
 
+# The append-only journal of sign count updates lives next to the passkeys database
+# Authentications append a single line there instead of rewriting the whole database
+def _journal_path():
+    """Get the path of the sign count journal"""
+    return config.PASSKEYS_DB_PATH + '.journal'
+
+# Number of journal entries after which the journal is folded back into the database
+JOURNAL_COMPACT_THRESHOLD = 100
+
+# In-memory index of the passkeys database
+# _passkeys_by_id: credential_id -> passkey
+# _passkeys_by_user: username -> {credential_id: passkey}
+_passkeys_by_id = {}
+_passkeys_by_user = {}
+_index_loaded = False
+_index_mtime = None
+_journal_offset = 0
+_journal_entries = 0
+_index_lock = threading.RLock()
+
 def init_passkeys_db():
     """Initialize the passkeys database if it doesn't exist"""
     # Ensure the directory exists if path contains directories
-    if os.path.dirname(PASSKEYS_DB_PATH):
-        os.makedirs(os.path.dirname(PASSKEYS_DB_PATH), exist_ok=True)
+    if os.path.dirname(config.PASSKEYS_DB_PATH):
+        os.makedirs(os.path.dirname(config.PASSKEYS_DB_PATH), exist_ok=True)
 
-    if not os.path.exists(PASSKEYS_DB_PATH):
-        with open(PASSKEYS_DB_PATH, 'w') as f:
+    if not os.path.exists(config.PASSKEYS_DB_PATH):
+        with open(config.PASSKEYS_DB_PATH, 'w') as f:
             json.dump({"passkeys": []}, f)
-        print("[INFO] Created new passkeys database at", PASSKEYS_DB_PATH)
+        print("[INFO] Created new passkeys database at", config.PASSKEYS_DB_PATH)
 
-def get_passkeys():
-    """Get all passkeys from the database"""
-    print(f"[INFO] Getting passkeys from {PASSKEYS_DB_PATH}")
-    if not os.path.exists(PASSKEYS_DB_PATH):
-        print(f"[INFO] Passkeys file does not exist, initializing")
-        init_passkeys_db()
+def _get_mtime(path):
+    """Return the modification time of a file or None if it doesn't exist"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def _index_passkey(passkey):
+    """Add a passkey to the in-memory indexes"""
+    _passkeys_by_id[passkey['credential_id']] = passkey
+    _passkeys_by_user.setdefault(passkey['username'], {})[passkey['credential_id']] = passkey
+
+def _unindex_passkey(passkey):
+    """Remove a passkey from the in-memory indexes"""
+    _passkeys_by_id.pop(passkey['credential_id'], None)
+    user_passkeys = _passkeys_by_user.get(passkey['username'])
+    if user_passkeys is not None:
+        user_passkeys.pop(passkey['credential_id'], None)
+        if not user_passkeys:
+            _passkeys_by_user.pop(passkey['username'], None)
+
+def _replay_journal():
+    """Apply sign count updates appended to the journal since the last replay"""
+    global _journal_offset, _journal_entries
 
     try:
-        with open(PASSKEYS_DB_PATH, 'r') as f:
-            data = json.load(f)
-            print(f"[INFO] Loaded {len(data.get('passkeys', []))} passkeys from database")
-            return data
-    except Exception as e:
-        print(f"[ERROR] Failed to load passkeys: {e}")
-        return {"passkeys": []}
+        with open(_journal_path(), 'r') as f:
+            # A journal shorter than what we've already applied was compacted by another process
+            f.seek(0, os.SEEK_END)
+            if f.tell() < _journal_offset:
+                _journal_offset = 0
+                _journal_entries = 0
+            f.seek(_journal_offset)
+
+            while True:
+                line = f.readline()
+                # Stop at a partially written trailing line and pick it up next time
+                if not line or not line.endswith('\n'):
+                    break
+                _journal_offset = f.tell()
+                _journal_entries += 1
+
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+
+                passkey = _passkeys_by_id.get(entry.get('credential_id'))
+                if passkey:
+                    passkey['sign_count'] = entry['sign_count']
+                    passkey['last_used'] = entry['last_used']
+    except FileNotFoundError:
+        _journal_offset = 0
+        _journal_entries = 0
+
+def _load_index():
+    """Make sure the in-memory index reflects the passkeys database on disk"""
+    global _index_loaded, _index_mtime, _journal_offset, _journal_entries
+
+    with _index_lock:
+        if not os.path.exists(config.PASSKEYS_DB_PATH):
+            print(f"[INFO] Passkeys file does not exist, initializing")
+            init_passkeys_db()
+
+        mtime = _get_mtime(config.PASSKEYS_DB_PATH)
+        if not _index_loaded or mtime != _index_mtime:
+            try:
+                with open(config.PASSKEYS_DB_PATH, 'r') as f:
+                    data = json.load(f)
+            except Exception as e:
+                print(f"[ERROR] Failed to load passkeys: {e}")
+                data = {"passkeys": []}
+
+            _passkeys_by_id.clear()
+            _passkeys_by_user.clear()
+            for passkey in data.get('passkeys', []):
+                _index_passkey(passkey)
+
+            _index_loaded = True
+            _index_mtime = mtime
+            _journal_offset = 0
+            _journal_entries = 0
+            print(f"[INFO] Indexed {len(_passkeys_by_id)} passkeys from {config.PASSKEYS_DB_PATH}")
+
+        _replay_journal()
+
+@contextmanager
+def _locked_index():
+    """Hold the passkeys lock (across threads and processes) with a fresh index
+
+    Every write (database rewrites and journal appends) happens under this lock, so
+    another worker can't append a sign count between a rewrite and the journal truncation.
+    """
+    with _index_lock:
+        lock_file = None
+        if fcntl is not None:
+            if os.path.dirname(config.PASSKEYS_DB_PATH):
+                os.makedirs(os.path.dirname(config.PASSKEYS_DB_PATH), exist_ok=True)
+            lock_file = open(config.PASSKEYS_DB_PATH + '.lock', 'w')
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            _load_index()
+            yield
+        finally:
+            if lock_file is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+                lock_file.close()
+
+def _write_db():
+    """Write the in-memory index to the database and truncate the journal (call with _locked_index held)"""
+    global _index_mtime, _journal_offset, _journal_entries
+
+    data = {"passkeys": list(_passkeys_by_id.values())}
+
+    # Write to a temporary file first so readers never see a partial database
+    tmp_path = config.PASSKEYS_DB_PATH + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, config.PASSKEYS_DB_PATH)
+
+    # Every journal entry is now part of the database
+    with open(_journal_path(), 'w'):
+        pass
+
+    _index_mtime = _get_mtime(config.PASSKEYS_DB_PATH)
+    _journal_offset = 0
+    _journal_entries = 0
+
+def _append_sign_count(passkey):
+    """Persist a sign count update by appending it to the journal (call with _locked_index held)"""
+    global _journal_offset, _journal_entries
+
+    entry = {
+        'credential_id': passkey['credential_id'],
+        'sign_count': passkey['sign_count'],
+        'last_used': passkey['last_used'],
+    }
+    with open(_journal_path(), 'a') as f:
+        f.write(json.dumps(entry) + '\n')
+        _journal_offset = f.tell()
+    _journal_entries += 1
+
+    # Fold the journal back into the database once it grows large
+    if _journal_entries >= JOURNAL_COMPACT_THRESHOLD:
+        _write_db()
+
+def get_passkeys():
+    """Get all passkeys from the database (copies, changing them doesn't change the database)"""
+    # Load and read under the index lock, another thread may be rebuilding the index
+    with _index_lock:
+        _load_index()
+        return {"passkeys": [dict(passkey) for passkey in _passkeys_by_id.values()]}
 
 def save_passkeys(passkeys_data):
     """Save passkeys data to the database"""
-    with open(PASSKEYS_DB_PATH, 'w') as f:
-        json.dump(passkeys_data, f, indent=2)
+    with _locked_index():
+        _passkeys_by_id.clear()
+        _passkeys_by_user.clear()
+        for passkey in passkeys_data.get('passkeys', []):
+            _index_passkey(passkey)
+        _write_db()
+
+def get_passkey(credential_id):
+    """Get a passkey by its credential ID
+
+    Args:
+        credential_id (str): The base64url encoded credential ID
+
+    Returns:
+        dict: A copy of the passkey or None if not found
+    """
+    with _index_lock:
+        _load_index()
+        passkey = _passkeys_by_id.get(credential_id)
+        return dict(passkey) if passkey else None
 
 def get_user_passkeys(username):
-    """Get all passkeys for a specific user"""
-    passkeys_data = get_passkeys()
-    user_passkeys = []
-
-    for passkey in passkeys_data['passkeys']:
-        if passkey['username'] == username:
-            user_passkeys.append(passkey)
+    """Get all passkeys for a specific user (copies)"""
+    with _index_lock:
+        _load_index()
+        return [dict(passkey) for passkey in _passkeys_by_user.get(username, {}).values()]
+
+def add_passkey(passkey):
+    """Add a new passkey to the database"""
+    with _locked_index():
+        _index_passkey(passkey)
+        _write_db()
+
+def update_sign_count(credential_id, sign_count):
+    """Update the sign count and last used time of a passkey
+
+    The update is appended to the journal rather than rewriting the database.
+
+    Args:
+        credential_id (str): The base64url encoded credential ID
+        sign_count (int): The new sign count reported by the authenticator
+
+    Returns:
+        bool: Whether the passkey was found and updated
+    """
+    with _locked_index():
+        passkey = _passkeys_by_id.get(credential_id)
+        if not passkey:
+            return False
 
-    return user_passkeys
+        passkey['sign_count'] = sign_count
+        passkey['last_used'] = int(time.time())
+        _append_sign_count(passkey)
+        return True
 
 def generate_passkey_registration_options(username):
     """Generate registration options for a new passkey"""
@@ -191,9 +393,7 @@ def verify_passkey_registration(credential_data, passkey_name):
         }
 
         # Save the passkey to the database
-        passkeys_data = get_passkeys()
-        passkeys_data['passkeys'].append(passkey)
-        save_passkeys(passkeys_data)
+        add_passkey(passkey)
 
         return True, "Passkey registered successfully"
     except Exception as e:
@@ -306,25 +506,19 @@ def verify_passkey_authentication(credential_data):
         # Get the username from session if available (for username+passkey flow)
         username = session.pop('auth_username', None)
 
-        # Find the passkey
-        passkeys_data = get_passkeys()
-        passkey = None
+        # Find the passkey by credential ID
+        passkey = get_passkey(credential['id'])
 
-        # If we have a username, look for a passkey matching both username and credential ID
+        # If we have a username, the passkey must also belong to that user
         if username:
             print(f"[INFO] Username from session: {username}")
-            for pk in passkeys_data['passkeys']:
-                if pk['credential_id'] == credential['id'] and pk['username'] == username:
-                    passkey = pk
-                    break
-        # Otherwise, just look for a passkey matching the credential ID (passwordless flow)
+            if passkey and passkey['username'] != username:
+                passkey = None
+        # Otherwise, take the username from the passkey (passwordless flow)
         else:
             print(f"[INFO] No username in session, using passwordless flow")
-            for pk in passkeys_data['passkeys']:
-                if pk['credential_id'] == credential['id']:
-                    passkey = pk
-                    username = pk['username']  # Get the username from the passkey
-                    break
+            if passkey:
+                username = passkey['username']
 
         if not passkey:
             print(f"[ERROR] No passkey found for credential ID {credential['id']}")
@@ -354,9 +548,7 @@ def verify_passkey_authentication(credential_data):
         print(f"[INFO] Authentication verification successful")
 
         # Update the passkey sign count and last used time
-        passkey['sign_count'] = verification.new_sign_count
-        passkey['last_used'] = int(time.time())
-        save_passkeys(passkeys_data)
+        update_sign_count(passkey['credential_id'], verification.new_sign_count)
 
         # Log the user in and generate tokens
         # Check if remember_me was set in session
@@ -376,11 +568,11 @@ def delete_passkey(credential_id):
         return False, "User not authenticated"
 
     # Find and delete the passkey
-    passkeys_data = get_passkeys()
-    for i, passkey in enumerate(passkeys_data['passkeys']):
-        if passkey['credential_id'] == credential_id and passkey['username'] == username:
-            passkeys_data['passkeys'].pop(i)
-            save_passkeys(passkeys_data)
+    with _locked_index():
+        passkey = _passkeys_by_id.get(credential_id)
+        if passkey and passkey['username'] == username:
+            _unindex_passkey(passkey)
+            _write_db()
             return True, "Passkey deleted successfully"
 
     return False, "Passkey not found"
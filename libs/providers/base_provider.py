@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
 from typing import List, Dict, Any, Optional
 
+import libs.eventloop as eventloop
+
 class TorrentProvider(ABC):
     """Abstract base class for torrent providers"""
     
@@ -26,10 +28,28 @@ class TorrentProvider(ABC):
             category (int, optional): Category ID to filter by. Defaults to 0 (all categories).
             
         Returns:
-            List[Dict[str, Any]]: List of torrent results
+            List[Dict[str, Any]]: List of torrent results, as dicts in the standard result format
+                                  or records.SearchResult records
         """
         pass
     
+    async def asearch(self, query: str, category: int = 0) -> List[Dict[str, Any]]:
+        """
+        Search for torrents without blocking the event loop
+
+        The default adapts search() by running it in the shared blocking thread pool.
+        Providers requesting their API through MirrorPool.aget_json (or an async
+        HTTP client) should override this, so no extra thread waits for the response.
+
+        Args:
+            query (str): The search query
+            category (int, optional): Category ID to filter by. Defaults to 0 (all categories).
+
+        Returns:
+            List[Dict[str, Any]]: List of torrent results, like search()
+        """
+        return await eventloop.run_blocking(self.search, query, category)
+
     @abstractmethod
     def get_torrent_details(self, torrent_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -43,6 +63,20 @@ class TorrentProvider(ABC):
         """
         pass
     
+    async def aget_torrent_details(self, torrent_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get details for a specific torrent without blocking the event loop
+
+        The default adapts get_torrent_details() like asearch() adapts search().
+
+        Args:
+            torrent_id (str): ID of the torrent
+
+        Returns:
+            Optional[Dict[str, Any]]: Torrent details or None if not found
+        """
+        return await eventloop.run_blocking(self.get_torrent_details, torrent_id)
+
     @abstractmethod
     def create_magnet_link(self, info_hash: str, name: str) -> str:
         """
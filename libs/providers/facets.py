@@ -0,0 +1,166 @@
+from typing import List, Dict, Any, Optional
+
+from libs.providers.merge import select_results, DEFAULT_SORT
+from libs.providers.records import SearchResult, to_json, get_movies
+
+# Facets counted for every search (see facet_values)
+FACETS = ('quality', 'year', 'season', 'episode_type', 'provider')
+
+# Default and maximum number of results per page
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 200
+
+def parse_filters(args) -> Dict[str, Any]:
+    """
+    Read facet filters from request arguments
+
+    Args:
+        args: The request arguments (request.args)
+
+    Returns:
+        Dict[str, Any]: Filters that were given (quality, year, season, episode_type,
+                        provider, min_seeders, min_size, max_size)
+    """
+    filters = {}
+
+    for key in ('quality', 'provider'):
+        if args.get(key):
+            filters[key] = args.get(key)
+
+    for key in ('year', 'season', 'min_seeders', 'min_size', 'max_size'):
+        value = args.get(key, type=int)
+        if value is not None:
+            filters[key] = value
+
+    episode_type = args.get('episode_type')
+    if episode_type in ('complete', 'single'):
+        filters['episode_type'] = episode_type
+
+    return filters
+
+def facet_values(result: SearchResult) -> Dict[str, Any]:
+    """
+    Get the facet values of a search result
+
+    Args:
+        result (SearchResult): A search result annotated with 'metadata'
+
+    Returns:
+        Dict[str, Any]: facet -> value (None if the result has no value for it). The provider
+                        facet is a tuple, since merged duplicates name every provider that found them
+    """
+    metadata = result.metadata or {}
+    complete = metadata.get('complete')
+
+    # Complete season packs count towards their season, like single episodes do
+    season = metadata.get('season')
+    if season is None and isinstance(complete, int):
+        season = complete
+
+    return {
+        'quality': metadata.get('quality'),
+        'year': metadata.get('year'),
+        'season': season,
+        'episode_type': 'complete' if complete else 'single',
+        'provider': tuple(result.providers),
+    }
+
+def _matches(value, wanted) -> bool:
+    """Check a facet value against a filter (tuples match if they contain it)"""
+    if isinstance(value, tuple):
+        return wanted in value
+    return value == wanted
+
+def _failed_filters(result: SearchResult, values: Dict[str, Any], filters: Dict[str, Any]) -> List[Optional[str]]:
+    """List the filters a result doesn't pass (facet name, or None for range filters)"""
+    failed = []
+
+    for facet in FACETS:
+        if facet in filters and not _matches(values[facet], filters[facet]):
+            failed.append(facet)
+
+    if 'min_seeders' in filters and result.seeders < filters['min_seeders']:
+        failed.append(None)
+
+    size = result.size
+    if 'min_size' in filters and size < filters['min_size']:
+        failed.append(None)
+    if 'max_size' in filters and size > filters['max_size']:
+        failed.append(None)
+
+    return failed
+
+def apply_facets(results: List[SearchResult], filters: Dict[str, Any], page: int = 1, per_page: int = DEFAULT_PER_PAGE, sort_by: str = DEFAULT_SORT) -> Dict[str, Any]:
+    """
+    Filter search results, count facets and return one page, in a single pass
+
+    Facet counts are disjunctive: the counts of a facet consider every filter
+    except the one on that facet, so the client can show how many results
+    each alternative value would give.
+
+    Args:
+        results (List[SearchResult]): Search results annotated with 'metadata', in DEFAULT_SORT order
+        filters (Dict[str, Any]): Filters from parse_filters
+        page (int, optional): 1-based page number. Defaults to 1.
+        per_page (int, optional): Results per page. Defaults to DEFAULT_PER_PAGE.
+        sort_by (str, optional): Sort order of the page, see merge.SORT_KEYS. Defaults to DEFAULT_SORT.
+
+    Returns:
+        Dict[str, Any]: results (the page, as dicts), movies (details of the movies on the page by id),
+                        total, page, per_page, total_pages, facets, filters and sort
+    """
+    per_page = max(1, min(per_page, MAX_PER_PAGE))
+    page = max(1, page)
+    start = (page - 1) * per_page
+    end = start + per_page
+
+    # Results already come in the default order, so the page can be picked while counting.
+    # Other orders need every match to select the top results up to the end of the page.
+    presorted = sort_by == DEFAULT_SORT
+
+    counts = {facet: {} for facet in FACETS}
+    page_results = []
+    total = 0
+
+    for result in results:
+        values = facet_values(result)
+        failed = _failed_filters(result, values, filters)
+
+        if not failed:
+            # Matches everything, counts towards every facet
+            if not presorted or start <= total < end:
+                page_results.append(result)
+            total += 1
+            count_facets = FACETS
+        elif len(failed) == 1 and failed[0] is not None:
+            # Only fails its own facet, so it counts as an alternative for that facet
+            count_facets = failed
+        else:
+            continue
+
+        for facet in count_facets:
+            value = values[facet]
+            for item in (value if isinstance(value, tuple) else (value,)):
+                if item is not None:
+                    counts[facet][item] = counts[facet].get(item, 0) + 1
+
+    if not presorted:
+        page_results = select_results(page_results, sort_by, limit=end)[start:end]
+
+    # Most common values first
+    facets = {
+        facet: [{'value': value, 'count': count} for value, count in sorted(facet_counts.items(), key=lambda item: (-item[1], str(item[0])))]
+        for facet, facet_counts in counts.items()
+    }
+
+    return {
+        'results': to_json(page_results),
+        'movies': get_movies(page_results),
+        'total': total,
+        'page': page,
+        'per_page': per_page,
+        'total_pages': (total + per_page - 1) // per_page,
+        'facets': facets,
+        'filters': filters,
+        'sort': sort_by,
+    }
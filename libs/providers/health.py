@@ -0,0 +1,225 @@
+import os
+import time
+import math
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+# Provider health tracking with a circuit breaker
+#
+# Every upstream request a provider makes is timed and recorded. After too many
+# failures in a row the provider's circuit opens and searches skip it. Once the
+# open period is over one probe request is let through (half-open): success
+# closes the circuit, failure opens it again.
+
+# Circuit states
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Number of recent requests latency percentiles and the error rate are computed over
+WINDOW_SIZE = 50
+
+# Weight of the newest request in the moving average latency
+LATENCY_SMOOTHING = 0.3
+
+def get_request_timeout():
+    """Get the timeout (seconds) for upstream provider requests (provider-timeout)"""
+    return float(os.environ.get('provider-timeout', 10))
+
+def get_breaker_settings():
+    """Get the circuit breaker settings from the environment"""
+    return {
+        'failure_threshold': int(os.environ.get('provider-failure-threshold', 3)),
+        'open_seconds': float(os.environ.get('provider-open-seconds', 60)),
+    }
+
+def _percentile(sorted_values, percent):
+    """Get a percentile of sorted values (nearest rank)"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+class ProviderHealth:
+    """Rolling request statistics and circuit breaker state of one provider"""
+
+    def __init__(self, name):
+        self.name = name
+        self._samples = deque(maxlen=WINDOW_SIZE)  # (latency in seconds, succeeded)
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.probe_started = None  # When the half-open probe was let through
+        self.last_error = None
+        self.total_requests = 0
+        self.total_failures = 0
+        self.latency_ewma = None  # Moving average latency of successful requests (seconds)
+
+    def is_available(self):
+        """Check whether the circuit would let a request through, without starting a probe"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                return time.time() - self.opened_at >= get_breaker_settings()['open_seconds']
+            return time.time() - self.probe_started > get_request_timeout() * 2
+
+    def get_latency_percentile(self, percent, min_samples=5):
+        """
+        Get a latency percentile of recent successful requests
+
+        Args:
+            percent (float): The percentile (e.g. 95)
+            min_samples (int, optional): Minimum number of samples needed. Defaults to 5.
+
+        Returns:
+            Optional[float]: The latency in seconds, or None without enough samples
+        """
+        with self._lock:
+            latencies = sorted(latency for latency, succeeded in self._samples if succeeded)
+        if len(latencies) < min_samples:
+            return None
+        return _percentile(latencies, percent)
+
+    def allow_request(self):
+        """
+        Check whether the provider may be used now
+
+        Returns:
+            bool: False while the circuit is open (or a half-open probe is still running)
+        """
+        now = time.time()
+
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+
+            if self.state == OPEN:
+                if now - self.opened_at < get_breaker_settings()['open_seconds']:
+                    return False
+                # Open period is over, let one probe through
+                self.state = HALF_OPEN
+                self.probe_started = now
+                print(f"[INFO] Probing provider {self.name} after its circuit was open")
+                return True
+
+            # Half-open: only one probe at a time, unless it never reported back
+            if now - self.probe_started > get_request_timeout() * 2:
+                self.probe_started = now
+                return True
+            return False
+
+    def record_success(self, latency):
+        """Record a successful request
+
+        Args:
+            latency (float): Request duration in seconds
+        """
+        with self._lock:
+            self._samples.append((latency, True))
+            self.total_requests += 1
+            self.consecutive_failures = 0
+            if self.latency_ewma is None:
+                self.latency_ewma = latency
+            else:
+                self.latency_ewma += LATENCY_SMOOTHING * (latency - self.latency_ewma)
+
+            if self.state != CLOSED:
+                print(f"[INFO] Provider {self.name} recovered, closing its circuit")
+            self.state = CLOSED
+            self.opened_at = None
+            self.probe_started = None
+
+    def record_failure(self, latency, error):
+        """Record a failed request, opening the circuit if the provider keeps failing
+
+        Args:
+            latency (float): Request duration in seconds
+            error (Exception): What went wrong
+        """
+        with self._lock:
+            self._samples.append((latency, False))
+            self.total_requests += 1
+            self.total_failures += 1
+            self.consecutive_failures += 1
+            self.last_error = str(error)
+
+            threshold = get_breaker_settings()['failure_threshold']
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.consecutive_failures >= threshold):
+                self.state = OPEN
+                self.opened_at = time.time()
+                self.probe_started = None
+                print(f"[WARNING] Provider {self.name} failed {self.consecutive_failures} times in a row, skipping it for {get_breaker_settings()['open_seconds']:.0f}s")
+
+    def get_stats(self):
+        """
+        Get the provider's health
+
+        Returns:
+            dict: state, latency percentiles (ms) and error rate over the last WINDOW_SIZE
+                  requests, failure counters, last error and seconds until the next probe
+        """
+        with self._lock:
+            samples = list(self._samples)
+            stats = {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'total_requests': self.total_requests,
+                'total_failures': self.total_failures,
+                'last_error': self.last_error,
+                'retry_in': None,
+                'latency_ms': round(self.latency_ewma * 1000, 1) if self.latency_ewma is not None else None,
+            }
+            if self.state == OPEN:
+                remaining = get_breaker_settings()['open_seconds'] - (time.time() - self.opened_at)
+                stats['retry_in'] = max(0, round(remaining, 1))
+
+        latencies = sorted(latency for latency, _ in samples)
+        failures = sum(1 for _, succeeded in samples if not succeeded)
+
+        for percent in (50, 95, 99):
+            value = _percentile(latencies, percent)
+            stats[f'p{percent}_ms'] = round(value * 1000, 1) if value is not None else None
+        stats['error_rate'] = round(failures / len(samples), 4) if samples else 0.0
+        stats['window'] = len(samples)
+        return stats
+
+# Health of every provider by name
+_health = {}
+_health_lock = threading.Lock()
+
+def get_health(name):
+    """Get (or create) the health tracker of a provider
+
+    Args:
+        name (str): The provider name
+
+    Returns:
+        ProviderHealth: The provider's health
+    """
+    with _health_lock:
+        health = _health.get(name)
+        if health is None:
+            health = ProviderHealth(name)
+            _health[name] = health
+        return health
+
+@contextmanager
+def track(name):
+    """Time an upstream request of a provider and record its outcome
+
+    Exceptions raised inside the block count as failures and are re-raised.
+
+    Args:
+        name (str): The provider name
+    """
+    health = get_health(name)
+    started = time.monotonic()
+    try:
+        yield health
+    except Exception as e:
+        health.record_failure(time.monotonic() - started, e)
+        raise
+    health.record_success(time.monotonic() - started)
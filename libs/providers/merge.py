@@ -0,0 +1,122 @@
+import re
+import heapq
+import base64
+import binascii
+from operator import attrgetter
+from typing import List, Optional
+
+from libs.providers.records import SearchResult
+
+# Merging of results from several providers into one result list
+
+# Hex (40 characters) and base32 (32 characters) BitTorrent v1 info hashes
+HEX_HASH_PATTERN = re.compile(r'^[0-9a-f]{40}$')
+BASE32_HASH_PATTERN = re.compile(r'^[a-z2-7]{32}$')
+
+# PirateBay returns a placeholder result with this hash when nothing was found
+EMPTY_HASH = '0' * 40
+
+# Sort orders for results, all descending: sort name -> key function
+SORT_KEYS = {
+    'seeders': attrgetter('seeders', 'leechers'),  # Most seeded first
+    'size': attrgetter('size'),  # Largest first
+    'age': attrgetter('added'),  # Newest first
+    'ratio': lambda result: (result.seeders / max(result.leechers, 1), result.seeders),  # Best seeded per leecher first
+}
+DEFAULT_SORT = 'seeders'
+
+def normalize_info_hash(info_hash: Optional[str]) -> Optional[str]:
+    """
+    Normalize an info hash to lowercase hex
+
+    Args:
+        info_hash (Optional[str]): Info hash in hex or base32, any case
+
+    Returns:
+        Optional[str]: The lowercase hex hash, or None if it isn't a usable hash
+    """
+    if not info_hash:
+        return None
+
+    info_hash = str(info_hash).strip().lower()
+
+    if BASE32_HASH_PATTERN.match(info_hash):
+        try:
+            info_hash = binascii.hexlify(base64.b32decode(info_hash.upper())).decode('ascii')
+        except (binascii.Error, ValueError):
+            return None
+
+    if not HEX_HASH_PATTERN.match(info_hash) or info_hash == EMPTY_HASH:
+        return None
+    return info_hash
+
+def dedupe_results(results: List[SearchResult]) -> List[SearchResult]:
+    """
+    Merge results describing the same torrent (same info hash) into one
+
+    The first result seen for a hash is kept. It gets the highest seeder and
+    leecher counts of all its duplicates and its 'providers' list names every
+    provider that returned it. Results without a usable hash are kept as they are.
+    Runs in linear time and keeps the original order.
+
+    Args:
+        results (List[SearchResult]): Results from all providers
+
+    Returns:
+        List[SearchResult]: The results with duplicates merged
+    """
+    merged = []
+    by_hash = {}  # normalized hash -> merged result
+    duplicates = 0
+
+    for result in results:
+        info_hash = normalize_info_hash(result.info_hash)
+        if info_hash is None:
+            merged.append(result)
+            continue
+
+        existing = by_hash.get(info_hash)
+        if existing is None:
+            by_hash[info_hash] = result
+            merged.append(result)
+            continue
+
+        # Same torrent from another provider (or listed twice), keep the best counts
+        duplicates += 1
+        existing.seeders = max(existing.seeders, result.seeders)
+        existing.leechers = max(existing.leechers, result.leechers)
+        for provider in result.providers:
+            if provider not in existing.providers:
+                existing.providers.append(provider)
+
+    if duplicates > 0:
+        print(f"[INFO] Merged {duplicates} duplicate results by info hash")
+
+    return merged
+
+def select_results(results: List[SearchResult], sort_by: str = DEFAULT_SORT, limit: Optional[int] = None, presorted: bool = False) -> List[SearchResult]:
+    """
+    Order results and keep the best ones
+
+    With a limit only the top results are selected (a heap, O(n log limit))
+    instead of sorting everything. Ties keep their original order.
+
+    Args:
+        results (List[SearchResult]): The results
+        sort_by (str, optional): One of SORT_KEYS. Defaults to DEFAULT_SORT.
+        limit (Optional[int], optional): Maximum number of results. Defaults to None (all).
+        presorted (bool, optional): The results are already in sort_by order. Defaults to False.
+
+    Returns:
+        List[SearchResult]: The selected results, best first
+    """
+    if limit is not None and limit <= 0:
+        limit = None
+
+    if presorted:
+        return results if limit is None else results[:limit]
+
+    key = SORT_KEYS[sort_by]
+    if limit is not None and limit < len(results):
+        return heapq.nlargest(limit, results, key=key)
+    return sorted(results, key=key, reverse=True)
@@ -0,0 +1,289 @@
+import os
+import copy
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+
+import requests
+
+import libs.eventloop as eventloop
+import libs.providers.health as health
+from libs.ratelimit import TokenBucket
+from libs.singleflight import SingleFlight
+
+# Mirror pools for providers reachable under several base URLs
+#
+# Every request goes to the mirror with the lowest moving average latency whose
+# circuit is closed (mirrors never measured are tried first, so all of them get
+# measured). If it hasn't answered within its p95 latency a hedged request is sent
+# to the next mirror and whichever answers first is used. Failed requests fail
+# over to the next mirror. Every request (hedged ones too) updates its mirror's latency.
+#
+# Identical requests made while one is already running wait for it and share its
+# response, and the requests a provider sends to its mirrors are rate limited
+# (provider-rate-limit per second) so bursts of searches don't get us banned.
+#
+# Requests are coordinated on the shared event loop (libs/eventloop.py): only the
+# blocking HTTP calls themselves take a thread from the mirror request pool.
+
+# Hedge delay used until a mirror has enough requests for a p95 latency (seconds)
+DEFAULT_HEDGE_DELAY = 1.5
+
+# Upstream requests per second allowed for each provider (0 disables the limit)
+DEFAULT_RATE_LIMIT = 5
+
+# Threads running mirror requests, shared by all pools
+_executor = None
+_executor_lock = threading.Lock()
+
+def _get_executor():
+    """Get the shared mirror request thread pool, creating it on first use"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=eventloop.get_blocking_workers(), thread_name_prefix="provider-mirror")
+        return _executor
+
+def get_hedge_delay_setting():
+    """Get the default hedge delay (seconds) from the environment (provider-hedge-delay, 0 disables hedging)"""
+    return float(os.environ.get('provider-hedge-delay', DEFAULT_HEDGE_DELAY))
+
+def get_rate_limit_setting():
+    """Get the upstream requests per second allowed for each provider (provider-rate-limit, 0 disables the limit)"""
+    return float(os.environ.get('provider-rate-limit', DEFAULT_RATE_LIMIT))
+
+def _ignore_outcome(future):
+    """Retrieve the outcome of a request nobody waits for anymore (its mirror's health already has it)"""
+    if not future.cancelled():
+        future.exception()
+
+class RateLimitExceeded(requests.exceptions.RequestException):
+    """No upstream request could be sent before the request timeout because of the rate limit"""
+
+def parse_mirrors(value: Optional[str], defaults: List[str]) -> List[str]:
+    """
+    Read a comma-separated list of mirror base URLs
+
+    Args:
+        value (Optional[str]): The setting value (e.g. from the environment)
+        defaults (List[str]): Mirrors used when the value is empty
+
+    Returns:
+        List[str]: Base URLs without trailing slashes
+    """
+    mirrors = [url.strip().rstrip('/') for url in (value or '').split(',') if url.strip()]
+    return mirrors or list(defaults)
+
+class MirrorPool:
+    """Base URLs of one provider with latency-based selection, failover and hedging"""
+
+    def __init__(self, name: str, urls: List[str], rate_limit: Optional[float] = None):
+        """
+        Args:
+            name (str): The provider name (used in log messages)
+            urls (List[str]): Mirror base URLs, in order of preference
+            rate_limit (Optional[float], optional): Requests per second to all mirrors together,
+                                                    0 disables the limit. Defaults to the provider-rate-limit setting.
+        """
+        self.name = name
+        self.urls = list(urls)
+        self._health = {url: health.ProviderHealth(f"{name} mirror {url}") for url in self.urls}
+        self.hedged_requests = 0
+        self.hedge_wins = 0
+
+        # Requests to all mirrors share one rate limit, it's the same site behind them
+        self.rate_limit = rate_limit if rate_limit is not None else get_rate_limit_setting()
+        self._rate_limiter = TokenBucket(self.rate_limit) if self.rate_limit > 0 else None
+        self.rate_limited = 0  # Requests that had to wait for the rate limit (or were dropped)
+
+        # Identical requests running at the same time
+        self._in_flight = SingleFlight()
+
+    def ordered_mirrors(self) -> List[str]:
+        """
+        Order the mirrors for the next request
+
+        Returns:
+            List[str]: Available mirrors (unmeasured first, then fastest first), then
+                       mirrors whose last request failed and mirrors whose circuit is open
+        """
+        def sort_key(item):
+            index, url = item
+            mirror_health = self._health[url]
+            latency = mirror_health.latency_ewma if mirror_health.latency_ewma is not None else 0.0
+            return (not mirror_health.is_available(), mirror_health.consecutive_failures > 0, latency, index)
+
+        return [url for _, url in sorted(enumerate(self.urls), key=sort_key)]
+
+    def _get_hedge_delay(self, url: str) -> Optional[float]:
+        """Get how long to wait for a mirror before hedging (None disables hedging)"""
+        default = get_hedge_delay_setting()
+        if default <= 0:
+            return None
+        p95 = self._health[url].get_latency_percentile(95)
+        return p95 if p95 is not None else default
+
+    async def _acquire_token(self, wait: bool = True) -> bool:
+        """
+        Take a token from the rate limiter before sending a request
+
+        Args:
+            wait (bool, optional): Wait (up to the request timeout) for a token. Defaults to True.
+
+        Returns:
+            bool: Whether the request may be sent
+        """
+        if self._rate_limiter is None or self._rate_limiter.try_acquire():
+            return True
+
+        self.rate_limited += 1
+        if not wait:
+            return False
+
+        # Sleep on the event loop instead of blocking a thread until a token is added
+        deadline = time.monotonic() + health.get_request_timeout()
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(1 / self.rate_limit, remaining))
+            if self._rate_limiter.try_acquire():
+                return True
+
+    def _fetch(self, url: str, path: str, params: Optional[Dict[str, Any]]):
+        """Request a path from one mirror, recording its latency and outcome"""
+        mirror_health = self._health[url]
+        started = time.monotonic()
+        try:
+            response = requests.get(f"{url}/{path}", params=params, timeout=health.get_request_timeout())
+            response.raise_for_status()
+            data = response.json()
+        except Exception as e:
+            mirror_health.record_failure(time.monotonic() - started, e)
+            raise
+        mirror_health.record_success(time.monotonic() - started)
+        return data
+
+    def get_json(self, path: str, params: Optional[Dict[str, Any]] = None):
+        """
+        GET a path from the best mirror and decode the JSON response
+
+        Waits for aget_json on the shared event loop (must not be called from the loop).
+
+        Args:
+            path (str): The path below the base URL (e.g. 'q.php?q=test')
+            params (Optional[Dict[str, Any]], optional): Query parameters. Defaults to None.
+
+        Returns:
+            Any: The decoded JSON (the caller may modify it)
+
+        Raises:
+            requests.exceptions.RequestException: If every mirror failed (or none is available),
+                                                  RateLimitExceeded if the rate limit didn't allow a request in time
+        """
+        return eventloop.run(self.aget_json(path, params))
+
+    async def aget_json(self, path: str, params: Optional[Dict[str, Any]] = None):
+        """
+        GET a path from the best mirror and decode the JSON response, for coroutines
+
+        If the same request is already running its response is used instead.
+        Raises like get_json.
+        """
+        key = (path, tuple(sorted((params or {}).items())))
+        data, shared = await self._in_flight.ado(key, self._aget_json, path, params)
+
+        # Every caller gets its own copy of a shared response, providers modify the results
+        return copy.deepcopy(data) if shared else data
+
+    async def _aget_json(self, path: str, params: Optional[Dict[str, Any]]):
+        """GET a path from the best mirror with hedging and failover (see get_json)"""
+        loop = asyncio.get_running_loop()
+        candidates = self.ordered_mirrors()
+        pending = {}  # future -> mirror url
+        last_error = None
+
+        async def launch(hedge=False):
+            """Send the request to the next mirror that accepts requests (hedges are only sent if the rate limit allows it right away)"""
+            if not candidates:
+                return None
+            if not await self._acquire_token(wait=not hedge):
+                if hedge:
+                    return None
+                raise RateLimitExceeded(f"{self.name} rate limit ({self.rate_limit:g} requests per second) exceeded")
+
+            while candidates:
+                url = candidates.pop(0)
+                if self._health[url].allow_request():
+                    pending[loop.run_in_executor(_get_executor(), self._fetch, url, path, params)] = url
+                    return url
+            return None
+
+        primary = await launch()
+        if primary is None:
+            raise requests.exceptions.ConnectionError(f"No {self.name} mirror is available")
+
+        hedge_delay = self._get_hedge_delay(primary)
+        hedged = False
+
+        try:
+            while pending:
+                timeout = hedge_delay if not hedged and hedge_delay is not None and candidates else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # The mirror is slower than usual, ask another one as well
+                    hedged = True
+                    hedge_url = await launch(hedge=True)
+                    if hedge_url is not None:
+                        self.hedged_requests += 1
+                        print(f"[INFO] {self.name} mirror {primary} is slow, hedging with {hedge_url}")
+                    continue
+
+                for future in done:
+                    url = pending.pop(future)
+                    try:
+                        data = future.result()
+                    except Exception as e:
+                        print(f"[WARNING] {self.name} mirror {url} failed: {e}")
+                        last_error = e
+                        continue
+
+                    if hedged and url != primary:
+                        self.hedge_wins += 1
+                    return data
+
+                # Every request so far failed, fail over to the next mirror
+                if not pending:
+                    primary = await launch()
+                    if primary is not None:
+                        hedge_delay = self._get_hedge_delay(primary)
+                        hedged = False
+        finally:
+            # Requests still running finish in the background and only update their mirror's latency
+            for future in pending:
+                future.add_done_callback(_ignore_outcome)
+
+        if isinstance(last_error, requests.exceptions.RequestException):
+            raise last_error
+        raise requests.exceptions.RequestException(f"Every {self.name} mirror failed: {last_error}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the mirrors' health, hedging, rate limit and coalescing counters
+
+        Returns:
+            Dict[str, Any]: 'mirrors' (url and health of each mirror, in selection order),
+                            'hedged_requests', 'hedge_wins', 'rate_limit', 'rate_limited'
+                            and 'coalesced_requests'
+        """
+        return {
+            'mirrors': [{'url': url, **self._health[url].get_stats()} for url in self.ordered_mirrors()],
+            'hedged_requests': self.hedged_requests,
+            'hedge_wins': self.hedge_wins,
+            'rate_limit': self.rate_limit,
+            'rate_limited': self.rate_limited,
+            'coalesced_requests': self._in_flight.coalesced,
+        }
@@ -6,18 +6,32 @@ import os
 from typing import List, Dict, Any, Optional
 
 from libs.providers.base_provider import TorrentProvider
+import libs.providers.health as health
+from libs.providers.mirrors import MirrorPool, parse_mirrors
 
 class PirateBayProvider(TorrentProvider):
     """PirateBay torrent provider implementation"""
+
+    # Provider discovery (see registry.py)
+    PROVIDER_ID = "piratebay"
+    PROVIDER_NAME = "The Pirate Bay"
+    DEFAULT_ENABLED = True
+
+    # API mirrors used unless the piratebay-mirrors setting lists others
+    DEFAULT_MIRRORS = ["https://apibay.org"]
     
-    def __init__(self):
-        self.server = "https://apibay.org"
+    def __init__(self, mirrors=None):
+        """
+        Args:
+            mirrors (list, optional): API base URLs. Defaults to the piratebay-mirrors setting or DEFAULT_MIRRORS.
+        """
+        self.mirrors = MirrorPool(self.name, mirrors or parse_mirrors(os.environ.get('piratebay-mirrors'), self.DEFAULT_MIRRORS))
         self.static_server = "https://torrindex.net"
         self._enabled = True  # Default to enabled
     
     @property
     def name(self) -> str:
-        return "The Pirate Bay"
+        return self.PROVIDER_NAME
     
     @property
     def enabled(self) -> bool:
@@ -28,12 +42,20 @@ class PirateBayProvider(TorrentProvider):
         self._enabled = value
     
     def get_request(self, endpoint):
-        """Make a GET request to the API"""
+        """Make a GET request to the fastest API mirror (timed and recorded in the provider's health)"""
+        try:
+            with health.track(self.name):
+                return self.mirrors.get_json(endpoint)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Error making request to PirateBay: {e}")
+            return None
+
+    async def aget_request(self, endpoint):
+        """Make a GET request like get_request, without blocking the event loop"""
         try:
-            response = requests.get(f"{self.server}/{endpoint}")
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            with health.track(self.name):
+                return await self.mirrors.aget_json(endpoint)
+        except (requests.exceptions.RequestException, ValueError) as e:
             print(f"Error making request to PirateBay: {e}")
             return None
     
@@ -113,31 +135,44 @@ class PirateBayProvider(TorrentProvider):
         date = datetime.datetime.fromtimestamp(timestamp)
         return date.strftime("%Y-%m-%d %H:%M")
     
-    def search(self, query: str, category: int = 0) -> List[Dict[str, Any]]:
-        """Search TPB for torrents"""
-        if not self.enabled:
-            print("[INFO] PirateBay provider is disabled")
-            return []
-            
+    def get_search_endpoint(self, query, category=0):
+        """Return the API endpoint for a search"""
         if query.startswith('top100:'):
             # Handle top100 searches
             top_type = query.split(':')[1]
-            endpoint = f"precompiled/data_top100_{top_type}.json"
-        else:
-            # Handle regular searches
-            endpoint = f"q.php?q={urllib.parse.quote(query)}"
-            if category:
-                endpoint += f"&cat={category}"
-        
-        results = self.get_request(endpoint)
+            return f"precompiled/data_top100_{top_type}.json"
+
+        # Handle regular searches
+        endpoint = f"q.php?q={urllib.parse.quote(query)}"
+        if category:
+            endpoint += f"&cat={category}"
+        return endpoint
+
+    def parse_search_results(self, results):
+        """Add provider info to the results of a search request"""
         if not results:
             return []
-            
-        # Add provider info to each result
+
         for result in results:
             result['provider'] = self.name
-            
+
         return results
+
+    def search(self, query: str, category: int = 0) -> List[Dict[str, Any]]:
+        """Search TPB for torrents"""
+        if not self.enabled:
+            print("[INFO] PirateBay provider is disabled")
+            return []
+
+        return self.parse_search_results(self.get_request(self.get_search_endpoint(query, category)))
+
+    async def asearch(self, query: str, category: int = 0) -> List[Dict[str, Any]]:
+        """Search TPB for torrents on the event loop (no thread is blocked while waiting for the API)"""
+        if not self.enabled:
+            print("[INFO] PirateBay provider is disabled")
+            return []
+
+        return self.parse_search_results(await self.aget_request(self.get_search_endpoint(query, category)))
     
     def get_torrent_details(self, torrent_id: str) -> Optional[Dict[str, Any]]:
         """Get details for a specific torrent"""
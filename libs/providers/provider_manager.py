@@ -1,13 +1,34 @@
 from typing import List, Dict, Any, Optional, Type
+from collections import OrderedDict
 import os
+import time
+import asyncio
+import threading
 
 from libs.providers.base_provider import TorrentProvider
+from libs.providers.registry import ProviderSpec
+from libs.providers.merge import dedupe_results, select_results, DEFAULT_SORT
+from libs.providers.records import SearchResult, as_record
+import libs.providers.health as health
+import libs.eventloop as eventloop
+from libs.releasenames import parse_release_name
 
 class ProviderManager:
-    """Manager for torrent providers"""
+    """Manager for torrent providers
+
+    Providers are either registered as instances (register_provider) or as
+    discovered specs (register_spec, see registry.py), which are only imported
+    and instantiated the first time they are used while enabled.
+    """
 
     def __init__(self):
-        self.providers = {}  # Dictionary of provider_id -> provider instance
+        self.providers = {}  # Dictionary of provider_id -> provider instance (loaded providers)
+        self.specs = {}  # Dictionary of provider_id -> ProviderSpec (discovered providers, loaded or not)
+        self._enabled = {}  # Dictionary of provider_id -> enabled status of providers not loaded yet
+        self._load_lock = threading.Lock()
+        # Recent merged search results, so paging and filtering don't search the providers again
+        self._search_cache = OrderedDict()  # key -> (stored_at, results), least recently used first
+        self._search_cache_lock = threading.Lock()
 
     def register_provider(self, provider_id: str, provider: TorrentProvider) -> None:
         """
@@ -20,65 +41,199 @@ class ProviderManager:
         self.providers[provider_id] = provider
         print(f"[INFO] Registered provider: {provider.name} with ID {provider_id}")
 
+    def register_spec(self, spec: ProviderSpec) -> None:
+        """
+        Register a discovered provider, to be loaded on first use
+
+        Args:
+            spec (ProviderSpec): The discovered provider
+        """
+        self.specs[spec.provider_id] = spec
+        self._enabled.setdefault(spec.provider_id, spec.default_enabled)
+        print(f"[INFO] Registered provider: {spec.name} with ID {spec.provider_id} (loaded on first use)")
+
+    def get_provider_ids(self) -> List[str]:
+        """Get the IDs of all registered providers, loaded or not"""
+        return list(dict.fromkeys(list(self.specs) + list(self.providers)))
+
+    def is_enabled(self, provider_id: str) -> bool:
+        """Check whether a provider is enabled (without loading it)"""
+        provider = self.providers.get(provider_id)
+        if provider is not None:
+            return provider.enabled
+        return self._enabled.get(provider_id, False)
+
+    def set_enabled(self, provider_id: str, enabled: bool) -> bool:
+        """
+        Enable or disable a provider at runtime (without loading it)
+
+        Args:
+            provider_id (str): Provider ID
+            enabled (bool): The new status
+
+        Returns:
+            bool: False if there is no such provider
+        """
+        if provider_id not in self.specs and provider_id not in self.providers:
+            return False
+
+        self._enabled[provider_id] = enabled
+        provider = self.providers.get(provider_id)
+        if provider is not None:
+            provider.enabled = enabled
+        return True
+
+    def get_provider_name(self, provider_id: str) -> Optional[str]:
+        """Get a provider's display name (without loading it)"""
+        provider = self.providers.get(provider_id)
+        if provider is not None:
+            return provider.name
+        spec = self.specs.get(provider_id)
+        return spec.name if spec else None
+
+    def is_loaded(self, provider_id: str) -> bool:
+        """Check whether a provider has been instantiated"""
+        return provider_id in self.providers
+
     def get_provider(self, provider_id: str) -> Optional[TorrentProvider]:
         """
-        Get a provider by ID
+        Get a provider by ID, loading it if it was discovered but not used yet
 
         Args:
             provider_id (str): Provider ID
 
         Returns:
-            Optional[TorrentProvider]: Provider instance or None if not found
+            Optional[TorrentProvider]: Provider instance or None if not found (or it failed to load)
         """
-        return self.providers.get(provider_id)
+        provider = self.providers.get(provider_id)
+        if provider is not None or provider_id not in self.specs:
+            return provider
+
+        with self._load_lock:
+            provider = self.providers.get(provider_id)
+            if provider is None:
+                spec = self.specs[provider_id]
+                try:
+                    provider = spec.load()
+                except Exception as e:
+                    print(f"[ERROR] Failed to load provider {provider_id} from {spec.module}: {e}")
+                    return None
+
+                provider.enabled = self._enabled.get(provider_id, spec.default_enabled)
+                self.providers[provider_id] = provider
+                print(f"[INFO] Loaded provider: {provider.name} with ID {provider_id}")
+        return provider
 
     def get_all_providers(self) -> Dict[str, TorrentProvider]:
         """
-        Get all registered providers
+        Get all registered providers (loading every discovered provider)
 
         Returns:
             Dict[str, TorrentProvider]: Dictionary of provider_id -> provider
         """
-        return self.providers
+        providers = {pid: self.get_provider(pid) for pid in self.get_provider_ids()}
+        return {pid: provider for pid, provider in providers.items() if provider is not None}
 
     def get_enabled_providers(self) -> Dict[str, TorrentProvider]:
         """
-        Get all enabled providers
+        Get all enabled providers (loading them on first use)
 
         Returns:
             Dict[str, TorrentProvider]: Dictionary of provider_id -> provider for enabled providers
         """
-        return {pid: provider for pid, provider in self.providers.items() if provider.enabled}
+        providers = {pid: self.get_provider(pid) for pid in self.get_provider_ids() if self.is_enabled(pid)}
+        return {pid: provider for pid, provider in providers.items() if provider is not None}
 
-    def search(self, query: str, category: int = 0, provider_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    async def _asearch_provider(self, provider: TorrentProvider, query: str, category: int) -> Optional[List[SearchResult]]:
+        """
+        Search a single provider, unless its circuit breaker is open
+
+        Sync providers run in the blocking thread pool (TorrentProvider.asearch), so
+        several providers are searched at the same time.
+
+        Returns:
+            Optional[List[SearchResult]]: The provider's results, or None if it was skipped or its request failed
+        """
+        provider_health = health.get_health(provider.name)
+        if not provider_health.allow_request():
+            print(f"[WARNING] Skipping provider {provider.name}, its circuit is open after repeated failures")
+            return None
+
+        print(f"[INFO] Searching with provider: {provider.name}")
+        try:
+            if hasattr(provider, 'asearch'):
+                provider_results = await provider.asearch(query, category)
+            else:
+                # Providers not based on TorrentProvider only have the sync interface
+                provider_results = await eventloop.run_blocking(provider.search, query, category)
+        except Exception as e:
+            print(f"[ERROR] Provider {provider.name} failed to search: {e}")
+            return None
+
+        results = [as_record(result) for result in provider_results or []]
+
+        # Providers return no results when their request fails (recorded in their health)
+        if not results and provider_health.consecutive_failures > 0:
+            return None
+        return results
+
+    def search(self, query: str, category: int = 0, provider_id: Optional[str] = None, sort_by: str = DEFAULT_SORT, limit: Optional[int] = None) -> List[SearchResult]:
         """
         Search for torrents across all enabled providers or a specific provider
 
+        Runs asearch on the shared event loop and waits for it.
+
         Args:
             query (str): Search query
             category (int, optional): Category ID. Defaults to 0.
             provider_id (Optional[str], optional): Specific provider ID to search. Defaults to None.
+            sort_by (str, optional): Sort order, see merge.SORT_KEYS. Defaults to DEFAULT_SORT.
+            limit (Optional[int], optional): Only return the best results. Defaults to None (all).
 
         Returns:
-            List[Dict[str, Any]]: Combined search results from all providers
+            List[SearchResult]: Combined search results from all providers (see records.to_json)
         """
-        results = []
+        return eventloop.run(self._asearch(query, category, provider_id, sort_by, limit))[0]
 
+    async def asearch(self, query: str, category: int = 0, provider_id: Optional[str] = None, sort_by: str = DEFAULT_SORT, limit: Optional[int] = None) -> List[SearchResult]:
+        """
+        Search like search(), for callers running on an event loop
+
+        Returns:
+            List[SearchResult]: Combined search results from all providers
+        """
+        return (await self._asearch(query, category, provider_id, sort_by, limit))[0]
+
+    async def _asearch(self, query: str, category: int, provider_id: Optional[str], sort_by: str, limit: Optional[int]) -> tuple:
+        """
+        Search (see search), also reporting whether every provider could be searched
+
+        Returns:
+            tuple: (results, complete), complete is False if a provider was skipped or failed
+        """
         # If a specific provider is requested
         if provider_id:
-            provider = self.get_provider(provider_id)
-            if provider and provider.enabled:
-                print(f"[INFO] Searching with provider: {provider.name}")
-                provider_results = provider.search(query, category)
-                results.extend(provider_results)
+            # Disabled providers aren't loaded
+            provider = self.get_provider(provider_id) if self.is_enabled(provider_id) else None
+            if provider:
+                providers = [provider]
             else:
+                providers = []
                 print(f"[WARNING] Provider {provider_id} not found or disabled")
         else:
             # Search across all enabled providers
-            for pid, provider in self.get_enabled_providers().items():
-                print(f"[INFO] Searching with provider: {provider.name}")
-                provider_results = provider.search(query, category)
-                results.extend(provider_results)
+            providers = list(self.get_enabled_providers().values())
+
+        # Search every provider at the same time
+        provider_results = await asyncio.gather(*(self._asearch_provider(provider, query, category) for provider in providers))
+
+        results = []
+        complete = True
+        for single_provider_results in provider_results:
+            if single_provider_results is None:
+                complete = False
+            else:
+                results.extend(single_provider_results)
 
         # Filter out adult content if the setting is enabled
         hide_adult = os.environ.get('hide-adult-content', 'true').lower() == 'true'
@@ -87,20 +242,84 @@ class ProviderManager:
             original_count = len(results)
             results = [
                 result for result in results
-                if 'XXX' not in result['name'].upper() and
-                   not (result.get('category') and 500 <= int(result['category']) < 600)
+                if 'XXX' not in result.name.upper() and
+                   not (result.category and 500 <= int(result.category) < 600)
             ]
             filtered_count = original_count - len(results)
             if filtered_count > 0:
                 print(f"[INFO] Filtered out {filtered_count} adult content results")
 
-        # Sort the combined results by seeders (descending) and then by leechers (descending)
+        # The same torrent can come from several providers, keep one result per info hash
+        results = dedupe_results(results)
+
+        # Annotate results with quality/season/episode/year parsed from the release name,
+        # so clients don't have to run the parser themselves
+        for result in results:
+            result.metadata = parse_release_name(result.name)
+
+        # Sort the combined results (by seeders and then leechers unless asked otherwise),
+        # only selecting the top results when there's a limit
         if results:
             print(f"[INFO] Sorting {len(results)} combined results from all providers")
-            results.sort(key=lambda x: (int(x.get('seeders', 0)), int(x.get('leechers', 0))), reverse=True)
+            results = select_results(results, sort_by, limit)
+
+        return results, complete
+
+    def _search_cache_key(self, query: str, category: int, provider_id: Optional[str]) -> tuple:
+        """Build the cache key of a search (includes everything that changes its results)"""
+        enabled = tuple(sorted(pid for pid in self.get_provider_ids() if self.is_enabled(pid)))
+        hide_adult = os.environ.get('hide-adult-content', 'true').lower() == 'true'
+        return (query.strip().lower(), category, provider_id, enabled, hide_adult)
+
+    def search_cached(self, query: str, category: int = 0, provider_id: Optional[str] = None) -> List[SearchResult]:
+        """
+        Search like search(), reusing merged results of the same search for a while
+
+        The cache time and size are set with the search-cache-ttl (seconds) and
+        search-cache-size environment variables. The returned list is shared, don't modify it.
+
+        Args:
+            query (str): Search query
+            category (int, optional): Category ID. Defaults to 0.
+            provider_id (Optional[str], optional): Specific provider ID to search. Defaults to None.
+
+        Returns:
+            List[SearchResult]: Combined, annotated and sorted search results
+        """
+        ttl = int(os.environ.get('search-cache-ttl', 300))
+        max_size = int(os.environ.get('search-cache-size', 100))
+        if ttl <= 0 or max_size <= 0:
+            return self.search(query, category, provider_id=provider_id)
+
+        key = self._search_cache_key(query, category, provider_id)
+        now = time.time()
+
+        with self._search_cache_lock:
+            cached = self._search_cache.get(key)
+            if cached is not None and now - cached[0] < ttl:
+                self._search_cache.move_to_end(key)
+                print(f"[INFO] Using cached search results for {query}")
+                return cached[1]
+
+        results, complete = eventloop.run(self._asearch(query, category, provider_id, DEFAULT_SORT, None))
+
+        # Don't keep results missing a provider that was skipped or failed, it may be back soon
+        if not complete:
+            return results
+
+        with self._search_cache_lock:
+            self._search_cache[key] = (now, results)
+            self._search_cache.move_to_end(key)
+            while len(self._search_cache) > max_size:
+                self._search_cache.popitem(last=False)
 
         return results
 
+    def clear_search_cache(self) -> None:
+        """Forget all cached search results"""
+        with self._search_cache_lock:
+            self._search_cache.clear()
+
     def get_torrent_details(self, torrent_id: str, provider_id: str) -> Optional[Dict[str, Any]]:
         """
         Get details for a specific torrent from a specific provider
@@ -112,8 +331,8 @@ class ProviderManager:
         Returns:
             Optional[Dict[str, Any]]: Torrent details or None if not found
         """
-        provider = self.get_provider(provider_id)
-        if provider and provider.enabled:
+        provider = self.get_provider(provider_id) if self.is_enabled(provider_id) else None
+        if provider:
             return provider.get_torrent_details(torrent_id)
         return None
 
@@ -129,7 +348,7 @@ class ProviderManager:
         Returns:
             Optional[str]: Magnet link or None if provider not found
         """
-        provider = self.get_provider(provider_id)
-        if provider and provider.enabled:
+        provider = self.get_provider(provider_id) if self.is_enabled(provider_id) else None
+        if provider:
             return provider.create_magnet_link(info_hash, name)
         return None
@@ -0,0 +1,129 @@
+from typing import List, Dict, Any, Optional
+
+# Compact, typed search result records. Providers may return these directly or plain
+# dicts in the standard result format, which are converted once by SearchResult.from_dict.
+
+def _to_int(value, default=0):
+    """Convert a provider value (often a string) to an int"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+class MovieInfo:
+    """Movie details shared by every torrent of the same movie (e.g. the qualities YTS offers)"""
+
+    __slots__ = ('movie_id', 'title', 'year', 'rating', 'runtime', 'genres', 'summary', 'language', 'imdb')
+
+    def __init__(self, movie_id, title='', year=None, rating=None, runtime=None, genres=None, summary='', language='', imdb=''):
+        self.movie_id = movie_id
+        self.title = title
+        self.year = year
+        self.rating = rating
+        self.runtime = runtime
+        self.genres = genres or []
+        self.summary = summary
+        self.language = language
+        self.imdb = imdb
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the movie details to a JSON-serializable dict"""
+        return {field: getattr(self, field) for field in self.__slots__}
+
+class SearchResult:
+    """A single torrent search result
+
+    Numeric fields are ints. Fields outside the standard result format are kept
+    in 'extra', movie details in a MovieInfo shared between results.
+    """
+
+    # Standard result fields (see PROVIDER_SYSTEM.md) and their defaults
+    STANDARD_FIELDS = {
+        'id': '',
+        'name': '',
+        'info_hash': '',
+        'seeders': 0,
+        'leechers': 0,
+        'num_files': 0,
+        'size': 0,
+        'size_formatted': None,
+        'username': '',
+        'added': 0,
+        'status': '',
+        'category': '',
+        'imdb': '',
+        'provider': '',
+    }
+    NUMERIC_FIELDS = ('seeders', 'leechers', 'num_files', 'size', 'added')
+
+    __slots__ = tuple(STANDARD_FIELDS) + ('providers', 'metadata', 'movie', 'extra')
+
+    def __init__(self, movie: Optional[MovieInfo] = None, extra: Optional[Dict[str, Any]] = None, **fields):
+        for field, default in self.STANDARD_FIELDS.items():
+            setattr(self, field, fields.get(field, default))
+        for field in self.NUMERIC_FIELDS:
+            setattr(self, field, _to_int(getattr(self, field)))
+
+        self.providers = [self.provider] if self.provider else []
+        self.metadata = None  # Parsed release name, set by the provider manager
+        self.movie = movie
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, result: Dict[str, Any]) -> 'SearchResult':
+        """
+        Convert a result dict in the standard format to a record
+
+        Args:
+            result (Dict[str, Any]): A result as returned by a provider
+
+        Returns:
+            SearchResult: The record
+        """
+        extra = {key: value for key, value in result.items() if key not in cls.STANDARD_FIELDS}
+        return cls(extra=extra, **result)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the record to a JSON-serializable dict
+
+        Movie details aren't included, only their 'movie_id' (see get_movies).
+        """
+        result = {field: getattr(self, field) for field in self.STANDARD_FIELDS}
+        if self.size_formatted is None:
+            del result['size_formatted']
+        if self.extra:
+            result.update(self.extra)
+        result['providers'] = self.providers
+        result['metadata'] = self.metadata
+        if self.movie is not None:
+            result['movie_id'] = self.movie.movie_id
+        return result
+
+def as_record(result) -> SearchResult:
+    """Get a provider result as a record (providers may return dicts or records)"""
+    if isinstance(result, SearchResult):
+        return result
+    return SearchResult.from_dict(result)
+
+def to_json(results: List[SearchResult]) -> List[Dict[str, Any]]:
+    """Convert records to JSON-serializable dicts"""
+    return [result.to_dict() for result in results]
+
+def get_movies(results: List[SearchResult]) -> Dict[str, Dict[str, Any]]:
+    """
+    Collect the movie details of a list of results, each movie once
+
+    Args:
+        results (List[SearchResult]): The results
+
+    Returns:
+        Dict[str, Dict[str, Any]]: movie_id (as a string, like JSON keys) -> movie details
+    """
+    movies = {}
+    for result in results:
+        if result.movie is not None:
+            key = str(result.movie.movie_id)
+            if key not in movies:
+                movies[key] = result.movie.to_dict()
+    return movies
@@ -0,0 +1,154 @@
+import os
+import ast
+import importlib
+from importlib.metadata import entry_points
+from typing import List, Optional
+
+from libs.providers.base_provider import TorrentProvider
+
+# Provider discovery
+#
+# Providers are found without importing them:
+# - modules in the providers directory (libs/providers/*_provider.py) defining a
+#   class with a PROVIDER_ID class attribute (read from the source with ast)
+# - installed packages exposing a provider class in the ENTRY_POINT_GROUP entry point group
+#   (the entry point name is the provider ID)
+# A provider's module is only imported when the provider is first used while enabled.
+
+# Directory scanned for provider modules
+PROVIDERS_DIR = os.path.dirname(os.path.abspath(__file__))
+# Package the provider modules are imported from
+PROVIDERS_PACKAGE = 'libs.providers'
+# Entry point group for providers installed as packages
+ENTRY_POINT_GROUP = 'prettydownloader.providers'
+
+class ProviderSpec:
+    """A discovered provider that can be instantiated when needed"""
+
+    def __init__(self, provider_id, module, class_name, name=None, default_enabled=True, source='plugin'):
+        """
+        Args:
+            provider_id (str): Unique identifier of the provider
+            module (str): Module defining the provider class
+            class_name (str): Name of the provider class
+            name (str, optional): Display name. Defaults to the provider ID until the provider is loaded.
+            default_enabled (bool, optional): Whether the provider is enabled without settings. Defaults to True.
+            source (str, optional): 'plugin' (providers directory) or 'entry_point'. Defaults to 'plugin'.
+        """
+        self.provider_id = provider_id
+        self.module = module
+        self.class_name = class_name
+        self.name = name or provider_id
+        self.default_enabled = default_enabled
+        self.source = source
+
+    def load(self) -> TorrentProvider:
+        """
+        Import the provider's module and create the provider
+
+        Returns:
+            TorrentProvider: The provider instance
+
+        Raises:
+            Exception: If the module can't be imported or the class isn't a TorrentProvider
+        """
+        provider_class = getattr(importlib.import_module(self.module), self.class_name)
+        if not (isinstance(provider_class, type) and issubclass(provider_class, TorrentProvider)):
+            raise TypeError(f"{self.module}.{self.class_name} is not a TorrentProvider")
+
+        provider = provider_class()
+        self.name = provider.name
+        return provider
+
+def _constant_attributes(class_node):
+    """Read the constant class attributes (NAME = 'value') of a class definition"""
+    attributes = {}
+    for node in class_node.body:
+        if isinstance(node, ast.Assign) and isinstance(node.value, ast.Constant):
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    attributes[target.id] = node.value.value
+    return attributes
+
+def scan_providers_dir(directory: str = PROVIDERS_DIR, package: str = PROVIDERS_PACKAGE) -> List[ProviderSpec]:
+    """
+    Find provider classes in a directory without importing them
+
+    Args:
+        directory (str, optional): Directory to scan. Defaults to PROVIDERS_DIR.
+        package (str, optional): Package the modules are imported from. Defaults to PROVIDERS_PACKAGE.
+
+    Returns:
+        List[ProviderSpec]: Providers defined in *_provider.py files, in filename order
+    """
+    specs = []
+
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith('_provider.py'):
+            continue
+
+        path = os.path.join(directory, filename)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                tree = ast.parse(f.read(), filename=path)
+        except (OSError, SyntaxError) as e:
+            print(f"[ERROR] Failed to read provider module {filename}: {e}")
+            continue
+
+        for node in tree.body:
+            if not isinstance(node, ast.ClassDef):
+                continue
+            attributes = _constant_attributes(node)
+            if not isinstance(attributes.get('PROVIDER_ID'), str):
+                continue
+
+            specs.append(ProviderSpec(
+                provider_id=attributes['PROVIDER_ID'],
+                module=f"{package}.{filename[:-3]}",
+                class_name=node.name,
+                name=attributes.get('PROVIDER_NAME'),
+                default_enabled=attributes.get('DEFAULT_ENABLED', True) is not False,
+            ))
+
+    return specs
+
+def scan_entry_points(group: str = ENTRY_POINT_GROUP) -> List[ProviderSpec]:
+    """
+    Find providers installed as packages (entry points like 'myprovider = package.module:MyProvider')
+
+    Args:
+        group (str, optional): Entry point group. Defaults to ENTRY_POINT_GROUP.
+
+    Returns:
+        List[ProviderSpec]: The providers
+    """
+    specs = []
+    for entry_point in entry_points(group=group):
+        module, _, class_name = entry_point.value.partition(':')
+        if not class_name:
+            print(f"[WARNING] Provider entry point {entry_point.name} doesn't name a class: {entry_point.value}")
+            continue
+        specs.append(ProviderSpec(entry_point.name, module.strip(), class_name.strip(), source='entry_point'))
+    return specs
+
+def discover_providers(directory: Optional[str] = None) -> List[ProviderSpec]:
+    """
+    Find every available provider
+
+    Providers in the providers directory take precedence over entry points with the same ID.
+
+    Args:
+        directory (Optional[str], optional): Providers directory. Defaults to PROVIDERS_DIR.
+
+    Returns:
+        List[ProviderSpec]: The providers, directory providers first
+    """
+    specs = {}
+    for spec in scan_providers_dir(directory or PROVIDERS_DIR) + scan_entry_points():
+        if spec.provider_id in specs:
+            print(f"[WARNING] Ignoring duplicate provider ID {spec.provider_id} ({spec.module}.{spec.class_name})")
+            continue
+        specs[spec.provider_id] = spec
+
+    print(f"[INFO] Discovered providers: {', '.join(specs) or 'none'}")
+    return list(specs.values())
@@ -10,13 +10,18 @@ class SampleProvider(TorrentProvider):
     Sample torrent provider implementation for demonstration purposes.
     This provider doesn't actually connect to any real service.
     """
+
+    # Provider discovery (see registry.py)
+    PROVIDER_ID = "sample"
+    PROVIDER_NAME = "Sample Provider"
+    DEFAULT_ENABLED = False
     
     def __init__(self):
         self._enabled = False  # Default to disabled
     
     @property
     def name(self) -> str:
-        return "Sample Provider"
+        return self.PROVIDER_NAME
     
     @property
     def enabled(self) -> bool:
@@ -1,3 +1,4 @@
+import os
 import requests
 import json
 import urllib.parse
@@ -6,17 +7,32 @@ import random
 from typing import List, Dict, Any, Optional
 
 from libs.providers.base_provider import TorrentProvider
+from libs.providers.records import SearchResult, MovieInfo
+import libs.providers.health as health
+from libs.providers.mirrors import MirrorPool, parse_mirrors
 
 class YTSProvider(TorrentProvider):
     """YTS/YIFY torrent provider implementation"""
 
-    def __init__(self):
-        self.api_url = "https://yts.mx/api/v2"
+    # Provider discovery (see registry.py)
+    PROVIDER_ID = "yts"
+    PROVIDER_NAME = "YTS/YIFY"
+    DEFAULT_ENABLED = True
+
+    # API mirrors used unless the yts-mirrors setting lists others
+    DEFAULT_MIRRORS = ["https://yts.mx/api/v2"]
+
+    def __init__(self, mirrors=None):
+        """
+        Args:
+            mirrors (list, optional): API base URLs. Defaults to the yts-mirrors setting or DEFAULT_MIRRORS.
+        """
+        self.mirrors = MirrorPool(self.name, mirrors or parse_mirrors(os.environ.get('yts-mirrors'), self.DEFAULT_MIRRORS))
         self._enabled = True  # Default to enabled
 
     @property
     def name(self) -> str:
-        return "YTS/YIFY"
+        return self.PROVIDER_NAME
 
     @property
     def enabled(self) -> bool:
@@ -27,23 +43,34 @@ class YTSProvider(TorrentProvider):
         self._enabled = value
 
     def get_request(self, endpoint, params=None):
-        """Make a GET request to the YTS API"""
+        """Make a GET request to the fastest YTS API mirror (timed and recorded in the provider's health)"""
         try:
-            url = f"{self.api_url}/{endpoint}"
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-
-            # YTS API returns status and data in the response
-            if data.get('status') == 'ok':
-                return data.get('data', {})
-            else:
-                print(f"[WARNING] YTS API returned error: {data.get('status_message')}")
-                return None
-        except requests.exceptions.RequestException as e:
+            with health.track(self.name):
+                data = self.mirrors.get_json(endpoint, params)
+            return self.get_response_data(data)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"[ERROR] Error making request to YTS API: {e}")
+            return None
+
+    async def aget_request(self, endpoint, params=None):
+        """Make a GET request like get_request, without blocking the event loop"""
+        try:
+            with health.track(self.name):
+                data = await self.mirrors.aget_json(endpoint, params)
+            return self.get_response_data(data)
+        except (requests.exceptions.RequestException, ValueError) as e:
             print(f"[ERROR] Error making request to YTS API: {e}")
             return None
 
+    def get_response_data(self, data):
+        """Return the data of an API response, or None if the API returned an error"""
+        # YTS API returns status and data in the response
+        if data.get('status') == 'ok':
+            return data.get('data', {})
+        else:
+            print(f"[WARNING] YTS API returned error: {data.get('status_message')}")
+            return None
+
     def get_trackers(self):
         """Return a string of trackers for magnet links"""
         trackers = [
@@ -99,22 +126,35 @@ class YTSProvider(TorrentProvider):
             print(f"[ERROR] Error parsing size string '{size_str}': {e}")
             return 0
 
-    def search(self, query: str, category: int = 0) -> List[Dict[str, Any]]:
-        """Search YTS for movies"""
+    def get_search_params(self, query):
+        """Return the list_movies.json parameters for a search"""
+        # YTS only has movies, so we ignore the category parameter
+        return {
+            'query_term': query,
+            'limit': 50,  # Get a good number of results
+            'sort_by': 'seeds',  # Sort by seeders (most popular first)
+        }
+
+    def search(self, query: str, category: int = 0) -> List[SearchResult]:
+        """Search YTS for movies (one result per torrent, sharing the movie's details)"""
         if not self.enabled:
             print("[INFO] YTS provider is disabled")
             return []
 
         print(f"[INFO] Searching YTS for: {query}")
+        return self.parse_search_results(self.get_request('list_movies.json', self.get_search_params(query)))
 
-        # YTS only has movies, so we ignore the category parameter
-        params = {
-            'query_term': query,
-            'limit': 50,  # Get a good number of results
-            'sort_by': 'seeds',  # Sort by seeders (most popular first)
-        }
+    async def asearch(self, query: str, category: int = 0) -> List[SearchResult]:
+        """Search YTS for movies on the event loop (no thread is blocked while waiting for the API)"""
+        if not self.enabled:
+            print("[INFO] YTS provider is disabled")
+            return []
 
-        data = self.get_request('list_movies.json', params)
+        print(f"[INFO] Searching YTS for: {query}")
+        return self.parse_search_results(await self.aget_request('list_movies.json', self.get_search_params(query)))
+
+    def parse_search_results(self, data) -> List[SearchResult]:
+        """Convert a list_movies.json response to results (one per torrent, sharing the movie's details)"""
         if not data:
             return []
 
@@ -127,60 +167,52 @@ class YTSProvider(TorrentProvider):
         results = []
 
         for movie in movies:
-            movie_id = movie.get('id')
-            title = movie.get('title', '')
-            year = movie.get('year', '')
-            rating = movie.get('rating', '')
-            runtime = movie.get('runtime', '')
-            genres = movie.get('genres', [])
-            summary = movie.get('summary', '')
-            language = movie.get('language', '')
-            imdb_code = movie.get('imdb_code', '')
+            # Movie details are shared by every torrent (quality) of the movie
+            movie_info = MovieInfo(
+                movie_id=movie.get('id'),
+                title=movie.get('title', ''),
+                year=movie.get('year', ''),
+                rating=movie.get('rating', ''),
+                runtime=movie.get('runtime', ''),
+                genres=movie.get('genres', []),
+                summary=movie.get('summary', ''),
+                language=movie.get('language', ''),
+                imdb=movie.get('imdb_code', ''),
+            )
 
             # Process each torrent for this movie
             torrents = movie.get('torrents', [])
             for torrent in torrents:
                 quality = torrent.get('quality', '')
                 type = torrent.get('type', '')  # 3D, BluRay, etc.
-                seeds = torrent.get('seeds', 0)
-                peers = torrent.get('peers', 0)
                 size = torrent.get('size', '')
                 # Use size_bytes if available, otherwise parse the size string
                 size_bytes = torrent.get('size_bytes', 0)
                 if not size_bytes and size:
                     size_bytes = self.parse_size(size)
                 date_uploaded = torrent.get('date_uploaded', '')
-                hash = torrent.get('hash', '')
-
-                # Create a standardized result format similar to TPB
-                result = {
-                    'id': f"{movie_id}_{quality}_{type}",
-                    'name': f"{title} ({year}) [{quality}] [{type}] - YTS",
-                    'info_hash': hash,
-                    'seeders': seeds,
-                    'leechers': peers,
-                    'num_files': 1,  # YTS usually has single file torrents
-                    'size': size_bytes,
-                    'size_formatted': size,
-                    'username': 'YTS',
-                    'added': int(datetime.datetime.fromisoformat(date_uploaded.replace('Z', '+00:00')).timestamp()) if date_uploaded else 0,
-                    'status': 'trusted',
-                    'category': '201',  # Movies category (using TPB category system)
-                    'imdb': imdb_code,
-                    'provider': self.name,
+
+                # Create a standardized result similar to TPB
+                result = SearchResult(
+                    id=f"{movie_info.movie_id}_{quality}_{type}",
+                    name=f"{movie_info.title} ({movie_info.year}) [{quality}] [{type}] - YTS",
+                    info_hash=torrent.get('hash', ''),
+                    seeders=torrent.get('seeds', 0),
+                    leechers=torrent.get('peers', 0),
+                    num_files=1,  # YTS usually has single file torrents
+                    size=size_bytes,
+                    size_formatted=size,
+                    username='YTS',
+                    added=int(datetime.datetime.fromisoformat(date_uploaded.replace('Z', '+00:00')).timestamp()) if date_uploaded else 0,
+                    status='trusted',
+                    category='201',  # Movies category (using TPB category system)
+                    imdb=movie_info.imdb,
+                    provider=self.name,
+                    movie=movie_info,
 
                     # YTS specific fields
-                    'movie_id': movie_id,
-                    'title': title,
-                    'year': year,
-                    'rating': rating,
-                    'runtime': runtime,
-                    'genres': genres,
-                    'summary': summary,
-                    'language': language,
-                    'quality': quality,
-                    'type': type
-                }
+                    extra={'quality': quality, 'type': type},
+                )
 
                 results.append(result)
 
@@ -0,0 +1,81 @@
+import time
+import threading
+
+class TokenBucket:
+    """Thread-safe token bucket rate limiter
+
+    Tokens are added continuously at `rate` per second up to `capacity`.
+    Each request takes one token, waiting for one to become available if needed.
+    """
+
+    def __init__(self, rate, capacity=None):
+        """
+        Args:
+            rate (float): Tokens added per second
+            capacity (int, optional): Maximum burst size. Defaults to rate.
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate, capacity=None):
+        """Change the rate (and burst size) without losing the tokens already available
+
+        Args:
+            rate (float): Tokens added per second
+            capacity (int, optional): Maximum burst size. Defaults to rate.
+        """
+        with self._lock:
+            # Settle the tokens earned at the old rate first
+            self._refill()
+            self.rate = float(rate)
+            self.capacity = float(capacity if capacity is not None else max(rate, 1))
+            self._tokens = min(self._tokens, self.capacity)
+
+    def _refill(self):
+        """Add the tokens accumulated since the last update"""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self):
+        """Take a token without waiting
+
+        Returns:
+            bool: Whether a token was available
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def acquire(self, timeout=None):
+        """Take a token, waiting until one is available
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait. Defaults to waiting forever.
+
+        Returns:
+            bool: Whether a token was acquired before the timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate if self.rate > 0 else 1.0
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+
+            time.sleep(wait)
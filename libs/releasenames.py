@@ -0,0 +1,158 @@
+import re
+from functools import lru_cache
+
+# Release name parsing, mirroring extractMetadata() in static/js/app.js so results
+# can be annotated on the server. All patterns are compiled once at import.
+
+# Number of parsed names kept in memory (the same releases show up in many searches)
+PARSE_CACHE_SIZE = 4096
+
+# Quality (common formats like 720p, 1080p, 4K, etc.)
+QUALITY_PATTERN = re.compile(r'\b(4K|8K|720p|1080p|2160p|HDTV|WEB-DL|WEBRip|BRRip|BluRay|DVDRip|HDRip|XviD|HEVC|H\.?264|H\.?265|x264|x265|REMUX)\b', re.IGNORECASE)
+# Common quality terms checked (case-sensitively) if none of the above matched
+COMMON_QUALITY_TERMS = ('HD', 'UHD', 'SD', 'HQ')
+
+# Complete season patterns, tried in order. Each captures the season number in one of its groups.
+COMPLETE_SEASON_PATTERNS = (
+    re.compile(r'S(\d{1,2})[\.\s]COMPLETE\b', re.IGNORECASE),  # S01.COMPLETE or S01 COMPLETE
+    re.compile(r'Season\s?(\d{1,2})\s?Complete\b', re.IGNORECASE),  # Season 1 Complete
+    re.compile(r'COMPLETE\.S(\d{1,2})\b', re.IGNORECASE),  # The.Series.Name.Complete.S01
+    re.compile(r'S(\d{1,2})[\.\s]PACK\b|Season\s?(\d{1,2})[\.\s]PACK\b', re.IGNORECASE),  # S01.PACK or Season.1.PACK
+    re.compile(r'S(\d{1,2})[\.\s]FULL[\.\s]SEASON\b|Season\s?(\d{1,2})[\.\s]FULL\b', re.IGNORECASE),  # S01.FULL.SEASON
+)
+# Complete series or collection
+COMPLETE_SERIES_PATTERNS = (
+    re.compile(r'\bCOMPLETE\s(SERIES|COLLECTION|SEASON)\b', re.IGNORECASE),
+    re.compile(r'\b(SERIES|COLLECTION|SEASON)\sCOMPLETE\b', re.IGNORECASE),
+    re.compile(r'\bFULL\s(SERIES|COLLECTION|SEASON)\b', re.IGNORECASE),
+    re.compile(r'\bALL\sSEASONS\b', re.IGNORECASE),
+)
+# Season number without episode (e.g. S06 without E01), a common pattern for complete seasons
+SEASON_ONLY_PATTERN = re.compile(r'\bS(\d{1,2})\b(?!E\d{1,2})', re.IGNORECASE)
+SEASON_EPISODE_WORD_PATTERN = re.compile(r'\bS\d{1,2}E\d{1,2}\b', re.IGNORECASE)
+# "Season X" without episode (e.g. Season 6 without Episode)
+SEASON_WORD_PATTERN = re.compile(r'\bSeason\s(\d{1,2})\b(?!\s+Episode)', re.IGNORECASE)
+SEASON_WORD_EPISODE_PATTERN = re.compile(r'\bSeason\s\d{1,2}\s+Episode\s\d{1,2}\b', re.IGNORECASE)
+
+# Season and episode formats, tried in order: S01E01, Season 1 Episode 1, 1x01
+SEASON_EPISODE_PATTERNS = (
+    re.compile(r'S(\d{1,2})E(\d{1,2})', re.IGNORECASE),
+    re.compile(r'Season\s?(\d{1,2})\s?Episode\s?(\d{1,2})', re.IGNORECASE),
+    re.compile(r'(\d{1,2})x(\d{1,2})', re.IGNORECASE),
+)
+
+# Year (4 digits in parentheses, brackets or spaces), then any plausible 4 digit year
+YEAR_PATTERN = re.compile(r'[\(\[\s](\d{4})[\)\]\s]')
+ALT_YEAR_PATTERN = re.compile(r'\b(19\d{2}|20\d{2})\b')
+
+# Content type hints for names without season, episode or year
+TV_SHOW_PATTERNS = (
+    re.compile(r'\b(?:s\d{1,2}|season\s?\d{1,2})\b', re.IGNORECASE),  # Season indicator without episode
+    re.compile(r'\b(?:tv series|tv show|series|episodes)\b', re.IGNORECASE),  # TV show keywords
+    re.compile(r'\b(?:complete|full|all)\s?(?:series|seasons|collection)\b', re.IGNORECASE),  # Complete series indicators
+)
+MOVIE_PATTERNS = (
+    re.compile(r'\b(?:movie|film)\b', re.IGNORECASE),  # Movie keywords
+    re.compile(r'\b(?:dvdrip|bdrip|bluray|web-?dl|hdrip)\b', re.IGNORECASE),  # Common movie release types
+    re.compile(r'\b(?:directors cut|extended|unrated)\b', re.IGNORECASE),  # Movie edition types
+)
+
+def _first_group(match):
+    """Get the first group of a match that participated (for alternations)"""
+    return next(group for group in match.groups() if group is not None)
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse(name):
+    """Parse a release name into a tuple of (key, value) pairs (cached, so immutable)"""
+    quality = None
+    season = None
+    episode = None
+    year = None
+    complete = None
+    content_type = None
+
+    # Extract quality
+    match = QUALITY_PATTERN.search(name)
+    if match:
+        quality = match.group(0)
+    else:
+        quality = next((term for term in COMMON_QUALITY_TERMS if term in name), None)
+
+    # Check for complete season patterns
+    for pattern in COMPLETE_SEASON_PATTERNS:
+        match = pattern.search(name)
+        if match:
+            complete = int(_first_group(match))
+            break
+
+    if not complete and any(pattern.search(name) for pattern in COMPLETE_SERIES_PATTERNS):
+        complete = 'All'
+
+    if not complete:
+        match = SEASON_ONLY_PATTERN.search(name)
+        if match and not SEASON_EPISODE_WORD_PATTERN.search(name):
+            complete = int(match.group(1))
+
+    if not complete:
+        match = SEASON_WORD_PATTERN.search(name)
+        if match and not SEASON_WORD_EPISODE_PATTERN.search(name):
+            complete = int(match.group(1))
+
+    # Extract season and episode if not a complete season
+    if not complete:
+        for pattern in SEASON_EPISODE_PATTERNS:
+            if season and episode:
+                break
+            match = pattern.search(name)
+            if match:
+                season = int(match.group(1))
+                episode = int(match.group(2))
+
+    # Extract year (bracketed first, then any plausible year)
+    match = YEAR_PATTERN.search(name)
+    if match:
+        year = int(match.group(1))
+    if not year:
+        match = ALT_YEAR_PATTERN.search(name)
+        if match:
+            year = int(match.group(1))
+
+    # Determine content type based on extracted metadata
+    if season or episode or complete:
+        content_type = 'tvshow'
+    elif year:
+        # If it has a year but no season/episode, it's likely a movie
+        content_type = 'movie'
+    elif any(pattern.search(name) for pattern in TV_SHOW_PATTERNS):
+        content_type = 'tvshow'
+    elif any(pattern.search(name) for pattern in MOVIE_PATTERNS):
+        content_type = 'movie'
+
+    return (
+        ('quality', quality),
+        ('season', season),
+        ('episode', episode),
+        ('year', year),
+        ('complete', complete),
+        ('contentType', content_type),
+    )
+
+def parse_release_name(name):
+    """Extract quality, season, episode, year and complete-season info from a torrent name
+
+    Uses the same rules as extractMetadata() in static/js/app.js, so the client
+    can use the result directly. Parses are memoized by name.
+
+    Args:
+        name (str): The torrent / release name
+
+    Returns:
+        dict: quality, season, episode, year, complete (season number or 'All') and
+              contentType ('movie', 'tvshow' or None)
+    """
+    return dict(_parse(name or ''))
+
+def get_cache_info():
+    """Get hit/miss counts of the parse cache"""
+    info = _parse.cache_info()
+    return {'hits': info.hits, 'misses': info.misses, 'size': info.currsize, 'max_size': info.maxsize}
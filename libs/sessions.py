@@ -0,0 +1,294 @@
+import os
+import time
+import pickle
+import sqlite3
+import secrets
+import threading
+from collections import OrderedDict
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import Signer, BadSignature
+from werkzeug.datastructures import CallbackDict
+import libs.config as config
+
+# Default session settings (can be overridden with environment variables)
+# SESSION_BACKEND: 'sqlite' (this module) or 'filesystem' (Flask-Session)
+# SESSION_CACHE_SIZE: maximum number of sessions kept in memory per process
+# SESSION_SWEEP_INTERVAL: seconds between removing expired sessions from the database
+DEFAULT_BACKEND = 'sqlite'
+DEFAULT_CACHE_SIZE = 1000
+DEFAULT_SWEEP_INTERVAL = 60 * 60  # 1 hour
+
+def get_session_settings():
+    """Get session store settings from the environment"""
+    return {
+        'backend': os.environ.get('SESSION_BACKEND', DEFAULT_BACKEND).lower(),
+        'cache_size': int(os.environ.get('SESSION_CACHE_SIZE', DEFAULT_CACHE_SIZE)),
+        'sweep_interval': int(os.environ.get('SESSION_SWEEP_INTERVAL', DEFAULT_SWEEP_INTERVAL)),
+    }
+
+class ServerSession(CallbackDict, SessionMixin):
+    """Session whose data lives on the server, the cookie only holds its signed id"""
+
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+
+        CallbackDict.__init__(self, initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+
+class SQLiteSessionStore:
+    """SQLite session store with an in-process LRU cache
+
+    Every write gives the session a new random version. A cached session is only
+    used if its version still matches the database (an indexed lookup of one
+    column), so several worker processes can share one store and a write by one
+    of them only invalidates that session in the others.
+    """
+
+    def __init__(self, path=None, max_cached=DEFAULT_CACHE_SIZE):
+        self.path = path or config.SESSIONS_DB_PATH
+        self.max_cached = max_cached
+        self._cache = OrderedDict()  # sid -> (data, expires_at, version), least recently used first
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'writes': 0, 'deletes': 0, 'invalidations': 0, 'swept': 0}
+
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        # One connection shared by all threads (guarded by _lock)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (sid TEXT PRIMARY KEY, data BLOB NOT NULL, expires_at REAL NOT NULL, version INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_expires_at ON sessions (expires_at)")
+        self._add_version_column()
+        self._conn.commit()
+
+    def _add_version_column(self):
+        """Add the version column to databases created before it existed"""
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(sessions)")]
+        if 'version' in columns:
+            return
+        try:
+            self._conn.execute("ALTER TABLE sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        except sqlite3.OperationalError:
+            pass  # Added by another worker in the meantime
+
+    def _cache_put(self, sid, data, expires_at, version):
+        """Cache a session, evicting the least recently used ones (call with _lock held)"""
+        self._cache[sid] = (data, expires_at, version)
+        self._cache.move_to_end(sid)
+        while len(self._cache) > self.max_cached:
+            self._cache.popitem(last=False)
+
+    def get(self, sid):
+        """Load a session
+
+        Args:
+            sid (str): The session id
+
+        Returns:
+            dict: A copy of the session data, or None if it doesn't exist or has expired
+        """
+        now = time.time()
+
+        with self._lock:
+            cached = self._cache.get(sid)
+            if cached is not None:
+                # Check that no other worker changed (or deleted) the session since it was cached
+                row = self._conn.execute("SELECT version FROM sessions WHERE sid = ?", (sid,)).fetchone()
+                if row is not None and row[0] == cached[2]:
+                    self._cache.move_to_end(sid)
+                    self._stats['hits'] += 1
+                    data, expires_at, _ = cached
+                else:
+                    del self._cache[sid]
+                    self._stats['invalidations'] += 1
+                    cached = None
+
+            if cached is None:
+                self._stats['misses'] += 1
+                row = self._conn.execute(
+                    "SELECT data, expires_at, version FROM sessions WHERE sid = ?", (sid,)
+                ).fetchone()
+                if row is None:
+                    return None
+                data, expires_at = pickle.loads(row[0]), row[1]
+                self._cache_put(sid, data, expires_at, row[2])
+
+        if expires_at <= now:
+            return None
+        return dict(data)
+
+    def set(self, sid, data, expires_at):
+        """Store a session
+
+        Args:
+            sid (str): The session id
+            data (dict): The session data
+            expires_at (float): Unix time after which the session is discarded
+        """
+        data = dict(data)
+        blob = pickle.dumps(data)
+        version = secrets.randbits(62)
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (sid, data, expires_at, version) VALUES (?, ?, ?, ?)",
+                (sid, blob, expires_at, version)
+            )
+            self._conn.commit()
+            self._cache_put(sid, data, expires_at, version)
+            self._stats['writes'] += 1
+
+    def delete(self, sid):
+        """Delete a session"""
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+            self._conn.commit()
+            self._cache.pop(sid, None)
+            self._stats['deletes'] += 1
+
+    def sweep(self):
+        """Remove expired sessions
+
+        Returns:
+            int: Number of sessions removed from the database
+        """
+        now = time.time()
+
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,)).rowcount
+            self._conn.commit()
+            for sid in [sid for sid, (_, expires_at, _) in self._cache.items() if expires_at <= now]:
+                del self._cache[sid]
+            self._stats['swept'] += removed
+
+        if removed > 0:
+            print(f"[INFO] Removed {removed} expired sessions")
+        return removed
+
+    def get_stats(self):
+        """Get store metrics
+
+        Returns:
+            dict: Counters, cache size, stored sessions and the cache hit rate
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['cached'] = len(self._cache)
+            stats['max_cached'] = self.max_cached
+            stats['stored'] = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
+
+class StoreSessionInterface(SessionInterface):
+    """Flask session interface keeping session data in a server-side store
+
+    The cookie only carries the session id, signed with the app's secret key.
+    Sessions are written only when they were modified.
+    """
+
+    serializer = None  # Data is never put in the cookie
+
+    def __init__(self, store):
+        self.store = store
+
+    def _get_signer(self, app):
+        return Signer(app.secret_key, salt='server-session', key_derivation='hmac')
+
+    def open_session(self, app, request):
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie:
+            try:
+                sid = self._get_signer(app).unsign(cookie).decode('utf-8')
+            except BadSignature:
+                sid = None
+
+            if sid:
+                data = self.store.get(sid)
+                if data is not None:
+                    return ServerSession(data, sid=sid)
+
+        return ServerSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        # The session was emptied (e.g. on logout), remove it
+        if not session:
+            if session.modified:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if not session.modified:
+            return
+
+        self.store.set(session.sid, session, time.time() + app.permanent_session_lifetime.total_seconds())
+
+        response.set_cookie(
+            name,
+            self._get_signer(app).sign(session.sid).decode('utf-8'),
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+
+# Shared store (created by init_app) and its sweeper thread
+_store = None
+_sweeper_thread = None
+_store_lock = threading.Lock()
+
+def get_store():
+    """Get the shared session store, or None when the SQLite backend isn't in use"""
+    return _store
+
+def _sweep_expired_sessions(interval):
+    """Periodically remove expired sessions (runs in a background thread)"""
+    while True:
+        time.sleep(interval)
+        try:
+            _store.sweep()
+        except Exception as e:
+            print(f"[ERROR] Failed to sweep expired sessions: {e}")
+
+def init_app(app):
+    """Install the SQLite session store on a Flask app
+
+    Args:
+        app (Flask): The application
+
+    Returns:
+        SQLiteSessionStore: The store in use
+    """
+    global _store, _sweeper_thread
+    session_settings = get_session_settings()
+
+    with _store_lock:
+        if _store is None:
+            _store = SQLiteSessionStore(max_cached=session_settings['cache_size'])
+            print(f"[INFO] Using SQLite session store at {_store.path}")
+
+        if _sweeper_thread is None or not _sweeper_thread.is_alive():
+            _sweeper_thread = threading.Thread(
+                target=_sweep_expired_sessions,
+                args=(session_settings['sweep_interval'],),
+                name="session-sweeper",
+                daemon=True
+            )
+            _sweeper_thread.start()
+
+    app.session_interface = StoreSessionInterface(_store)
+    return _store
@@ -4,19 +4,26 @@ import dotenv
 from flask import session
 import libs.config as config
 
-# Path to the settings database file
-SETTINGS_DB_PATH = config.SETTINGS_DB_PATH
+# Modification time of the settings database when it was last applied to this process
+_applied_mtime = None
+
+def _get_mtime():
+    """Return the modification time of the settings database or None if it doesn't exist"""
+    try:
+        return os.stat(config.SETTINGS_DB_PATH).st_mtime_ns
+    except OSError:
+        return None
 
 def init_settings_db():
     """Initialize the settings database if it doesn't exist"""
     # Ensure the directory exists if path contains directories
-    if os.path.dirname(SETTINGS_DB_PATH):
-        os.makedirs(os.path.dirname(SETTINGS_DB_PATH), exist_ok=True)
+    if os.path.dirname(config.SETTINGS_DB_PATH):
+        os.makedirs(os.path.dirname(config.SETTINGS_DB_PATH), exist_ok=True)
 
-    if not os.path.exists(SETTINGS_DB_PATH):
-        with open(SETTINGS_DB_PATH, 'w') as f:
+    if not os.path.exists(config.SETTINGS_DB_PATH):
+        with open(config.SETTINGS_DB_PATH, 'w') as f:
             json.dump({"settings": {}}, f)
-        print("[INFO] Created new settings database at", SETTINGS_DB_PATH)
+        print("[INFO] Created new settings database at", config.SETTINGS_DB_PATH)
 
 def get_settings_from_env():
     """Get all settings from the .env file"""
@@ -33,6 +40,20 @@ def get_settings_from_env():
 
         # TMDB API settings
         "tmdb-api-key": os.environ.get("tmdb-api-key", ""),
+        "tmdb-search-mode": os.environ.get("tmdb-search-mode", "multi"),  # 'multi' or 'separate'
+        "tmdb-search-ttl": int(os.environ.get("tmdb-search-ttl", 60 * 60)),  # 1 hour in seconds
+        "tmdb-details-ttl": int(os.environ.get("tmdb-details-ttl", 7 * 24 * 60 * 60)),  # 7 days in seconds
+        "tmdb-stale-ttl": int(os.environ.get("tmdb-stale-ttl", 24 * 60 * 60)),  # 1 day in seconds
+        "tmdb-cache-size": int(os.environ.get("tmdb-cache-size", 1000)),
+        "tmdb-cache-persist": os.environ.get("tmdb-cache-persist", "true").lower() == "true",
+        "tmdb-disk-cache-size": int(os.environ.get("tmdb-disk-cache-size", 10000)),
+        "tmdb-rate-limit": int(os.environ.get("tmdb-rate-limit", 40)),  # requests per second
+        "tmdb-max-workers": int(os.environ.get("tmdb-max-workers", 8)),
+        "image-cache-size": int(os.environ.get("image-cache-size", 512)),  # megabytes
+        "image-proxy-concurrency": int(os.environ.get("image-proxy-concurrency", 8)),
+        "image-webp": os.environ.get("image-webp", "true").lower() == "true",
+        "image-prefetch-count": int(os.environ.get("image-prefetch-count", 20)),
+        "image-prefetch-workers": int(os.environ.get("image-prefetch-workers", 4)),
 
         # WebAuthn/Passkey settings
         "RP_ID": os.environ.get("RP_ID", "localhost"),
@@ -43,6 +64,17 @@ def get_settings_from_env():
         # Content filtering settings
         "hide-adult-content": os.environ.get("hide-adult-content", "true").lower() == "true",
 
+        # Torrent search settings
+        "search-cache-ttl": int(os.environ.get("search-cache-ttl", 300)),
+        "search-cache-size": int(os.environ.get("search-cache-size", 100)),
+        "provider-timeout": float(os.environ.get("provider-timeout", 10)),
+        "provider-failure-threshold": int(os.environ.get("provider-failure-threshold", 3)),
+        "provider-open-seconds": float(os.environ.get("provider-open-seconds", 60)),
+        "provider-hedge-delay": float(os.environ.get("provider-hedge-delay", 1.5)),
+        "provider-rate-limit": float(os.environ.get("provider-rate-limit", 5)),  # requests per second per provider
+        "piratebay-mirrors": os.environ.get("piratebay-mirrors", "https://apibay.org"),
+        "yts-mirrors": os.environ.get("yts-mirrors", "https://yts.mx/api/v2"),
+
         # Data directory settings
         "DATA_DIR": os.environ.get("DATA_DIR", "data"),
 
@@ -64,12 +96,12 @@ def get_settings_from_env():
 
 def get_overridden_settings():
     """Get all overridden settings from the settings database"""
-    if not os.path.exists(SETTINGS_DB_PATH):
+    if not os.path.exists(config.SETTINGS_DB_PATH):
         print(f"[INFO] Settings file does not exist, initializing")
         init_settings_db()
 
     try:
-        with open(SETTINGS_DB_PATH, 'r') as f:
+        with open(config.SETTINGS_DB_PATH, 'r') as f:
             data = json.load(f)
             return data.get("settings", {})
     except Exception as e:
@@ -79,12 +111,12 @@ def get_overridden_settings():
 def save_settings(settings_data):
     """Save settings data to the database"""
     # Ensure the settings database exists
-    if not os.path.exists(SETTINGS_DB_PATH):
+    if not os.path.exists(config.SETTINGS_DB_PATH):
         init_settings_db()
 
     # Load current settings
     try:
-        with open(SETTINGS_DB_PATH, 'r') as f:
+        with open(config.SETTINGS_DB_PATH, 'r') as f:
             data = json.load(f)
     except Exception:
         data = {"settings": {}}
@@ -93,7 +125,7 @@ def save_settings(settings_data):
     data["settings"] = settings_data
 
     # Save settings
-    with open(SETTINGS_DB_PATH, 'w') as f:
+    with open(config.SETTINGS_DB_PATH, 'w') as f:
         json.dump(data, f, indent=2)
 
     return True
@@ -126,6 +158,9 @@ def update_settings(new_settings):
 
 def apply_settings_to_env():
     """Apply effective settings to environment variables"""
+    global _applied_mtime
+    _applied_mtime = _get_mtime()
+
     # Get effective settings
     effective_settings = get_effective_settings()
 
@@ -137,3 +172,15 @@ def apply_settings_to_env():
             os.environ[key] = str(value)
 
     return True
+
+def apply_settings_if_changed():
+    """Apply settings saved by another worker process
+
+    Returns:
+        bool: Whether the settings changed since this process last applied them
+    """
+    if _get_mtime() == _applied_mtime:
+        return False
+
+    apply_settings_to_env()
+    return True
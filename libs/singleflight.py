@@ -0,0 +1,105 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+
+class _Call:
+    """A call in flight, its outcome is set on the future"""
+
+    def __init__(self):
+        self.future = Future()
+        self.shared = False
+
+class SingleFlight:
+    """Thread-safe duplicate call suppression
+
+    While a call for a key is running, other callers with the same key wait for it
+    and get its result (or exception) instead of making the call again. Threads use
+    do(), coroutines ado(); both wait for the same calls.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0  # Callers that got another caller's result
+
+    def _join(self, key):
+        """Get the running call for a key, or start one
+
+        Returns:
+            tuple: (call, leader), leader is True if the caller has to make the call
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                return call, True
+
+            call.shared = True
+            self.coalesced += 1
+            return call, False
+
+    def _finish(self, key, call, result=None, error=None):
+        """Hand the outcome of a call to its waiters
+
+        Returns:
+            bool: Whether other callers got the result too
+        """
+        # No caller can join once the key is removed, so call.shared is final
+        with self._lock:
+            del self._calls[key]
+            shared = call.shared
+
+        if error is not None:
+            call.future.set_exception(error)
+        else:
+            call.future.set_result(result)
+        return shared
+
+    def do(self, key, func, *args):
+        """Call a function, unless a call with the same key is already running
+
+        Args:
+            key (hashable): Identifies identical calls
+            func (callable): The function
+            *args: Its arguments
+
+        Returns:
+            tuple: (result, shared), shared is True if several callers got the same
+                   result object (copy it before modifying it)
+        """
+        call, leader = self._join(key)
+        if not leader:
+            return call.future.result(), True
+
+        try:
+            result = func(*args)
+        except BaseException as e:
+            self._finish(key, call, error=e)
+            raise
+        return result, self._finish(key, call, result=result)
+
+    async def ado(self, key, func, *args):
+        """Await a coroutine function, unless a call with the same key is already running
+
+        Waiting for a call started by another thread doesn't block the event loop.
+
+        Args:
+            key (hashable): Identifies identical calls
+            func (callable): The coroutine function
+            *args: Its arguments
+
+        Returns:
+            tuple: (result, shared), like do()
+        """
+        call, leader = self._join(key)
+        if not leader:
+            return await asyncio.wrap_future(call.future), True
+
+        try:
+            result = await func(*args)
+        except BaseException as e:
+            # Also on cancellation, the waiters mustn't wait forever
+            self._finish(key, call, error=e)
+            raise
+        return result, self._finish(key, call, result=result)
@@ -0,0 +1,298 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+import libs.config as config
+
+# Default cache settings (can be overridden with environment variables / server settings)
+# tmdb-search-ttl: seconds a search response is considered fresh
+# tmdb-details-ttl: seconds a details response is considered fresh
+# tmdb-stale-ttl: seconds an expired response may still be served while it is refreshed
+# tmdb-cache-size: maximum number of responses kept in memory
+# tmdb-cache-persist: whether responses are also persisted under DATA_DIR
+# tmdb-disk-cache-size: maximum number of responses persisted on disk
+DEFAULT_SEARCH_TTL = 60 * 60  # 1 hour
+DEFAULT_DETAILS_TTL = 7 * 24 * 60 * 60  # 7 days
+DEFAULT_STALE_TTL = 24 * 60 * 60  # 1 day
+DEFAULT_CACHE_SIZE = 1000
+DEFAULT_DISK_CACHE_SIZE = 10000
+
+# Persisted entries are pruned every this many writes (and on the first write)
+DISK_PRUNE_EVERY = 100
+
+# Cache entry states returned by TMDBCache.get
+FRESH = 'fresh'
+STALE = 'stale'
+MISS = 'miss'
+
+def get_cache_settings():
+    """Get TMDB cache settings from the environment"""
+    return {
+        'search_ttl': int(os.environ.get('tmdb-search-ttl', DEFAULT_SEARCH_TTL)),
+        'details_ttl': int(os.environ.get('tmdb-details-ttl', DEFAULT_DETAILS_TTL)),
+        'stale_ttl': int(os.environ.get('tmdb-stale-ttl', DEFAULT_STALE_TTL)),
+        'max_entries': int(os.environ.get('tmdb-cache-size', DEFAULT_CACHE_SIZE)),
+        'persist': os.environ.get('tmdb-cache-persist', 'true').lower() == 'true',
+        'max_disk_entries': int(os.environ.get('tmdb-disk-cache-size', DEFAULT_DISK_CACHE_SIZE)),
+    }
+
+class TMDBCache:
+    """LRU cache for TMDB API responses with optional on-disk persistence
+
+    Every entry has a fresh period (its TTL) followed by a stale period during
+    which it can still be served while a refresh runs in the background.
+
+    A persisted entry's file modification time is set to the end of its stale
+    period, so pruning the disk cache only needs to stat the files: files past
+    their mtime are deleted, then the ones expiring soonest until at most
+    max_disk_entries are left.
+    """
+
+    def __init__(self, max_entries=DEFAULT_CACHE_SIZE, stale_ttl=DEFAULT_STALE_TTL, persist=True, cache_dir=None, max_disk_entries=DEFAULT_DISK_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.stale_ttl = stale_ttl
+        self.persist = persist
+        self.cache_dir = cache_dir or os.path.join(config.DATA_DIR, 'tmdb_cache')
+        self._disk_writes = 0
+        self._entries = OrderedDict()  # key -> {'value', 'expires_at', 'stale_until'}
+        self._refreshing = set()  # keys with a background refresh in flight
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'stale_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'refreshes': 0,
+            'refresh_errors': 0,
+            'evictions': 0,
+            'disk_evictions': 0,
+        }
+
+    def _disk_path(self, key):
+        """Get the on-disk path for a cache key"""
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.json")
+
+    def _read_disk(self, key):
+        """Load an entry from disk, or None if it isn't persisted"""
+        if not self.persist:
+            return None
+
+        try:
+            with open(self._disk_path(key), 'r') as f:
+                entry = json.load(f)
+            # Guard against (very unlikely) hash collisions
+            if entry.get('key') != key:
+                return None
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key, entry):
+        """Persist an entry to disk"""
+        if not self.persist:
+            return
+
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({'key': key, **entry}, f)
+            # The mtime records when the entry can be deleted (see prune_disk)
+            os.utime(tmp_path, (time.time(), entry['stale_until']))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[ERROR] Failed to persist TMDB cache entry: {e}")
+            return
+
+        with self._lock:
+            self._disk_writes += 1
+            prune = self._disk_writes % DISK_PRUNE_EVERY == 1
+        if prune:
+            self.prune_disk()
+
+    def prune_disk(self):
+        """Delete persisted entries past their stale period and the ones expiring soonest above max_disk_entries
+
+        Returns:
+            int: Number of deleted entries
+        """
+        now = time.time()
+        files = []  # (stale_until, path)
+
+        try:
+            for directory in os.scandir(self.cache_dir):
+                if not directory.is_dir():
+                    continue
+                for item in os.scandir(directory.path):
+                    if item.name.endswith('.json'):
+                        try:
+                            files.append((item.stat().st_mtime, item.path))
+                        except OSError:
+                            pass  # Deleted by another worker
+        except OSError:
+            return 0
+
+        files.sort()
+        # Everything past its stale period, then the oldest entries above the limit
+        expired = sum(1 for stale_until, _ in files if stale_until <= now)
+        remove = max(expired, len(files) - max(self.max_disk_entries, 0))
+
+        removed = 0
+        for _, path in files[:remove]:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass  # Deleted by another worker
+
+        if removed:
+            with self._lock:
+                self._stats['disk_evictions'] += removed
+            print(f"[INFO] Removed {removed} TMDB cache entries from disk")
+        return removed
+
+    def _store(self, key, entry):
+        """Store an entry in memory, evicting the least recently used entries"""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def get(self, key):
+        """Look up a cached response
+
+        Args:
+            key (str): The cache key
+
+        Returns:
+            tuple: (value, state) where state is FRESH, STALE or MISS
+        """
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+        # Read persisted entries without holding the lock, other lookups don't wait for the disk
+        from_disk = False
+        if entry is None:
+            entry = self._read_disk(key)
+            from_disk = entry is not None
+
+        with self._lock:
+            if entry is None or entry['stale_until'] <= now:
+                self._stats['misses'] += 1
+                return None, MISS
+
+            if from_disk:
+                self._stats['disk_hits'] += 1
+            self._store(key, entry)
+
+            if entry['expires_at'] > now:
+                self._stats['hits'] += 1
+                return entry['value'], FRESH
+
+            self._stats['stale_hits'] += 1
+            return entry['value'], STALE
+
+    def set(self, key, value, ttl):
+        """Store a response in the cache
+
+        Args:
+            key (str): The cache key
+            value: The JSON-serializable response
+            ttl (int): Seconds the response is considered fresh
+        """
+        now = time.time()
+        entry = {
+            'value': value,
+            'expires_at': now + ttl,
+            'stale_until': now + ttl + self.stale_ttl,
+        }
+
+        with self._lock:
+            self._store(key, entry)
+        self._write_disk(key, entry)
+
+    def refresh_async(self, key, fetch, ttl):
+        """Refresh a stale entry in the background (at most one refresh per key)
+
+        Args:
+            key (str): The cache key
+            fetch (callable): Function returning the fresh response
+            ttl (int): Seconds the refreshed response is considered fresh
+        """
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self.set(key, fetch(), ttl)
+                with self._lock:
+                    self._stats['refreshes'] += 1
+            except Exception as e:
+                print(f"[ERROR] Failed to refresh TMDB cache entry: {e}")
+                with self._lock:
+                    self._stats['refresh_errors'] += 1
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name="tmdb-cache-refresh", daemon=True).start()
+
+    def clear(self):
+        """Remove all entries from memory (persisted entries are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        """Get cache metrics
+
+        Returns:
+            dict: Counters plus the overall hit rate
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['max_entries'] = self.max_entries
+            stats['max_disk_entries'] = self.max_disk_entries
+
+        lookups = stats['hits'] + stats['stale_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['hits'] + stats['stale_hits']) / lookups, 4) if lookups else 0.0
+        return stats
+
+# Shared cache instance (kept across TMDBClient re-initializations)
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache():
+    """Get the shared TMDB cache, creating it on first use
+
+    Settings are re-read on every call so changes made through the server
+    settings apply the next time the TMDB client is initialized.
+    """
+    global _cache
+    cache_settings = get_cache_settings()
+
+    with _cache_lock:
+        if _cache is None:
+            _cache = TMDBCache(
+                max_entries=cache_settings['max_entries'],
+                stale_ttl=cache_settings['stale_ttl'],
+                persist=cache_settings['persist'],
+                max_disk_entries=cache_settings['max_disk_entries'],
+            )
+            print(f"[INFO] TMDB cache initialized (max_entries={cache_settings['max_entries']}, persist={cache_settings['persist']})")
+        else:
+            _cache.max_entries = cache_settings['max_entries']
+            _cache.stale_ttl = cache_settings['stale_ttl']
+            _cache.persist = cache_settings['persist']
+            _cache.max_disk_entries = cache_settings['max_disk_entries']
+        return _cache
@@ -1,15 +1,131 @@
 import os
+import copy
 import requests
 import json
 import urllib.parse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import libs.tmdbcache as tmdbcache
+from libs.ratelimit import TokenBucket
+
+# TMDB allows roughly 50 requests per second per IP, stay a little below that
+# tmdb-rate-limit: requests per second shared by all TMDB calls
+# tmdb-max-workers: number of TMDB calls that may run in parallel
+DEFAULT_RATE_LIMIT = 40
+DEFAULT_MAX_WORKERS = 8
+
+# Shared executor and rate limiter for all TMDB requests (created on first use)
+_executor = None
+_executor_workers = None
+_rate_limiter = None
+_executor_lock = threading.Lock()
+
+def _get_max_workers():
+    """Get the number of TMDB calls that may run in parallel (tmdb-max-workers)"""
+    return max(1, int(os.environ.get('tmdb-max-workers', DEFAULT_MAX_WORKERS)))
+
+def _get_rate_limit():
+    """Get the TMDB requests allowed per second (tmdb-rate-limit)"""
+    return float(os.environ.get('tmdb-rate-limit', DEFAULT_RATE_LIMIT))
+
+def get_executor():
+    """Get the shared executor used to run independent TMDB calls in parallel"""
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is None:
+            _executor_workers = _get_max_workers()
+            _executor = ThreadPoolExecutor(max_workers=_executor_workers, thread_name_prefix="tmdb")
+        return _executor
+
+def get_rate_limiter():
+    """Get the rate limiter shared by all TMDB requests"""
+    global _rate_limiter
+    with _executor_lock:
+        if _rate_limiter is None:
+            _rate_limiter = TokenBucket(_get_rate_limit())
+        return _rate_limiter
+
+def apply_settings():
+    """Apply changed tmdb-rate-limit / tmdb-max-workers settings to the shared executor and rate limiter
+
+    Called whenever this process picks up new settings. Nothing is created here,
+    the getters still create them on first use.
+    """
+    global _executor, _executor_workers
+    with _executor_lock:
+        # The limiter keeps its tokens, only the rate changes
+        rate = _get_rate_limit()
+        if _rate_limiter is not None and _rate_limiter.rate != rate:
+            _rate_limiter.set_rate(rate)
+            print(f"[INFO] TMDB rate limit set to {rate:g} requests per second")
+
+        # A thread pool can't be resized, so swap in a new one. The old one isn't shut
+        # down: callers that already got it can still submit to it, and its idle
+        # threads exit once it is garbage collected.
+        max_workers = _get_max_workers()
+        if _executor is not None and _executor_workers != max_workers:
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tmdb")
+            _executor_workers = max_workers
+            print(f"[INFO] TMDB executor resized to {max_workers} workers")
 
 class TMDBClient:
     def __init__(self):
         self.api_key = os.environ.get('tmdb-api-key', '')
         self.base_url = "https://api.themoviedb.org/3"
         self.image_base_url = "/api/tmdb/image"  # Use our proxy route instead of direct TMDB URL
+        self.cache = tmdbcache.get_cache()
+        self.cache_settings = tmdbcache.get_cache_settings()
         print(f"[INFO] TMDB Client initialized with API key: {'*****' + self.api_key[-4:] if self.api_key else 'Not set'}")
 
+    def _fetch(self, path, params):
+        """Fetch a TMDB endpoint and return the decoded JSON response"""
+        endpoint = f"{self.base_url}{path}?api_key={self.api_key}"
+        if params:
+            endpoint += f"&{urllib.parse.urlencode(params)}"
+        print(f"[INFO] Requesting TMDB endpoint: {endpoint.replace(self.api_key, '*****')}")
+        get_rate_limiter().acquire()
+        response = requests.get(endpoint)
+        response.raise_for_status()
+        return response.json()
+
+    def _get_json(self, path, params, ttl):
+        """Get a TMDB endpoint through the response cache
+
+        Fresh responses are served from the cache, stale ones are served while
+        being refreshed in the background and misses are fetched from TMDB.
+
+        Args:
+            path (str): The endpoint path (e.g. '/search/movie')
+            params (dict): Query parameters (without the API key)
+            ttl (int): Seconds the response is considered fresh
+
+        Returns:
+            dict: A copy of the JSON response that the caller may modify
+        """
+        key = f"{path}?{urllib.parse.urlencode(sorted(params.items()))}"
+        value, state = self.cache.get(key)
+
+        if state == tmdbcache.STALE:
+            self.cache.refresh_async(key, lambda: self._fetch(path, params), ttl)
+
+        if state == tmdbcache.MISS:
+            value = self._fetch(path, params)
+            self.cache.set(key, value, ttl)
+
+        return copy.deepcopy(value)
+
+    def run_parallel(self, calls):
+        """Run independent TMDB calls in parallel on the shared executor
+
+        Args:
+            calls (list): List of (function, args) tuples
+
+        Returns:
+            list: The results in the same order as the calls (exceptions are re-raised)
+        """
+        futures = [get_executor().submit(func, *args) for func, args in calls]
+        return [future.result() for future in futures]
+
     def search(self, query, page=1, media_type='all'):
         """Search for movies and TV shows on TMDB
 
@@ -26,26 +142,27 @@ class TMDBClient:
             movie_results = []
             tv_results = []
 
-            # Search for movies if media_type is 'all' or 'movie'
+            # Search movies and/or TV shows depending on media_type (in parallel for 'all')
+            calls = []
+            if media_type in ['all', 'movie']:
+                calls.append((self._get_json, ('/search/movie', {'query': query, 'page': page}, self.cache_settings['search_ttl'])))
+            if media_type in ['all', 'tv']:
+                calls.append((self._get_json, ('/search/tv', {'query': query, 'page': page}, self.cache_settings['search_ttl'])))
+            responses = self.run_parallel(calls)
+            responses_by_type = {}
+
             if media_type in ['all', 'movie']:
-                movie_endpoint = f"{self.base_url}/search/movie?api_key={self.api_key}&query={urllib.parse.quote(query)}&page={page}"
-                print(f"[INFO] Searching TMDB movies with endpoint: {movie_endpoint.replace(self.api_key, '*****')}")
-                movie_response = requests.get(movie_endpoint)
-                movie_response.raise_for_status()
-                movie_results = movie_response.json().get('results', [])
+                responses_by_type['movie'] = responses.pop(0)
+                movie_results = responses_by_type['movie'].get('results', [])
                 print(f"[INFO] Found {len(movie_results)} movie results")
 
                 # Add media_type to movie results
                 for result in movie_results:
                     result['media_type'] = 'movie'
 
-            # Search for TV shows if media_type is 'all' or 'tv'
             if media_type in ['all', 'tv']:
-                tv_endpoint = f"{self.base_url}/search/tv?api_key={self.api_key}&query={urllib.parse.quote(query)}&page={page}"
-                print(f"[INFO] Searching TMDB TV shows with endpoint: {tv_endpoint.replace(self.api_key, '*****')}")
-                tv_response = requests.get(tv_endpoint)
-                tv_response.raise_for_status()
-                tv_results = tv_response.json().get('results', [])
+                responses_by_type['tv'] = responses.pop(0)
+                tv_results = responses_by_type['tv'].get('results', [])
                 print(f"[INFO] Found {len(tv_results)} TV show results")
 
                 # Add media_type to TV results
@@ -59,41 +176,94 @@ class TMDBClient:
             combined_results = movie_results + tv_results
             combined_results.sort(key=lambda x: x.get('popularity', 0), reverse=True)
 
-            # Process results to add image URLs and format data
-            processed_results = []
-            for result in combined_results:
-                # Skip items without a title or with adult content
-                if not result.get('title') or result.get('adult', False):
-                    continue
+            total_pages = max([response.get('total_pages', 1) for response in responses_by_type.values()] or [1])
 
-                # Add full image URLs
-                if result.get('poster_path'):
-                    result['poster_url'] = f"{self.image_base_url}{result['poster_path']}"
-                    result['has_poster'] = True
-                    print(f"[DEBUG] Poster URL for {result.get('title')}: {result['poster_url']}")
-                else:
-                    result['poster_url'] = ''
-                    result['has_poster'] = False
-                    print(f"[DEBUG] No poster for {result.get('title')}")
-
-                if result.get('backdrop_path'):
-                    result['backdrop_url'] = f"{self.image_base_url}{result['backdrop_path']}"
-
-                # Add year from release_date or first_air_date
-                year = None
-                if result.get('release_date') and len(result['release_date']) >= 4:
-                    year = result['release_date'][:4]
-                elif result.get('first_air_date') and len(result['first_air_date']) >= 4:
-                    year = result['first_air_date'][:4]
-                result['year'] = year
-
-                processed_results.append(result)
-
-            return {"results": processed_results}
+            return {"results": self._process_results(combined_results), "page": page, "total_pages": total_pages}
         except requests.exceptions.RequestException as e:
             print(f"[ERROR] TMDB search error: {e}")
             return {"results": []}
 
+    def search_multi(self, query, page=1, media_type='all', prefetch=True):
+        """Search for movies and TV shows with a single /search/multi request
+
+        Args:
+            query (str): The search query
+            page (int, optional): Page number for results. Defaults to 1.
+            media_type (str, optional): Filter by media type - 'all', 'movie', or 'tv'. Defaults to 'all'.
+            prefetch (bool, optional): Warm the cache with the next page in the background. Defaults to True.
+        """
+        if not self.api_key:
+            print("[ERROR] TMDB API key not set")
+            return {"results": []}
+
+        try:
+            ttl = self.cache_settings['search_ttl']
+            response = self._get_json('/search/multi', {'query': query, 'page': page}, ttl)
+            total_pages = response.get('total_pages', 1)
+
+            # Fetch the next page into the cache so "load more" doesn't wait on TMDB
+            if prefetch and page < total_pages:
+                get_executor().submit(self._prefetch, '/search/multi', {'query': query, 'page': page + 1}, ttl)
+
+            # /search/multi also returns people, only keep movies and TV shows
+            results = []
+            for result in response.get('results', []):
+                if result.get('media_type') not in ['movie', 'tv']:
+                    continue
+                if media_type != 'all' and result['media_type'] != media_type:
+                    continue
+
+                # Rename name to title for consistency
+                if result['media_type'] == 'tv' and 'name' in result:
+                    result['title'] = result['name']
+                results.append(result)
+
+            print(f"[INFO] Found {len(results)} multi search results")
+            results.sort(key=lambda x: x.get('popularity', 0), reverse=True)
+
+            return {"results": self._process_results(results), "page": page, "total_pages": total_pages}
+        except requests.exceptions.RequestException as e:
+            print(f"[ERROR] TMDB multi search error: {e}")
+            return {"results": []}
+
+    def _prefetch(self, path, params, ttl):
+        """Load a TMDB endpoint into the cache, ignoring errors"""
+        try:
+            self._get_json(path, params, ttl)
+        except requests.exceptions.RequestException as e:
+            print(f"[WARNING] TMDB prefetch failed: {e}")
+
+    def _process_results(self, results):
+        """Add image URLs and years to search results, dropping unusable ones"""
+        processed_results = []
+        for result in results:
+            # Skip items without a title or with adult content
+            if not result.get('title') or result.get('adult', False):
+                continue
+
+            # Add full image URLs (search results are shown as small cards)
+            if result.get('poster_path'):
+                result['poster_url'] = f"{self.image_base_url}{result['poster_path']}?size=card"
+                result['has_poster'] = True
+            else:
+                result['poster_url'] = ''
+                result['has_poster'] = False
+
+            if result.get('backdrop_path'):
+                result['backdrop_url'] = f"{self.image_base_url}{result['backdrop_path']}?size=backdrop"
+
+            # Add year from release_date or first_air_date
+            year = None
+            if result.get('release_date') and len(result['release_date']) >= 4:
+                year = result['release_date'][:4]
+            elif result.get('first_air_date') and len(result['first_air_date']) >= 4:
+                year = result['first_air_date'][:4]
+            result['year'] = year
+
+            processed_results.append(result)
+
+        return processed_results
+
     def get_details(self, media_id, media_type):
         """Get detailed information for a movie or TV show"""
         if not self.api_key:
@@ -102,10 +272,7 @@ class TMDBClient:
 
         try:
             # Get details based on media type
-            endpoint = f"{self.base_url}/{media_type}/{media_id}?api_key={self.api_key}&append_to_response=credits,videos"
-            response = requests.get(endpoint)
-            response.raise_for_status()
-            details = response.json()
+            details = self._get_json(f"/{media_type}/{media_id}", {'append_to_response': 'credits,videos'}, self.cache_settings['details_ttl'])
 
             # Process details
             if media_type == 'tv':
@@ -122,7 +289,7 @@ class TMDBClient:
                 details['has_poster'] = False
 
             if details.get('backdrop_path'):
-                details['backdrop_url'] = f"{self.image_base_url}{details['backdrop_path']}"
+                details['backdrop_url'] = f"{self.image_base_url}{details['backdrop_path']}?size=backdrop"
 
             # Extract year
             year = None
@@ -1,17 +1,97 @@
 import os
 import jwt
+import json
 import time
+import hashlib
 import secrets
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
 from flask import request, jsonify
 import libs.settings as settings
+import libs.config as config
 
-# Default token settings
-JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', secrets.token_hex(32))
+try:
+    import fcntl
+except ImportError:  # Not available on Windows, fall back to the in-process lock
+    fcntl = None
 
-# Store for refresh tokens (in-memory for now, could be moved to database)
-# Format: {refresh_token: {'username': username, 'expires_at': timestamp}}
+# Default token settings
+# The key is shared through the data directory so tokens issued by one worker process are valid in all of them.
+# It is read (or generated) on first use, not on import, so JWT_SECRET_KEY and DATA_DIR from .env apply.
+_jwt_secret_key = None
+_jwt_secret_lock = threading.Lock()
+
+# Store for refresh tokens, mirrored from the refresh tokens database so every worker process sees them
+# Tokens are stored by their SHA-256 hash so the database never contains usable tokens
+# Format: {token_hash: {'username': username, 'expires_at': timestamp}}
 refresh_tokens = {}
+_tokens_mtime = None
+_tokens_lock = threading.RLock()
+
+def _hash_token(token):
+    """Get the key a refresh token is stored under"""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+def _get_mtime(path):
+    """Return the modification time of a file or None if it doesn't exist"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def _load_tokens():
+    """Make sure refresh_tokens reflects the refresh tokens database on disk"""
+    global _tokens_mtime
+
+    mtime = _get_mtime(config.REFRESH_TOKENS_DB_PATH)
+    if mtime == _tokens_mtime:
+        return
+
+    data = {}
+    if mtime is not None:
+        try:
+            with open(config.REFRESH_TOKENS_DB_PATH, 'r') as f:
+                data = json.load(f).get('refresh_tokens', {})
+        except Exception as e:
+            print(f"[ERROR] Failed to load refresh tokens: {e}")
+
+    refresh_tokens.clear()
+    refresh_tokens.update(data)
+    _tokens_mtime = mtime
+
+def _write_tokens():
+    """Write refresh_tokens to the refresh tokens database"""
+    global _tokens_mtime
+
+    if os.path.dirname(config.REFRESH_TOKENS_DB_PATH):
+        os.makedirs(os.path.dirname(config.REFRESH_TOKENS_DB_PATH), exist_ok=True)
+
+    # Write to a temporary file first so readers never see a partial database
+    tmp_path = f"{config.REFRESH_TOKENS_DB_PATH}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({"refresh_tokens": refresh_tokens}, f)
+    os.replace(tmp_path, config.REFRESH_TOKENS_DB_PATH)
+
+    _tokens_mtime = _get_mtime(config.REFRESH_TOKENS_DB_PATH)
+
+@contextmanager
+def _locked_tokens():
+    """Hold the refresh tokens lock (across threads and processes) with fresh tokens"""
+    with _tokens_lock:
+        lock_file = None
+        if fcntl is not None:
+            if os.path.dirname(config.REFRESH_TOKENS_DB_PATH):
+                os.makedirs(os.path.dirname(config.REFRESH_TOKENS_DB_PATH), exist_ok=True)
+            lock_file = open(config.REFRESH_TOKENS_DB_PATH + '.lock', 'w')
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            _load_tokens()
+            yield
+        finally:
+            if lock_file is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+                lock_file.close()
 
 def get_token_settings():
     """Get token settings from the settings module"""
@@ -34,6 +114,14 @@ def get_token_settings():
 
 
 
+def get_jwt_secret_key():
+    """Get the key access tokens are signed with, loading it on first use"""
+    global _jwt_secret_key
+    with _jwt_secret_lock:
+        if _jwt_secret_key is None:
+            _jwt_secret_key = config.get_secret('jwt_secret.key', 'JWT_SECRET_KEY')
+        return _jwt_secret_key
+
 def generate_access_token(username, is_admin=False):
     """Generate a new access token for a user"""
     token_settings = get_token_settings()
@@ -46,7 +134,7 @@ def generate_access_token(username, is_admin=False):
         'iat': datetime.now(timezone.utc),
         'type': 'access'
     }
-    return jwt.encode(payload, JWT_SECRET_KEY, algorithm='HS256')
+    return jwt.encode(payload, get_jwt_secret_key(), algorithm='HS256')
 
 def generate_refresh_token(username, remember_me=False):
     """Generate a new refresh token for a user"""
@@ -59,18 +147,21 @@ def generate_refresh_token(username, remember_me=False):
     token = secrets.token_hex(32)
     expires_at = int(time.time()) + expiry
 
-    # Store the refresh token
-    refresh_tokens[token] = {
-        'username': username,
-        'expires_at': expires_at
-    }
+    # Store the refresh token, dropping expired ones since the database is rewritten anyway
+    with _locked_tokens():
+        _remove_expired_tokens()
+        refresh_tokens[_hash_token(token)] = {
+            'username': username,
+            'expires_at': expires_at
+        }
+        _write_tokens()
 
     return token, expires_at
 
 def validate_access_token(token):
     """Validate an access token and return the payload if valid"""
     try:
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=['HS256'])
+        payload = jwt.decode(token, get_jwt_secret_key(), algorithms=['HS256'])
 
         # Check token type
         if payload.get('type') != 'access':
@@ -84,18 +175,22 @@ def validate_access_token(token):
 
 def validate_refresh_token(token):
     """Validate a refresh token and return the username if valid"""
-    if token not in refresh_tokens:
-        return None, "Invalid refresh token"
+    token_hash = _hash_token(token)
+
+    with _locked_tokens():
+        if token_hash not in refresh_tokens:
+            return None, "Invalid refresh token"
 
-    token_data = refresh_tokens[token]
+        token_data = refresh_tokens[token_hash]
 
-    # Check if token is expired
-    if token_data['expires_at'] < int(time.time()):
-        # Remove expired token
-        refresh_tokens.pop(token)
-        return None, "Refresh token expired"
+        # Check if token is expired
+        if token_data['expires_at'] < int(time.time()):
+            # Remove expired token
+            refresh_tokens.pop(token_hash)
+            _write_tokens()
+            return None, "Refresh token expired"
 
-    return token_data['username'], None
+        return token_data['username'], None
 
 def refresh_access_token(refresh_token):
     """Generate a new access token using a refresh token"""
@@ -115,18 +210,20 @@ def refresh_access_token(refresh_token):
 
 def revoke_refresh_token(token):
     """Revoke a refresh token"""
-    if token in refresh_tokens:
-        refresh_tokens.pop(token)
-        return True
-    return False
+    with _locked_tokens():
+        if refresh_tokens.pop(_hash_token(token), None) is not None:
+            _write_tokens()
+            return True
+        return False
 
 def revoke_all_user_refresh_tokens(username):
     """Revoke all refresh tokens for a user"""
-    global refresh_tokens
-    refresh_tokens = {
-        token: data for token, data in refresh_tokens.items()
-        if data['username'] != username
-    }
+    with _locked_tokens():
+        revoked = [token_hash for token_hash, data in refresh_tokens.items() if data['username'] == username]
+        for token_hash in revoked:
+            refresh_tokens.pop(token_hash)
+        if revoked:
+            _write_tokens()
 
 def get_token_from_header():
     """Extract the token from the Authorization header"""
@@ -182,11 +279,20 @@ def admin_token_required(f):
     decorated.__name__ = f.__name__
     return decorated
 
+def _remove_expired_tokens():
+    """Remove expired refresh tokens from refresh_tokens (call with _locked_tokens held)
+
+    Returns:
+        int: Number of removed tokens
+    """
+    current_time = int(time.time())
+    expired = [token_hash for token_hash, data in refresh_tokens.items() if data['expires_at'] <= current_time]
+    for token_hash in expired:
+        refresh_tokens.pop(token_hash)
+    return len(expired)
+
 def cleanup_expired_tokens():
     """Remove expired refresh tokens"""
-    global refresh_tokens
-    current_time = int(time.time())
-    refresh_tokens = {
-        token: data for token, data in refresh_tokens.items()
-        if data['expires_at'] > current_time
-    }
+    with _locked_tokens():
+        if _remove_expired_tokens():
+            _write_tokens()
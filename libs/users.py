@@ -3,37 +3,34 @@ import json
 import bcrypt
 import datetime
 from datetime import timedelta
-from flask import session
+from flask import session, g, has_request_context
 import libs.tokens as tokens
 import libs.logs as logs
 import libs.config as config
 
-# Path to the users database file
-USERS_DB_PATH = config.USERS_DB_PATH
-
 def init_users_db():
     """Initialize the users database if it doesn't exist"""
     # Ensure the directory exists if path contains directories
-    if os.path.dirname(USERS_DB_PATH):
-        os.makedirs(os.path.dirname(USERS_DB_PATH), exist_ok=True)
+    if os.path.dirname(config.USERS_DB_PATH):
+        os.makedirs(os.path.dirname(config.USERS_DB_PATH), exist_ok=True)
 
-    if not os.path.exists(USERS_DB_PATH):
-        with open(USERS_DB_PATH, 'w') as f:
+    if not os.path.exists(config.USERS_DB_PATH):
+        with open(config.USERS_DB_PATH, 'w') as f:
             json.dump({"users": []}, f)
-        print("[INFO] Created new users database at", USERS_DB_PATH)
+        print("[INFO] Created new users database at", config.USERS_DB_PATH)
         # Create default admin user if no users exist
         create_user('admin', 'admin', is_admin=True)
         print("[INFO] Created default admin user (username: admin, password: admin)")
 
 def get_users():
     """Get all users from the database"""
-    print(f"[INFO] Getting users from {USERS_DB_PATH}")
-    if not os.path.exists(USERS_DB_PATH):
+    print(f"[INFO] Getting users from {config.USERS_DB_PATH}")
+    if not os.path.exists(config.USERS_DB_PATH):
         print(f"[INFO] Users file does not exist, initializing")
         init_users_db()
 
     try:
-        with open(USERS_DB_PATH, 'r') as f:
+        with open(config.USERS_DB_PATH, 'r') as f:
             data = json.load(f)
             print(f"[INFO] Loaded {len(data.get('users', []))} users from database")
             return data
@@ -43,7 +40,7 @@ def get_users():
 
 def save_users(users_data):
     """Save users data to the database"""
-    with open(USERS_DB_PATH, 'w') as f:
+    with open(config.USERS_DB_PATH, 'w') as f:
         json.dump(users_data, f, indent=2)
 
 def create_user(username, password, is_admin=False, daily_quota=0, weekly_quota=0, monthly_quota=0, pending_approval=False):
@@ -116,36 +113,91 @@ def check_user_status(username):
     Returns:
         tuple: (is_valid, message) where is_valid is a boolean and message is a string
     """
-    users_data = get_users()
+    # The current user's record is already loaded for this request
+    if username is not None and username == get_auth_context()['username']:
+        user = get_current_user_record()
+    else:
+        user = _find_user(get_users(), username)
+
+    if user:
+        if user.get('suspended', False):
+            return False, "Your account has been suspended. Please contact an administrator."
+        if user.get('pending_approval', False):
+            return False, "Your account is pending approval by an administrator."
+        return True, None
 
+    return False, "User not found."
+
+def _find_user(users_data, username):
+    """Find a user record by username, or None"""
     for user in users_data['users']:
         if user['username'] == username:
-            if user.get('suspended', False):
-                return False, "Your account has been suspended. Please contact an administrator."
-            if user.get('pending_approval', False):
-                return False, "Your account is pending approval by an administrator."
-            return True, None
-
-    return False, "User not found."
+            return user
+    return None
 
-def is_authenticated():
-    """Check if the current user is authenticated"""
-    # First check session-based authentication (for backward compatibility)
-    if 'username' in session:
-        return True
+def _resolve_auth_context():
+    """Work out who is making the current request"""
+    context = {'username': None, 'token_payload': None, 'user': None, 'user_loaded': False}
 
-    # Then check token-based authentication
+    # Decode the access token once, even when the session already identifies the user
     token = tokens.get_token_from_header()
     if token:
         payload, error = tokens.validate_access_token(token)
-        return payload is not None
+        context['token_payload'] = payload
 
-    return False
+    # Session-based authentication first (for backward compatibility), then token-based
+    username = session.get('username')
+    if not username and context['token_payload']:
+        username = context['token_payload'].get('username')
+    context['username'] = username
+
+    return context
+
+def get_auth_context():
+    """Get the auth context of the current request
+
+    The session and access token are checked once per request and the result is
+    kept on flask.g, so auth_required, admin_required and the handler share it.
+
+    Returns:
+        dict: 'username' (or None) and 'token_payload' (the decoded access token or None)
+    """
+    if not has_request_context():
+        return {'username': None, 'token_payload': None, 'user': None, 'user_loaded': True}
+
+    context = g.get('auth_context')
+    if context is None:
+        context = _resolve_auth_context()
+        g.auth_context = context
+    return context
+
+def get_current_user_record():
+    """Get the users database record of the current user (loaded once per request)
+
+    Returns:
+        dict: The user record or None if nobody is logged in or the user doesn't exist
+    """
+    context = get_auth_context()
+    if not context['user_loaded']:
+        if context['username']:
+            context['user'] = _find_user(get_users(), context['username'])
+        context['user_loaded'] = True
+    return context['user']
+
+def _clear_auth_context():
+    """Forget the cached auth context (after logging in or out)"""
+    if has_request_context():
+        g.pop('auth_context', None)
+
+def is_authenticated():
+    """Check if the current user is authenticated"""
+    return get_auth_context()['username'] is not None
 
 def login_user(username, remember_me=False):
     """Log in a user by setting session data and generating tokens"""
     # Set session data (for backward compatibility)
     session['username'] = username
+    _clear_auth_context()
 
     # Generate tokens
     is_admin_user = is_user_admin(username)
@@ -164,6 +216,7 @@ def logout_user(refresh_token=None):
     """Log out the current user by clearing session data and revoking tokens"""
     # Clear session data
     session.pop('username', None)
+    _clear_auth_context()
 
     # Revoke refresh token if provided
     if refresh_token:
@@ -171,49 +224,30 @@ def logout_user(refresh_token=None):
 
 def get_current_user():
     """Get the current logged-in username"""
-    # First check session-based authentication
-    username = session.get('username')
-    if username:
-        return username
-
-    # Then check token-based authentication
-    token = tokens.get_token_from_header()
-    if token:
-        payload, error = tokens.validate_access_token(token)
-        if payload:
-            return payload.get('username')
-
-    return None
+    return get_auth_context()['username']
 
 def is_user_admin(username):
     """Check if a specific user is an admin"""
-    users_data = get_users()
+    # The current user's record is already loaded for this request
+    if username is not None and username == get_auth_context()['username']:
+        user = get_current_user_record()
+    else:
+        user = _find_user(get_users(), username)
 
-    for user in users_data['users']:
-        if user['username'] == username:
-            return user.get('is_admin', False)
-
-    return False
+    return user.get('is_admin', False) if user else False
 
 def is_admin(username=None):
     """Check if a user is an admin"""
-    print(f"[INFO] Checking if user is admin: {username}")
     if username is None:
-        # First check session-based authentication
-        username = get_current_user()
-        print(f"[INFO] Using current user: {username}")
+        context = get_auth_context()
+        username = context['username']
         if not username:
-            print("[INFO] No current user, not admin")
             return False
 
         # If using token-based authentication, check the token payload directly
-        token = tokens.get_token_from_header()
-        if token:
-            payload, _ = tokens.validate_access_token(token)
-            if payload and 'is_admin' in payload:
-                is_admin_value = payload['is_admin']
-                print(f"[INFO] User from token is_admin: {is_admin_value}")
-                return is_admin_value
+        payload = context['token_payload']
+        if payload and 'is_admin' in payload:
+            return payload['is_admin']
 
     # Fall back to database check
     return is_user_admin(username)
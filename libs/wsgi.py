@@ -0,0 +1,59 @@
+import os
+import multiprocessing
+
+# Default production server settings (can be overridden with environment variables)
+# SERVER_HOST / SERVER_PORT: address to listen on
+# SERVER_WORKERS: number of worker processes
+# SERVER_THREADS: number of request threads per worker process
+# SERVER_TIMEOUT: seconds a request may take before its worker is restarted
+DEFAULT_HOST = "0.0.0.0"
+DEFAULT_PORT = 80
+DEFAULT_THREADS = 8
+DEFAULT_TIMEOUT = 120
+
+def get_server_settings():
+    """Get production server settings from the environment"""
+    return {
+        'host': os.environ.get('SERVER_HOST', DEFAULT_HOST),
+        'port': int(os.environ.get('SERVER_PORT', DEFAULT_PORT)),
+        # The app mostly waits on qBittorrent, TMDB and torrent providers, so a few
+        # processes with several threads each go a long way
+        'workers': int(os.environ.get('SERVER_WORKERS', min(multiprocessing.cpu_count() * 2 + 1, 8))),
+        'threads': int(os.environ.get('SERVER_THREADS', DEFAULT_THREADS)),
+        'timeout': int(os.environ.get('SERVER_TIMEOUT', DEFAULT_TIMEOUT)),
+    }
+
+def run_production(app_factory):
+    """Serve the application with gunicorn worker processes
+
+    Falls back to the threaded Werkzeug server (without debugger and reloader)
+    when gunicorn isn't available, e.g. on Windows.
+
+    Args:
+        app_factory (callable): Function creating the Flask application. It is called
+            once in every worker process after the worker has been forked.
+    """
+    server_settings = get_server_settings()
+
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        print("[WARNING] gunicorn is not installed, falling back to the threaded development server")
+        app_factory().run(server_settings['host'], port=server_settings['port'], debug=False, threaded=True)
+        return
+
+    class ProductionApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f"{server_settings['host']}:{server_settings['port']}")
+            self.cfg.set('workers', server_settings['workers'])
+            self.cfg.set('threads', server_settings['threads'])
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('timeout', server_settings['timeout'])
+            self.cfg.set('accesslog', '-')
+
+        def load(self):
+            return app_factory()
+
+    print(f"[INFO] Starting production server on {server_settings['host']}:{server_settings['port']} "
+          f"with {server_settings['workers']} workers x {server_settings['threads']} threads")
+    ProductionApplication().run()
@@ -1,17 +1,22 @@
 import os
-import secrets
+import importlib
+import threading
 import requests
 import json
 import base64
 import datetime
-from flask import Flask, request, redirect, jsonify, session, Response
+import mimetypes
+from flask import Flask, Blueprint, request, redirect, jsonify, session, Response, send_file
 from flask_session import Session
 from dotenv import load_dotenv
 from libs.providers.provider_manager import ProviderManager
-from libs.providers.piratebay_provider import PirateBayProvider
-from libs.providers.sample_provider import SampleProvider
-from libs.providers.yts_provider import YTSProvider
+import libs.providers.registry as provider_registry
+import libs.providers.facets as facets
+import libs.providers.merge as merge
+import libs.providers.records as records
+import libs.providers.health as provider_health
 from libs.tmdbclient import TMDBClient
+import libs.tmdbclient as tmdbclient
 from qbittorrent import Client
 import libs.config as config
 import libs.users as users
@@ -21,6 +26,11 @@ import libs.passkeys as passkeys
 import libs.tokens as tokens
 import libs.downloads as downloads
 import libs.invites as invites
+import libs.imagecache as imagecache
+import libs.wsgi as wsgi
+import libs.pages as pages
+import libs.assets as assets
+import libs.sessions as sessions
 
 # Custom JSON encoder to handle bytes objects
 class BytesEncoder(json.JSONEncoder):
@@ -29,133 +39,186 @@ class BytesEncoder(json.JSONEncoder):
             return base64.b64encode(obj).decode('utf-8')
         return super().default(obj)
 
-print("Loading..?")
-
 load_dotenv()
 
-# Global qBittorrent client
+# Subsystems are created on first use (or by the background warm-up started in create_app),
+# so importing this module never blocks on qBittorrent, TMDB or torrent providers
 qbclient = None
+provider_manager = None
+tmdb = None
+_init_lock = threading.Lock()
 
-# Function to ensure qBittorrent authentication is valid
-def ensure_qb_auth():
+def get_qbclient():
+    """Get an authenticated qBittorrent client
+
+    Handlers keep the returned client for the whole request, so a settings change
+    dropping the shared client meanwhile can't pull it out from under them.
+
+    Returns:
+        Client: The client, or None if qBittorrent is disabled or authentication failed
+    """
     global qbclient
     if os.environ.get('disable-qb', '').lower() == 'true':
-        return False
+        return None
 
     try:
-        # If qbclient is not initialized, create a new client
-        if qbclient is None:
-            qbclient = Client(os.environ['qb-url'])
+        with _init_lock:
+            client = qbclient
+
+        # If qbclient is not initialized, create a new client. Connecting makes a
+        # request to qBittorrent, so the lock isn't held meanwhile.
+        if client is None:
+            client = Client(os.environ['qb-url'])
+            with _init_lock:
+                if qbclient is None:
+                    qbclient = client
+                else:
+                    client = qbclient
 
         # Try to login (this will refresh the session if needed)
-        qbclient.login(os.environ['qb-user'], os.environ['qb-password'])
+        client.login(os.environ['qb-user'], os.environ['qb-password'])
         print("[INFO] Authenticated with qBittorrent")
-        return True
+        return client
     except Exception as e:
         print(f"[ERROR] Failed to authenticate with qBittorrent: {e}")
-        return False
-
-# Initialize qBittorrent client
-if not os.environ.get('disable-qb', '').lower() == 'true':
-    ensure_qb_auth()
-    print("[INFO] Connected to qbittorrent!")
-    print(f"[INFO] Logging in with {os.environ['qb-user']} {os.environ['qb-password']} to {os.environ['qb-url']}")
-else:
-    print("[INFO] Disabling qbittorrent connection")
-print("Loading..?")
-
-# Initialize provider manager
-provider_manager = ProviderManager()
-
-# Register providers
-piratebay_provider = PirateBayProvider()
-provider_manager.register_provider("piratebay", piratebay_provider)
-
-# Register sample provider (disabled by default)
-sample_provider = SampleProvider()
-provider_manager.register_provider("sample", sample_provider)
-
-# Register YTS provider
-yts_provider = YTSProvider()
-provider_manager.register_provider("yts", yts_provider)
-
-
-# Load provider settings from settings database
-try:
-    provider_settings = settings.get_effective_settings().get("providers", {})
-    print(f"[INFO] Loaded provider settings: {provider_settings}")
-
-    # Apply settings to providers
-    for provider_id, provider_config in provider_settings.items():
-        provider = provider_manager.get_provider(provider_id)
-        if provider:
-            if "enabled" in provider_config:
-                provider.enabled = provider_config["enabled"]
-                print(f"[INFO] Set provider {provider_id} enabled status to {provider.enabled}")
-        else:
-            print(f"[WARNING] Provider {provider_id} not found but has settings")
-except Exception as e:
-    print(f"[ERROR] Failed to load provider settings: {e}")
-
-# Initialize TMDB client
-tmdb = TMDBClient()
-
-app = Flask(__name__)
-
-# Configure Flask-Session
-app.config["SESSION_TYPE"] = "filesystem"
-app.config["SESSION_PERMANENT"] = False
-app.config["SESSION_USE_SIGNER"] = True
-app.config["SECRET_KEY"] = secrets.token_hex(16)  # Generate a random secret key
-app.json_encoder = BytesEncoder  # Use custom JSON encoder for bytes objects
-Session(app)
-
-# Initialize data directory
-try:
-    config.ensure_data_dir()
-    print(f"[INFO] Using data directory: {config.DATA_DIR}")
-except Exception as e:
-    print(f"[ERROR] Failed to initialize data directory: {e}")
-
-# Initialize users database
-try:
-    users.init_users_db()
-except Exception as e:
-    print(f"[ERROR] Failed to initialize users database: {e}")
-
-# Initialize logs database
-try:
-    logs.init_logs_db()
-except Exception as e:
-    print(f"[ERROR] Failed to initialize logs database: {e}")
-
-# Initialize settings database
-try:
-    settings.init_settings_db()
-    # Apply settings from .env and overrides
-    settings.apply_settings_to_env()
-    # Initialize token settings
-    tokens.get_token_settings()
-except Exception as e:
-    print(f"[ERROR] Failed to initialize settings database: {e}")
-
-# Initialize passkeys database
-try:
-    passkeys.init_passkeys_db()
-except Exception as e:
-    print(f"[ERROR] Failed to initialize passkeys database: {e}")
-
-# Initialize downloads database
-try:
-    downloads.init_downloads_db()
-except Exception as e:
-    print(f"[ERROR] Failed to initialize downloads database: {e}")
-
-# Initialize invites database
-try:
-    invites.init_invites_db()
-except Exception as e:
-    print(f"[ERROR] Failed to initialize invites database: {e}")
+        return None
+
+# Function to ensure qBittorrent authentication is valid
+def ensure_qb_auth():
+    return get_qbclient() is not None
+
+def reset_clients(reset_qb=True, reset_tmdb=True):
+    """Drop the shared qBittorrent and/or TMDB client so the next use creates it with the current settings
+
+    Args:
+        reset_qb (bool): Drop the qBittorrent client
+        reset_tmdb (bool): Drop the TMDB client
+    """
+    global qbclient, tmdb
+    with _init_lock:
+        if reset_qb:
+            qbclient = None
+        if reset_tmdb:
+            tmdb = None
+
+# Apply provider settings from settings database
+def apply_provider_settings(manager):
+    try:
+        provider_settings = settings.get_effective_settings().get("providers", {})
+        print(f"[INFO] Loaded provider settings: {provider_settings}")
+
+        # Apply settings to providers (without loading them)
+        for provider_id, provider_config in provider_settings.items():
+            if provider_id in manager.get_provider_ids():
+                if "enabled" in provider_config:
+                    manager.set_enabled(provider_id, provider_config["enabled"])
+                    print(f"[INFO] Set provider {provider_id} enabled status to {manager.is_enabled(provider_id)}")
+            else:
+                print(f"[WARNING] Provider {provider_id} not found but has settings")
+    except Exception as e:
+        print(f"[ERROR] Failed to load provider settings: {e}")
+
+def get_provider_manager():
+    """Get the provider manager, registering the discovered providers on first use
+
+    Providers are only imported and instantiated once they are used while enabled.
+    """
+    global provider_manager
+    with _init_lock:
+        if provider_manager is None:
+            manager = ProviderManager()
+
+            # Register providers found in libs/providers/ and installed as plugins
+            for spec in provider_registry.discover_providers():
+                manager.register_spec(spec)
+
+            apply_provider_settings(manager)
+            provider_manager = manager
+        return provider_manager
+
+def get_tmdb():
+    """Get the TMDB client, creating it on first use"""
+    global tmdb
+    with _init_lock:
+        if tmdb is None:
+            tmdb = TMDBClient()
+        return tmdb
+
+def warm_up():
+    """Initialize subsystems in the background so the first requests don't pay for it"""
+    try:
+        pages.preload_pages()
+        get_provider_manager()
+        get_tmdb()
+        if os.environ.get('disable-qb', '').lower() == 'true':
+            print("[INFO] Disabling qbittorrent connection")
+        elif ensure_qb_auth():
+            print(f"[INFO] Connected to qbittorrent at {os.environ.get('qb-url')}")
+    except Exception as e:
+        print(f"[ERROR] Warm-up failed: {e}")
+
+# All routes are registered on this blueprint, the application itself is created by create_app()
+bp = Blueprint("main", __name__)
+
+def init_databases():
+    """Initialize the data directory and JSON databases (runs once per worker process)"""
+    # Initialize data directory
+    try:
+        config.ensure_data_dir()
+        print(f"[INFO] Using data directory: {config.DATA_DIR}")
+        config.print_db_paths()
+    except Exception as e:
+        print(f"[ERROR] Failed to initialize data directory: {e}")
+
+    # Initialize users database
+    try:
+        users.init_users_db()
+    except Exception as e:
+        print(f"[ERROR] Failed to initialize users database: {e}")
+
+    # Initialize logs database
+    try:
+        logs.init_logs_db()
+    except Exception as e:
+        print(f"[ERROR] Failed to initialize logs database: {e}")
+
+    # Initialize settings database
+    try:
+        settings.init_settings_db()
+        # Apply settings from .env and overrides
+        settings.apply_settings_to_env()
+        # Initialize token settings
+        tokens.get_token_settings()
+    except Exception as e:
+        print(f"[ERROR] Failed to initialize settings database: {e}")
+
+    # Initialize passkeys database
+    try:
+        passkeys.init_passkeys_db()
+    except Exception as e:
+        print(f"[ERROR] Failed to initialize passkeys database: {e}")
+
+    # Initialize downloads database
+    try:
+        downloads.init_downloads_db()
+    except Exception as e:
+        print(f"[ERROR] Failed to initialize downloads database: {e}")
+
+    # Initialize invites database
+    try:
+        invites.init_invites_db()
+    except Exception as e:
+        print(f"[ERROR] Failed to initialize invites database: {e}")
+
+@bp.before_app_request
+def sync_settings():
+    """Pick up settings saved by another worker process"""
+    if settings.apply_settings_if_changed():
+        print("[INFO] Settings changed in another worker, reloading")
+        reset_clients()
+        tmdbclient.apply_settings()
+        if provider_manager is not None:
+            apply_provider_settings(provider_manager)
 
 # Authentication middleware
 def auth_required(func):
@@ -186,89 +249,80 @@ def admin_required(func):
     wrapper.__name__ = func.__name__
     return wrapper
 
-@app.route("/login")
+@bp.route("/login")
 def route_login():
     # If already logged in, redirect to home
     if users.is_authenticated():
         return redirect("/")
 
-    with open("static/login.html", "r") as f:
-        return f.read()
+    return pages.serve_page("login.html")
 
-@app.route("/")
+@bp.route("/")
 @auth_required
 def route_index():
-    with open("static/index.html", "r") as f:
-        return f.read()
+    return pages.serve_page("index.html")
 
-@app.route("/downloads")
+@bp.route("/downloads")
 @auth_required
 def route_downloads():
-    with open("static/downloads.html", "r") as f:
-        return f.read()
+    return pages.serve_page("downloads.html")
 
-@app.route("/users")
+@bp.route("/users")
 @auth_required
 def route_users():
     # Check if user is admin
     if not users.is_admin():
         return redirect("/")
 
-    with open("static/users.html", "r") as f:
-        return f.read()
+    return pages.serve_page("users.html")
 
-@app.route("/logs")
+@bp.route("/logs")
 @auth_required
 def route_logs():
     # Check if user is admin
     if not users.is_admin():
         return redirect("/")
 
-    with open("static/logs.html", "r") as f:
-        return f.read()
+    return pages.serve_page("logs.html")
 
-@app.route("/dashboard")
+@bp.route("/dashboard")
 @auth_required
 @admin_required
 def route_dashboard():
     """Route for the user activity dashboard"""
-    with open("static/dashboard.html", "r") as f:
-        return f.read()
+    return pages.serve_page("dashboard.html")
 
-@app.route("/settings")
+@bp.route("/settings")
 @auth_required
 def route_settings():
-    with open("static/settings.html", "r") as f:
-        return f.read()
+    return pages.serve_page("settings.html")
 
-@app.route("/serversettings")
+@bp.route("/serversettings")
 @auth_required
 def route_serversettings():
     # Check if user is admin
     if not users.is_admin():
         return redirect("/")
 
-    with open("static/serversettings.html", "r") as f:
-        return f.read()
+    return pages.serve_page("serversettings.html")
 
-@app.route("/passkeys")
+@bp.route("/passkeys")
 @auth_required
 def route_passkeys():
     # Redirect to the new settings page
     return redirect("/settings")
 
-@app.route("/directsearch")
+@bp.route("/directsearch")
 @auth_required
 def route_directsearch():
-    with open("static/directsearch.html", "r") as f:
-        return f.read()
+    return pages.serve_page("directsearch.html")
 
-@app.route("/static/<path:path>")
+@bp.route("/static/<path:path>")
 def route_static(path):
-    return app.send_static_file(path)
+    return assets.serve_static(path)
 
 # Authentication API routes
-@app.route("/api/login", methods=["POST"])
+@bp.route("/api/login", methods=["POST"])
 def route_api_login():
     username = request.json.get("username")
     password = request.json.get("password")
@@ -306,7 +360,7 @@ def route_api_login():
     logs.log_login_attempt(username, False)
     return jsonify({"success": False, "message": "Invalid username or password"})
 
-@app.route("/api/auth/status")
+@bp.route("/api/auth/status")
 def route_api_auth_status():
     is_authenticated = users.is_authenticated()
     username = users.get_current_user() if is_authenticated else None
@@ -318,7 +372,7 @@ def route_api_auth_status():
         "is_admin": is_admin
     })
 
-@app.route("/api/auth/refresh", methods=["POST"])
+@bp.route("/api/auth/refresh", methods=["POST"])
 def route_api_auth_refresh():
     refresh_token = request.json.get("refresh_token")
 
@@ -342,14 +396,14 @@ def route_api_auth_refresh():
         "is_admin": is_admin
     })
 
-@app.route("/api/auth/logout", methods=["POST"])
+@bp.route("/api/auth/logout", methods=["POST"])
 def route_api_auth_logout():
     refresh_token = request.json.get("refresh_token")
     users.logout_user(refresh_token)
     return jsonify({"success": True})
 
 # User management API routes
-@app.route("/api/users")
+@bp.route("/api/users")
 @auth_required
 @admin_required
 def route_api_users_get():
@@ -370,7 +424,7 @@ def route_api_users_get():
             "message": f"Error: {str(e)}"
         })
 
-@app.route("/api/users", methods=["POST"])
+@bp.route("/api/users", methods=["POST"])
 @auth_required
 @admin_required
 def route_api_users_create():
@@ -408,7 +462,7 @@ def route_api_users_create():
 
     return jsonify({"success": success, "message": message})
 
-@app.route("/api/users/<username>", methods=["DELETE"])
+@bp.route("/api/users/<username>", methods=["DELETE"])
 @auth_required
 @admin_required
 def route_api_users_delete(username):
@@ -421,14 +475,14 @@ def route_api_users_delete(username):
 
     return jsonify({"success": success, "message": message})
 
-@app.route("/api/users/<username>/toggle-admin", methods=["POST"])
+@bp.route("/api/users/<username>/toggle-admin", methods=["POST"])
 @auth_required
 @admin_required
 def route_api_users_toggle_admin(username):
     success, message = users.toggle_admin(username)
     return jsonify({"success": success, "message": message})
 
-@app.route("/api/users/<username>/change-password", methods=["POST"])
+@bp.route("/api/users/<username>/change-password", methods=["POST"])
 @auth_required
 @admin_required
 def route_api_users_change_password(username):
@@ -443,7 +497,7 @@ def route_api_users_change_password(username):
     print(f"[INFO] Password change result: success={success}, message={message}")
     return jsonify({"success": success, "message": message})
 
-@app.route("/api/users/self/change-password", methods=["POST"])
+@bp.route("/api/users/self/change-password", methods=["POST"])
 @auth_required
 def route_api_users_change_own_password():
     print(f"[INFO] User changing own password")
@@ -460,7 +514,7 @@ def route_api_users_change_own_password():
     print(f"[INFO] Password change result: success={success}, message={message}")
     return jsonify({"success": success, "message": message})
 
-@app.route("/api/users/<username>/quotas", methods=["GET"])
+@bp.route("/api/users/<username>/quotas", methods=["GET"])
 @auth_required
 @admin_required
 def route_api_users_get_quotas(username):
@@ -472,7 +526,7 @@ def route_api_users_get_quotas(username):
     else:
         return jsonify({"success": False, "message": "User not found"}), 404
 
-@app.route("/api/users/<username>/quotas", methods=["POST"])
+@bp.route("/api/users/<username>/quotas", methods=["POST"])
 @auth_required
 @admin_required
 def route_api_users_update_quotas(username):
@@ -493,7 +547,7 @@ def route_api_users_update_quotas(username):
     print(f"[INFO] Quota update result: success={success}, message={message}")
     return jsonify({"success": success, "message": message})
 
-@app.route("/api/users/self/quotas", methods=["GET"])
+@bp.route("/api/users/self/quotas", methods=["GET"])
 @auth_required
 def route_api_users_get_own_quotas():
     username = users.get_current_user()
@@ -505,7 +559,7 @@ def route_api_users_get_own_quotas():
     else:
         return jsonify({"success": False, "message": "User not found"}), 404
 
-@app.route("/api/download", methods=["POST"])
+@bp.route("/api/download", methods=["POST"])
 @auth_required
 def route_api_download():
     name = request.json.get("name")
@@ -524,7 +578,7 @@ def route_api_download():
     # If provider_id is not specified, try to find a provider that can handle this infohash
     if not provider_id:
         # Try each enabled provider until one works
-        for pid, provider in provider_manager.get_enabled_providers().items():
+        for pid, provider in get_provider_manager().get_enabled_providers().items():
             magnet = provider.create_magnet_link(infohash, name)
             if magnet:
                 provider_id = pid
@@ -535,7 +589,7 @@ def route_api_download():
             return jsonify({"success": False, "message": "No enabled provider could create a magnet link"}), 400
     else:
         # Use the specified provider
-        magnet = provider_manager.create_magnet_link(infohash, name, provider_id)
+        magnet = get_provider_manager().create_magnet_link(infohash, name, provider_id)
         if not magnet:
             return jsonify({"success": False, "message": f"Provider {provider_id} not found or disabled"}), 400
 
@@ -547,13 +601,14 @@ def route_api_download():
         logs.log_download_failed(current_user, name, infohash, "qBittorrent is disabled")
         return jsonify({"success": False, "message": "qBittorrent is disabled"}), 503
 
-    if not ensure_qb_auth():
+    client = get_qbclient()
+    if client is None:
         # Log failed download due to authentication failure
         logs.log_download_failed(current_user, name, infohash, "Failed to authenticate with qBittorrent")
         return jsonify({"success": False, "message": "Failed to authenticate with qBittorrent"}), 503
 
     try:
-        resp = qbclient.download_from_link(magnet, savepath=downloadpath)
+        resp = client.download_from_link(magnet, savepath=downloadpath)
         print(f"[INFO] Started download for {name} ({infohash}) @ {downloadpath} response: {resp}")
 
         if resp == 'Ok.':
@@ -576,7 +631,7 @@ def route_api_download():
         logs.log_download_failed(current_user, name, infohash, f"Error: {str(e)}")
         return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
 
-@app.route("/api/search", methods=["GET"])
+@bp.route("/api/search", methods=["GET"])
 @auth_required
 def route_api_search():
     query = request.args.get("q")
@@ -587,40 +642,117 @@ def route_api_search():
     print(f"[INFO] Searching for {query} using {search_type}, media_type: {media_type}, provider: {provider_id if provider_id else 'all enabled providers'}")
 
     if search_type == "tmdb":
-        # Search TMDB first with media type filter
-        search_results = tmdb.search(query, media_type=media_type)
+        page = request.args.get("page", 1, type=int)
+        mode = request.args.get("mode", os.environ.get("tmdb-search-mode", "multi"))
+
+        # Search TMDB with media type filter. For 'all', /search/multi covers movies and
+        # TV shows in a single request; single media types already need only one request.
+        if mode == "multi" and media_type == "all":
+            search_results = get_tmdb().search_multi(query, page=page, media_type=media_type)
+        else:
+            search_results = get_tmdb().search(query, page=page, media_type=media_type)
+
+        # Warm the image cache so the posters are local by the time the grid renders.
+        # The WebP copy is prepared too since every browser running the PWA accepts it.
+        imagecache.prefetch_images(
+            [result.get('poster_path') for result in search_results.get('results', [])],
+            size_class='card',
+            webp=True
+        )
         return jsonify(search_results)
     else:
         # Direct torrent provider search (fallback)
-        search_results = provider_manager.search(query, provider_id=provider_id)
-        return jsonify(search_results)
+        search_results = get_provider_manager().search(query, provider_id=provider_id)
+        return jsonify(records.to_json(search_results))
 
-@app.route('/api/tmdb/image/<path:image_path>')
+@bp.route('/api/tmdb/image/<path:image_path>')
 @auth_required
 def route_api_tmdb_image(image_path):
-    """Proxy for TMDB images to avoid CORS issues"""
+    """Proxy for TMDB images to avoid CORS issues
+
+    The size query parameter selects the TMDB variant (thumb, card, poster or backdrop).
+    Clients accepting WebP get a re-encoded copy when Pillow is available, once the
+    background transcode has cached it.
+    Cached images are sent straight from disk (sendfile where the server supports it),
+    misses are streamed from TMDB chunk by chunk while being cached.
+    """
     try:
+        cache = imagecache.get_cache()
+        size_class = request.args.get("size", imagecache.DEFAULT_SIZE_CLASS)
+        if size_class not in imagecache.SIZE_CLASSES:
+            return jsonify({"success": False, "message": f"Unknown image size {size_class}"}), 400
+
         # Construct the TMDB image URL
-        tmdb_image_url = f"https://image.tmdb.org/t/p/w500/{image_path}"
-        print(f"[INFO] Proxying TMDB image: {tmdb_image_url}")
-
-        # Fetch the image
-        response = requests.get(tmdb_image_url, stream=True)
-        response.raise_for_status()
-
-        # Return the image with appropriate headers
-        return Response(
-            response.raw.read(),
-            content_type=response.headers['Content-Type'],
-            headers={
-                'Cache-Control': 'public, max-age=86400',  # Cache for 24 hours
-            }
-        )
+        tmdb_image_url = imagecache.get_image_url(size_class, image_path)
+        cache_key = imagecache.get_cache_key(size_class, image_path)
+        webp = imagecache.webp_enabled() and 'image/webp' in request.headers.get('Accept', '')
+        webp_key = imagecache.get_cache_key(size_class, image_path, webp=True)
+
+        # HEAD requests never read the body, answer them without fetching the image from TMDB
+        if request.method == 'HEAD':
+            entry = (cache.get(webp_key) if webp else None) or cache.get(cache_key)
+            if entry is not None:
+                return _send_cached_image(entry)
+
+            response = Response(
+                content_type=mimetypes.guess_type(image_path)[0] or 'image/jpeg',
+                headers={'Cache-Control': 'public, max-age=86400', 'Vary': 'Accept'}
+            )
+            # The size isn't known until the image is fetched
+            response.automatically_set_content_length = False
+            return response
+
+        # Serve the WebP copy to clients that accept it once it exists. Until then they
+        # get the original, and the copy is created in the background.
+        if webp:
+            entry = cache.get(webp_key)
+            if entry is not None:
+                return _send_cached_image(entry)
+
+        entry = cache.get(cache_key)
+        if entry is None:
+            print(f"[INFO] Proxying TMDB image: {tmdb_image_url}")
+
+            # Stream the image to the client while it is written to the cache,
+            # the WebP copy is queued once the original is cached
+            on_cached = (lambda: imagecache.queue_webp(size_class, image_path)) if webp else None
+            result = imagecache.stream_image(cache_key, tmdb_image_url, on_cached=on_cached)
+            if result is None:
+                return jsonify({"success": False, "message": "Too many image requests, try again later"}), 503
+
+            chunks, content_type = result
+            return Response(
+                chunks,
+                content_type=content_type,
+                headers={
+                    'Cache-Control': 'public, max-age=86400',  # Cache for 24 hours
+                    'Vary': 'Accept',
+                }
+            )
+
+        if webp:
+            imagecache.queue_webp(size_class, image_path)
+
+        return _send_cached_image(entry)
     except Exception as e:
         print(f"[ERROR] Failed to proxy TMDB image: {e}")
         return jsonify({"success": False, "message": "Failed to load image"}), 404
 
-@app.route('/api/tmdb/details', methods=["GET"])
+def _send_cached_image(entry):
+    """Send a cached image, answering If-None-Match / If-Modified-Since with 304 Not Modified"""
+    response = send_file(
+        entry['path'],
+        mimetype=entry['content_type'],
+        etag=entry['hash'],
+        last_modified=entry['last_modified'],
+        max_age=86400,  # Cache for 24 hours
+        conditional=True
+    )
+    # The format depends on the Accept header
+    response.headers['Vary'] = 'Accept'
+    return response
+
+@bp.route('/api/tmdb/details', methods=["GET"])
 @auth_required
 def route_api_tmdb_details():
     media_id = request.args.get("id")
@@ -630,14 +762,36 @@ def route_api_tmdb_details():
         return jsonify({"success": False, "message": "Media ID is required"}), 400
 
     print(f"[INFO] Getting TMDB details for {media_type} {media_id}")
-    details = tmdb.get_details(media_id, media_type)
+    details = get_tmdb().get_details(media_id, media_type)
 
     if not details:
         return jsonify({"success": False, "message": "Failed to get details"}), 404
 
     return jsonify({"success": True, "details": details})
 
-@app.route('/api/torrents', methods=["GET"])
+@bp.route('/api/tmdb/cache/stats', methods=["GET"])
+@auth_required
+@admin_required
+def route_api_tmdb_cache_stats():
+    """Get TMDB response and image cache metrics"""
+    return jsonify({
+        "success": True,
+        "stats": get_tmdb().cache.get_stats(),
+        "image_stats": imagecache.get_cache().get_stats()
+    })
+
+@bp.route('/api/sessions/stats', methods=["GET"])
+@auth_required
+@admin_required
+def route_api_sessions_stats():
+    """Session store metrics (SQLite backend only)"""
+    store = sessions.get_store()
+    if store is None:
+        return jsonify({"success": False, "message": "Session metrics require the sqlite session backend"}), 404
+
+    return jsonify({"success": True, "stats": store.get_stats()})
+
+@bp.route('/api/torrents', methods=["GET"])
 @auth_required
 def route_api_torrents():
     query = request.args.get("q")
@@ -647,18 +801,35 @@ def route_api_torrents():
     if not query:
         return jsonify({"success": False, "message": "Query is required"}), 400
 
-    print(f"[INFO] Searching for {query} with category {category} using provider {provider_id if provider_id else 'all enabled providers'}")
-    search_results = provider_manager.search(query, category, provider_id=provider_id)
-    return jsonify(search_results)
+    sort_by = request.args.get("sort", merge.DEFAULT_SORT)
+    if sort_by not in merge.SORT_KEYS:
+        return jsonify({"success": False, "message": f"Unknown sort, use one of: {', '.join(merge.SORT_KEYS)}"}), 400
 
-@app.route('/api/fetch', methods=["GET"])
+    print(f"[INFO] Searching for {query} with category {category} using provider {provider_id if provider_id else 'all enabled providers'}")
+    search_results = get_provider_manager().search_cached(query, category, provider_id=provider_id)
+
+    # Without paging or filters, return the plain list of results (what older clients expect),
+    # optionally only the best `limit` results
+    filters = facets.parse_filters(request.args)
+    if not filters and not any(key in request.args for key in ("page", "per_page", "facets")):
+        limit = request.args.get("limit", type=int)
+        return jsonify(records.to_json(merge.select_results(search_results, sort_by, limit, presorted=sort_by == merge.DEFAULT_SORT)))
+
+    page = request.args.get("page", 1, type=int)
+    per_page = request.args.get("per_page", facets.DEFAULT_PER_PAGE, type=int)
+    response = facets.apply_facets(search_results, filters, page=page, per_page=per_page, sort_by=sort_by)
+    response["success"] = True
+    return jsonify(response)
+
+@bp.route('/api/fetch', methods=["GET"])
 @auth_required
 def route_api_fetch():
     # Ensure qBittorrent authentication is valid
     if os.environ.get('disable-qb', '').lower() == 'true':
         return jsonify({"success": False, "message": "qBittorrent is disabled"}), 503
 
-    if not ensure_qb_auth():
+    client = get_qbclient()
+    if client is None:
         return jsonify({"success": False, "message": "Failed to authenticate with qBittorrent"}), 503
 
     try:
@@ -667,7 +838,7 @@ def route_api_fetch():
         is_admin = users.is_admin()
 
         # Get all torrents from qBittorrent
-        all_torrents = qbclient.torrents()
+        all_torrents = client.torrents()
 
         # Synchronize downloads database with qBittorrent
         qb_hashes = [t['hash'] for t in all_torrents]
@@ -720,7 +891,7 @@ def route_api_fetch():
         print(f"[ERROR] Failed to fetch torrents: {str(e)}")
         return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
 
-@app.route('/api/delete', methods=["POST"])
+@bp.route('/api/delete', methods=["POST"])
 @auth_required
 def route_api_delete():
     hash_value = request.json.get("hash")
@@ -734,7 +905,8 @@ def route_api_delete():
     if os.environ.get('disable-qb', '').lower() == 'true':
         return jsonify({"success": False, "message": "qBittorrent is disabled"}), 503
 
-    if not ensure_qb_auth():
+    client = get_qbclient()
+    if client is None:
         return jsonify({"success": False, "message": "Failed to authenticate with qBittorrent"}), 503
 
     try:
@@ -752,12 +924,12 @@ def route_api_delete():
         action_description = ""
         if keep_files:
             # Remove torrent but keep files
-            qbclient.delete(hash_value)
+            client.delete(hash_value)
             action_description = "Removed torrent from seeding (kept files)"
             print(f"[INFO] Removed torrent {hash_value} from seeding (kept files)")
         else:
             # Delete torrent and optionally delete files
-            qbclient.delete_permanently(hash_value)
+            client.delete_permanently(hash_value)
             action_description = f"Deleted torrent and files"
             print(f"[INFO] Deleted torrent {hash_value} with delete_files={delete_files}")
 
@@ -775,7 +947,7 @@ def route_api_delete():
         print(f"[ERROR] Failed to delete torrent {hash_value}: {str(e)}")
         return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
 
-@app.route('/api/logs', methods=["GET"])
+@bp.route('/api/logs', methods=["GET"])
 @auth_required
 @admin_required
 def route_api_logs():
@@ -809,7 +981,7 @@ def route_api_logs():
         print(f"[ERROR] Failed to fetch logs: {str(e)}")
         return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
 
-@app.route('/api/dashboard/stats', methods=["GET"])
+@bp.route('/api/dashboard/stats', methods=["GET"])
 @auth_required
 @admin_required
 def route_api_dashboard_stats():
@@ -930,7 +1102,7 @@ def route_api_dashboard_stats():
         print(f"[ERROR] Failed to fetch dashboard stats: {str(e)}")
         return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
 
-@app.route('/api/dashboard/activity', methods=["GET"])
+@bp.route('/api/dashboard/activity', methods=["GET"])
 @auth_required
 @admin_required
 def route_api_dashboard_activity():
@@ -1056,7 +1228,7 @@ def route_api_dashboard_activity():
         return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
 
 # Settings API routes
-@app.route('/api/settings', methods=["GET"])
+@bp.route('/api/settings', methods=["GET"])
 @auth_required
 @admin_required
 def route_api_settings_get():
@@ -1077,7 +1249,7 @@ def route_api_settings_get():
         print(f"[ERROR] Failed to fetch settings: {str(e)}")
         return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
 
-@app.route('/api/settings/public', methods=["GET"])
+@bp.route('/api/settings/public', methods=["GET"])
 def route_api_settings_public_get():
     """Public endpoint for non-sensitive settings that don't require authentication"""
     try:
@@ -1097,19 +1269,25 @@ def route_api_settings_public_get():
         print(f"[ERROR] Failed to fetch public settings: {str(e)}")
         return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
 
-@app.route('/api/providers', methods=["GET"])
+@bp.route('/api/providers', methods=["GET"])
 @auth_required
 def route_api_providers():
     """Get all available providers"""
     try:
         providers_info = []
+        manager = get_provider_manager()
 
-        # Get all providers
-        for provider_id, provider in provider_manager.get_all_providers().items():
+        # Get all providers (without loading the ones that haven't been used)
+        for provider_id in manager.get_provider_ids():
+            name = manager.get_provider_name(provider_id)
+            provider = manager.providers.get(provider_id)
             providers_info.append({
                 "id": provider_id,
-                "name": provider.name,
-                "enabled": provider.enabled
+                "name": name,
+                "enabled": manager.is_enabled(provider_id),
+                "loaded": provider is not None,
+                "health": provider_health.get_health(name).get_stats(),
+                "mirrors": provider.mirrors.get_stats() if hasattr(provider, "mirrors") else None
             })
 
         return jsonify({
@@ -1120,19 +1298,21 @@ def route_api_providers():
         print(f"[ERROR] Failed to fetch providers: {str(e)}")
         return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
 
-@app.route('/api/providers/<provider_id>/toggle', methods=["POST"])
+@bp.route('/api/providers/<provider_id>/toggle', methods=["POST"])
 @auth_required
 @admin_required
 def route_api_providers_toggle(provider_id):
     """Toggle a provider's enabled status"""
     try:
-        provider = provider_manager.get_provider(provider_id)
-        if not provider:
+        manager = get_provider_manager()
+        if provider_id not in manager.get_provider_ids():
             return jsonify({"success": False, "message": f"Provider {provider_id} not found"}), 404
 
-        # Toggle enabled status
-        provider.enabled = not provider.enabled
-        print(f"[INFO] Provider {provider_id} ({provider.name}) is now {'enabled' if provider.enabled else 'disabled'}")
+        # Toggle enabled status (the provider is loaded the next time it's searched)
+        enabled = not manager.is_enabled(provider_id)
+        manager.set_enabled(provider_id, enabled)
+        name = manager.get_provider_name(provider_id)
+        print(f"[INFO] Provider {provider_id} ({name}) is now {'enabled' if enabled else 'disabled'}")
 
         # Save provider settings to settings database
         current_settings = settings.get_overridden_settings()
@@ -1141,7 +1321,7 @@ def route_api_providers_toggle(provider_id):
 
         # Update provider enabled status
         current_settings["providers"][provider_id] = {
-            "enabled": provider.enabled
+            "enabled": enabled
         }
 
         # Save settings
@@ -1151,15 +1331,15 @@ def route_api_providers_toggle(provider_id):
             "success": True,
             "provider": {
                 "id": provider_id,
-                "name": provider.name,
-                "enabled": provider.enabled
+                "name": name,
+                "enabled": enabled
             }
         })
     except Exception as e:
         print(f"[ERROR] Failed to toggle provider: {str(e)}")
         return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
 
-@app.route('/api/settings', methods=["POST"])
+@bp.route('/api/settings', methods=["POST"])
 @auth_required
 @admin_required
 def route_api_settings_update():
@@ -1176,15 +1356,14 @@ def route_api_settings_update():
 
             # Reinitialize qBittorrent client if qBittorrent settings changed
             if any(key in new_settings for key in ['qb-url', 'qb-user', 'qb-password', 'disable-qb']):
-                global qbclient
-                qbclient = None
+                reset_clients(reset_tmdb=False)
                 if not os.environ.get('disable-qb', '').lower() == 'true':
                     ensure_qb_auth()
 
-            # Reinitialize TMDB client if API key changed
-            if 'tmdb-api-key' in new_settings:
-                global tmdb
-                tmdb = TMDBClient()
+            # Reinitialize TMDB client if API key or cache settings changed
+            if any(key.startswith('tmdb-') for key in new_settings):
+                reset_clients(reset_qb=False)
+                tmdbclient.apply_settings()
 
             # Log WebAuthn configuration changes if any
             if any(key in new_settings for key in ['RP_ID', 'RP_NAME', 'RP_ORIGIN']):
@@ -1197,9 +1376,8 @@ def route_api_settings_update():
 
             # Handle DATA_DIR changes
             if 'DATA_DIR' in new_settings:
-                # The DATA_DIR environment variable has been updated by apply_settings_to_env()
-                # We need to update the config.DATA_DIR variable and reinitialize the data directory
-                config.DATA_DIR = os.environ.get('DATA_DIR', 'data')
+                # The DATA_DIR environment variable has been updated by apply_settings_to_env(),
+                # config.DATA_DIR reads it from there. Create the new data directory.
                 config.ensure_data_dir()
                 print(f"[INFO] Data directory updated to {config.DATA_DIR}")
 
@@ -1214,7 +1392,7 @@ def route_api_settings_update():
         print(f"[ERROR] Failed to update settings: {str(e)}")
         return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
 
-@app.route('/api/settings/reset', methods=["POST"])
+@bp.route('/api/settings/reset', methods=["POST"])
 @auth_required
 @admin_required
 def route_api_settings_reset():
@@ -1227,11 +1405,13 @@ def route_api_settings_reset():
             settings.apply_settings_to_env()
 
             # Reinitialize qBittorrent client
-            global qbclient
-            qbclient = None
+            reset_clients()
             if not os.environ.get('disable-qb', '').lower() == 'true':
                 ensure_qb_auth()
 
+            # Go back to the default TMDB rate limit and worker count
+            tmdbclient.apply_settings()
+
             # Refresh token settings
             tokens.get_token_settings()
             print(f"[INFO] Token settings reset to defaults")
@@ -1245,7 +1425,7 @@ def route_api_settings_reset():
         return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
 
 # Passkey API routes
-@app.route('/api/passkeys', methods=["GET"])
+@bp.route('/api/passkeys', methods=["GET"])
 @auth_required
 def route_api_passkeys_get():
     try:
@@ -1270,7 +1450,7 @@ def route_api_passkeys_get():
         print(f"[ERROR] Failed to fetch passkeys: {str(e)}")
         return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
 
-@app.route('/api/passkeys/register/options', methods=["POST"])
+@bp.route('/api/passkeys/register/options', methods=["POST"])
 @auth_required
 def route_api_passkeys_register_options():
     try:
@@ -1285,7 +1465,7 @@ def route_api_passkeys_register_options():
         print(f"[ERROR] Failed to generate registration options: {str(e)}")
         return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
 
-@app.route('/api/passkeys/register/verify', methods=["POST"])
+@bp.route('/api/passkeys/register/verify', methods=["POST"])
 @auth_required
 def route_api_passkeys_register_verify():
     try:
@@ -1310,7 +1490,7 @@ def route_api_passkeys_register_verify():
         print(f"[ERROR] Failed to verify passkey registration: {str(e)}")
         return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
 
-@app.route('/api/passkeys/authenticate/options', methods=["POST"])
+@bp.route('/api/passkeys/authenticate/options', methods=["POST"])
 def route_api_passkeys_authenticate_options():
     try:
         username = request.json.get("username")
@@ -1335,7 +1515,7 @@ def route_api_passkeys_authenticate_options():
         print(f"[ERROR] Failed to generate authentication options: {str(e)}")
         return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
 
-@app.route('/api/passkeys/authenticate/passwordless/options', methods=["GET"])
+@bp.route('/api/passkeys/authenticate/passwordless/options', methods=["GET"])
 def route_api_passkeys_authenticate_passwordless_options():
     try:
         print(f"[INFO] Generating passwordless authentication options")
@@ -1357,7 +1537,7 @@ def route_api_passkeys_authenticate_passwordless_options():
         print(f"[ERROR] Failed to generate passwordless authentication options: {str(e)}")
         return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
 
-@app.route('/api/passkeys/authenticate/verify', methods=["POST"])
+@bp.route('/api/passkeys/authenticate/verify', methods=["POST"])
 def route_api_passkeys_authenticate_verify():
     try:
         credential_data = request.json.get("credential")
@@ -1386,7 +1566,7 @@ def route_api_passkeys_authenticate_verify():
         print(f"[ERROR] Failed to verify passkey authentication: {str(e)}")
         return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
 
-@app.route('/api/passkeys/<credential_id>', methods=["DELETE"])
+@bp.route('/api/passkeys/<credential_id>', methods=["DELETE"])
 @auth_required
 def route_api_passkeys_delete(credential_id):
     try:
@@ -1401,7 +1581,7 @@ def route_api_passkeys_delete(credential_id):
         return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
 
 # User suspension API routes
-@app.route("/api/users/<username>/suspend", methods=["POST"])
+@bp.route("/api/users/<username>/suspend", methods=["POST"])
 @auth_required
 @admin_required
 def route_api_users_suspend(username):
@@ -1414,7 +1594,7 @@ def route_api_users_suspend(username):
 
     return jsonify({"success": success, "message": message})
 
-@app.route("/api/users/<username>/unsuspend", methods=["POST"])
+@bp.route("/api/users/<username>/unsuspend", methods=["POST"])
 @auth_required
 @admin_required
 def route_api_users_unsuspend(username):
@@ -1428,16 +1608,15 @@ def route_api_users_unsuspend(username):
     return jsonify({"success": success, "message": message})
 
 # User registration and approval API routes
-@app.route("/register")
+@bp.route("/register")
 def route_register():
     # If already logged in, redirect to home
     if users.is_authenticated():
         return redirect("/")
 
-    with open("static/register.html", "r") as f:
-        return f.read()
+    return pages.serve_page("register.html")
 
-@app.route("/api/register", methods=["POST"])
+@bp.route("/api/register", methods=["POST"])
 def route_api_register():
     username = request.json.get("username")
     password = request.json.get("password")
@@ -1468,7 +1647,7 @@ def route_api_register():
 
     return jsonify({"success": success, "message": message})
 
-@app.route("/api/users/<username>/approve", methods=["POST"])
+@bp.route("/api/users/<username>/approve", methods=["POST"])
 @auth_required
 @admin_required
 def route_api_users_approve(username):
@@ -1481,7 +1660,7 @@ def route_api_users_approve(username):
 
     return jsonify({"success": success, "message": message})
 
-@app.route("/api/users/<username>/reject", methods=["POST"])
+@bp.route("/api/users/<username>/reject", methods=["POST"])
 @auth_required
 @admin_required
 def route_api_users_reject(username):
@@ -1495,17 +1674,15 @@ def route_api_users_reject(username):
     return jsonify({"success": success, "message": message})
 
 # Invite link API routes
-@app.route("/api/invites", methods=["GET"])
+@bp.route("/api/invites", methods=["GET"])
 @auth_required
 @admin_required
 def route_api_invites_get():
     """Get all invite links"""
     try:
+        # Expired invites are pruned whenever the invites database is written
         invites_data = invites.get_invites()
 
-        # Clean expired invites
-        invites.clean_expired_invites()
-
         return jsonify({
             "success": True,
             "invites": invites_data["invites"]
@@ -1514,7 +1691,7 @@ def route_api_invites_get():
         print(f"[ERROR] Failed to fetch invites: {str(e)}")
         return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
 
-@app.route("/api/invites", methods=["POST"])
+@bp.route("/api/invites", methods=["POST"])
 @auth_required
 @admin_required
 def route_api_invites_create():
@@ -1568,7 +1745,7 @@ def route_api_invites_create():
         print(f"[ERROR] Failed to create invite: {str(e)}")
         return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
 
-@app.route("/api/invites/<invite_code>", methods=["DELETE"])
+@bp.route("/api/invites/<invite_code>", methods=["DELETE"])
 @auth_required
 @admin_required
 def route_api_invites_delete(invite_code):
@@ -1588,7 +1765,7 @@ def route_api_invites_delete(invite_code):
         print(f"[ERROR] Failed to delete invite: {str(e)}")
         return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
 
-@app.route("/api/invites/validate/<invite_code>", methods=["GET"])
+@bp.route("/api/invites/validate/<invite_code>", methods=["GET"])
 def route_api_invites_validate(invite_code):
     """Validate an invite code (public endpoint)"""
     try:
@@ -1615,7 +1792,7 @@ def route_api_invites_validate(invite_code):
         return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
 
 # Modify the registration endpoint to support invite codes
-@app.route("/api/register/invite", methods=["POST"])
+@bp.route("/api/register/invite", methods=["POST"])
 def route_api_register_with_invite():
     """Register a new user with an invite code"""
     try:
@@ -1626,27 +1803,30 @@ def route_api_register_with_invite():
         if not username or not password or not invite_code:
             return jsonify({"success": False, "message": "Username, password, and invite code are required"})
 
-        # Validate the invite code
-        is_valid, message, invite_data = invites.validate_invite(invite_code)
+        # Validate the invite code and mark it as used in one step
+        is_valid, message, invite_data = invites.consume_invite(invite_code)
 
         if not is_valid:
             return jsonify({"success": False, "message": message})
 
         # Create user with the settings from the invite
-        success, message = users.create_user(
-            username,
-            password,
-            is_admin=invite_data["is_admin"],
-            daily_quota=invite_data["daily_quota"],
-            weekly_quota=invite_data["weekly_quota"],
-            monthly_quota=invite_data["monthly_quota"],
-            pending_approval=False  # No approval needed for invited users
-        )
+        success = False
+        try:
+            success, message = users.create_user(
+                username,
+                password,
+                is_admin=invite_data["is_admin"],
+                daily_quota=invite_data["daily_quota"],
+                weekly_quota=invite_data["weekly_quota"],
+                monthly_quota=invite_data["monthly_quota"],
+                pending_approval=False  # No approval needed for invited users
+            )
+        finally:
+            if not success:
+                # Give the use back since no user was created (also if creating it raised)
+                invites.release_invite(invite_code)
 
         if success:
-            # Mark the invite as used
-            invites.use_invite(invite_code)
-
             # Log user registration
             logs.log_event(username, "user_registered_with_invite", f"User registered with invite code {invite_code}")
 
@@ -1657,5 +1837,44 @@ def route_api_register_with_invite():
         print(f"[ERROR] Failed to register with invite: {str(e)}")
         return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
 
+def create_app():
+    """Create and configure the Flask application
+
+    Called once per process: by the development server below, or by every
+    gunicorn worker in production mode.
+
+    Returns:
+        Flask: The configured application
+    """
+    # Static files are served by route_static (fingerprinted, precompressed) instead of Flask's static route
+    app = Flask(__name__, static_folder=None)
+
+    app.config["SESSION_PERMANENT"] = False
+    app.config["SECRET_KEY"] = config.get_secret("flask_secret.key", "SECRET_KEY")  # Shared by all worker processes
+    app.json_encoder = BytesEncoder  # Use custom JSON encoder for bytes objects
+
+    if sessions.get_session_settings()['backend'] == 'filesystem':
+        # Configure Flask-Session
+        app.config["SESSION_TYPE"] = "filesystem"
+        app.config["SESSION_USE_SIGNER"] = True
+        Session(app)
+    else:
+        # SQLite store with an in-memory cache, shared by all worker processes
+        sessions.init_app(app)
+
+    init_databases()
+    app.register_blueprint(bp)
+
+    # Connect to qBittorrent and load providers in the background so a slow or
+    # unreachable qBittorrent never delays startup
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    return app
+
 # Start the application
-app.run("0.0.0.0", port=80, debug=True)
\ No newline at end of file
+if __name__ == "__main__":
+    if os.environ.get("SERVER_MODE", "development").lower() == "production":
+        # Workers import the server module themselves, so every process gets its own
+        # qBittorrent connection, thread pools and background threads
+        wsgi.run_production(lambda: importlib.import_module("server").create_app())
+    else:
+        create_app().run("0.0.0.0", port=80, debug=True)
\ No newline at end of file
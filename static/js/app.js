@@ -634,6 +634,7 @@ function initSearchPage() {
 
         try {
           // Search TMDB with media type filter
+          currentSearch = { query, mediaType, page: 1, totalPages: 1 };
           const response = await fetch(`/api/search?q=${encodeURIComponent(query)}&media_type=${mediaType}`);
           const data = await response.json();
 
@@ -653,10 +654,41 @@ function initSearchPage() {
   }
 }
 
+// Current TMDB search, used to load further result pages
+let currentSearch = null;
+
+// Load the next page of TMDB results (the server prefetches it while the current page is shown)
+async function loadMoreSearchResults() {
+  if (!currentSearch || currentSearch.page >= currentSearch.totalPages) return;
+
+  const loadMoreBtn = document.getElementById('load-more-btn');
+  if (loadMoreBtn) loadMoreBtn.disabled = true;
+
+  try {
+    const nextPage = currentSearch.page + 1;
+    const response = await fetch(`/api/search?q=${encodeURIComponent(currentSearch.query)}&media_type=${currentSearch.mediaType}&page=${nextPage}`);
+    const data = await response.json();
+
+    if (data.results && Array.isArray(data.results)) {
+      currentSearch.page = data.page || nextPage;
+      currentSearch.totalPages = data.total_pages || currentSearch.totalPages;
+      displayTMDBResults(data.results, true);
+    }
+  } catch (error) {
+    console.error('Error loading more results:', error);
+    showToast('Error loading more results', 'error');
+    if (loadMoreBtn) loadMoreBtn.disabled = false;
+  }
+}
+
 // Display search results
 function displaySearchResults(data) {
   // Check if we have TMDB results
   if (data.results && Array.isArray(data.results)) {
+    if (currentSearch) {
+      currentSearch.page = data.page || 1;
+      currentSearch.totalPages = data.total_pages || 1;
+    }
     displayTMDBResults(data.results);
   } else if (Array.isArray(data)) {
     // Handle direct TPB results (fallback)
@@ -666,14 +698,14 @@ function displaySearchResults(data) {
   }
 }
 
-// Display TMDB movie/show results
-function displayTMDBResults(results) {
-  if (!results || results.length === 0) {
+// Display TMDB movie/show results (append adds them below the results already shown)
+function displayTMDBResults(results, append = false) {
+  if (!append && (!results || results.length === 0)) {
     searchResults.innerHTML = '<div class="text-center p-8">No results found</div>';
     return;
   }
 
-  let html = '<div class="grid grid-cols-2 md:grid-cols-3 lg:grid-cols-5 gap-4">';
+  let html = '';
 
   results.forEach(result => {
     const title = result.title || result.name || 'Unknown Title';
@@ -703,8 +735,25 @@ function displayTMDBResults(results) {
     `;
   });
 
-  html += '</div>';
-  searchResults.innerHTML = html;
+  let grid = document.getElementById('tmdb-results-grid');
+  if (!append || !grid) {
+    searchResults.innerHTML = '<div id="tmdb-results-grid" class="grid grid-cols-2 md:grid-cols-3 lg:grid-cols-5 gap-4"></div>';
+    grid = document.getElementById('tmdb-results-grid');
+  }
+  grid.insertAdjacentHTML('beforeend', html);
+
+  // Show a "load more" button while there are more pages
+  const existingLoadMore = document.getElementById('load-more-container');
+  if (existingLoadMore) existingLoadMore.remove();
+  if (currentSearch && currentSearch.page < currentSearch.totalPages) {
+    searchResults.insertAdjacentHTML('beforeend', `
+      <div id="load-more-container" class="flex justify-center mt-4">
+        <button id="load-more-btn" class="btn btn-primary" onclick="loadMoreSearchResults()">
+          <i class="fas fa-plus mr-1"></i> Load more
+        </button>
+      </div>
+    `);
+  }
 }
 
 // Display ThePirateBay results
@@ -941,7 +990,7 @@ function displayMediaTorrents(torrents, filters = {}) {
 
     // Process torrents to extract filter values and apply filters
     let filteredTorrents = torrents.filter(torrent => {
-      const metadata = extractMetadata(torrent.name);
+      const metadata = torrent.metadata || extractMetadata(torrent.name);
 
       // Add to filter options
       if (metadata.quality) qualities.add(metadata.quality);
@@ -1051,7 +1100,7 @@ function displayMediaTorrents(torrents, filters = {}) {
 
       filteredTorrents.forEach(torrent => {
         // Extract metadata from filename
-        const metadata = extractMetadata(torrent.name);
+        const metadata = torrent.metadata || extractMetadata(torrent.name);
 
         // Create metadata chips HTML
         let metadataChips = '';
@@ -1131,7 +1180,7 @@ function displayMediaTorrents(torrents, filters = {}) {
 
       filteredTorrents.forEach(torrent => {
         // Extract metadata from filename
-        const metadata = extractMetadata(torrent.name);
+        const metadata = torrent.metadata || extractMetadata(torrent.name);
 
         // Create metadata chips HTML
         let metadataChips = '';
@@ -1342,7 +1391,7 @@ function determineContentType(torrents) {
   let tvShowCount = 0;
 
   torrents.forEach(torrent => {
-    const metadata = extractMetadata(torrent.name);
+    const metadata = torrent.metadata || extractMetadata(torrent.name);
     if (metadata.contentType === 'movie') {
       movieCount++;
     } else if (metadata.contentType === 'tvshow') {
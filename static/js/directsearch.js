@@ -257,7 +257,7 @@ function displayDirectSearchResults(results, skipFilterUpdate = false) {
 
   // Apply main filters first
   let filteredResults = results.filter(result => {
-    const metadata = extractMetadata(result.name);
+    const metadata = result.metadata || extractMetadata(result.name);
 
     // Add to filter options
     if (metadata.year) years.add(metadata.year);
@@ -296,7 +296,7 @@ function displayDirectSearchResults(results, skipFilterUpdate = false) {
     const searchTerm = directSearchFilters.liveSearch.toLowerCase();
     filteredResults = filteredResults.filter(result => {
       // Extract metadata for searching in tags
-      const metadata = extractMetadata(result.name);
+      const metadata = result.metadata || extractMetadata(result.name);
 
       // Create a searchable string that includes all metadata
       let searchableText = result.name.toLowerCase();
@@ -412,7 +412,7 @@ function displayDirectSearchResults(results, skipFilterUpdate = false) {
     html += '<div class="space-y-2">';
 
     filteredResults.forEach(result => {
-      const metadata = extractMetadata(result.name);
+      const metadata = result.metadata || extractMetadata(result.name);
 
       // Prepare highlighted name if live search is active
       let highlightedName = result.name;
@@ -517,7 +517,7 @@ function displayDirectSearchResults(results, skipFilterUpdate = false) {
     `;
 
     filteredResults.forEach(result => {
-      const metadata = extractMetadata(result.name);
+      const metadata = result.metadata || extractMetadata(result.name);
 
       // Prepare highlighted name if live search is active
       let highlightedName = result.name;
@@ -1,6 +1,8 @@
 // Service Worker for PrettyDownloader PWA
 
-const CACHE_NAME = 'prettydownloader-v1';
+// The placeholder in CACHE_NAME is replaced with the static asset build hash when sw.js
+// is served, so every deploy gets a fresh cache and old ones are removed on activate
+const CACHE_NAME = 'prettydownloader-__BUILD_HASH__';
 
 // Assets to cache on install
 const CACHE_ASSETS = [